@@ -1,6 +1,7 @@
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import Page, PageParams, paginate
 from app.models.document import Document
 
 
@@ -19,7 +20,16 @@ class DocumentRepository:
         result = await self.session.execute(select(Document).where(Document.id == doc_id))
         return result.scalar_one_or_none()
 
-    async def list_all(self) -> list[Document]:
-        result = await self.session.execute(select(Document))
-        return list(result.scalars().all())
+    async def list_all(self, params: PageParams) -> Page:
+        return await paginate(self.session, select(Document), [Document.id], params)
 
+    async def delete(self, doc: Document) -> None:
+        await self.session.delete(doc)
+        await self.session.commit()
+
+    async def reference_counts(self) -> dict[str, int]:
+        """Cuántos Document apuntan a cada blob (stored_path)"""
+        result = await self.session.execute(
+            select(Document.stored_path, func.count(Document.id)).group_by(Document.stored_path)
+        )
+        return {path: count for path, count in result.all()}
@@ -1,6 +1,10 @@
+from datetime import date
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.repositories.donation_rollup import DonationRollupRepository
+from app.core.pagination import Page, PageParams, paginate
 from app.models.donation import Donation
 
 
@@ -11,13 +15,26 @@ class DonationRepository:
     async def create(self, *, user_id: int | None, **data) -> Donation:
         donation = Donation(user_id=user_id, **data)
         self.session.add(donation)
+        if donation.donation_date is not None:
+            await DonationRollupRepository(self.session).increment(
+                day=donation.donation_date,
+                donation_type=donation.donation_type,
+                payment_method=donation.payment_method,
+                amount=donation.amount,
+            )
         await self.session.commit()
         await self.session.refresh(donation)
         return donation
 
-    async def list_all(self) -> list[Donation]:
-        result = await self.session.execute(select(Donation))
-        return list(result.scalars().all())
+    async def list_all(
+        self, params: PageParams, *, start_date: date | None = None, end_date: date | None = None
+    ) -> Page:
+        stmt = select(Donation)
+        if start_date:
+            stmt = stmt.where(Donation.donation_date >= start_date)
+        if end_date:
+            stmt = stmt.where(Donation.donation_date <= end_date)
+        return await paginate(self.session, stmt, [Donation.id], params)
 
     async def list_by_user(self, user_id: int) -> list[Donation]:
         result = await self.session.execute(select(Donation).where(Donation.user_id == user_id))
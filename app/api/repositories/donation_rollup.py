@@ -0,0 +1,97 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.donation import Donation, DonationDailyRollup
+
+
+class DonationRollupRepository:
+    """Mantiene donation_daily_rollups (día, tipo, método de pago)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _upsert_insert(self):
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return None
+        return dialect_insert
+
+    async def increment(
+        self,
+        *,
+        day: date,
+        donation_type: str,
+        payment_method: str,
+        amount: Decimal,
+        count: int = 1,
+    ) -> None:
+        """Suma una donación al agregado del día (sin commit: va en la misma transacción)"""
+        values = {
+            "day": day,
+            "donation_type": donation_type,
+            "payment_method": payment_method,
+            "donation_count": count,
+            "total_amount": amount,
+        }
+        dialect_insert = self._upsert_insert()
+        if dialect_insert is not None:
+            stmt = dialect_insert(DonationDailyRollup).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    DonationDailyRollup.day,
+                    DonationDailyRollup.donation_type,
+                    DonationDailyRollup.payment_method,
+                ],
+                set_={
+                    "donation_count": DonationDailyRollup.donation_count + stmt.excluded.donation_count,
+                    "total_amount": DonationDailyRollup.total_amount + stmt.excluded.total_amount,
+                },
+            )
+            await self.session.execute(stmt)
+            return
+
+        result = await self.session.execute(
+            update(DonationDailyRollup)
+            .where(
+                DonationDailyRollup.day == day,
+                DonationDailyRollup.donation_type == donation_type,
+                DonationDailyRollup.payment_method == payment_method,
+            )
+            .values(
+                donation_count=DonationDailyRollup.donation_count + count,
+                total_amount=DonationDailyRollup.total_amount + amount,
+            )
+        )
+        if result.rowcount == 0:
+            await self.session.execute(insert(DonationDailyRollup).values(**values))
+
+    async def rebuild(self) -> int:
+        """Recalcula todos los agregados desde donations. Retorna filas generadas."""
+        await self.session.execute(delete(DonationDailyRollup))
+        source = (
+            select(
+                Donation.donation_date,
+                Donation.donation_type,
+                Donation.payment_method,
+                func.count(Donation.id),
+                func.coalesce(func.sum(Donation.amount), 0),
+            )
+            .where(Donation.donation_date.is_not(None))
+            .group_by(Donation.donation_date, Donation.donation_type, Donation.payment_method)
+        )
+        await self.session.execute(
+            insert(DonationDailyRollup).from_select(
+                ["day", "donation_type", "payment_method", "donation_count", "total_amount"],
+                source,
+            )
+        )
+        await self.session.commit()
+        result = await self.session.execute(select(func.count()).select_from(DonationDailyRollup))
+        return result.scalar_one()
@@ -1,6 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import Page, PageParams, paginate
 from app.models.event import Event
 
 
@@ -15,9 +16,8 @@ class EventRepository:
         await self.session.refresh(event)
         return event
 
-    async def list_all(self) -> list[Event]:
-        result = await self.session.execute(select(Event))
-        return list(result.scalars().all())
+    async def list_all(self, params: PageParams) -> Page:
+        return await paginate(self.session, select(Event), [Event.id], params)
 
     async def get_by_id(self, event_id: int) -> Event | None:
         result = await self.session.execute(select(Event).where(Event.id == event_id))
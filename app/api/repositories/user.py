@@ -1,7 +1,10 @@
 from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash
+from app.core.pagination import Page, PageParams, paginate
+from app.core.security import get_password_hash_async
+from app.core.tenant import current_tenant
+from app.core.user_cache import user_cache
 from app.models.user import User
 
 
@@ -17,12 +20,11 @@ class UserRepository:
         result = await self.session.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
 
-    async def list_all(self) -> list[User]:
-        result = await self.session.execute(select(User))
-        return list(result.scalars().all())
+    async def list_all(self, params: PageParams) -> Page:
+        return await paginate(self.session, select(User), [User.id], params)
 
     async def create_user(self, email: str, password: str, full_name: str | None, role: str = "member") -> User:
-        hashed = get_password_hash(password)
+        hashed = await get_password_hash_async(password)
         user = User(email=email, hashed_password=hashed, full_name=full_name, role=role)
         self.session.add(user)
         await self.session.commit()
@@ -46,16 +48,18 @@ class UserRepository:
         if role is not None:
             user.role = role
         if password is not None:
-            user.hashed_password = get_password_hash(password)
+            user.hashed_password = await get_password_hash_async(password)
         if is_active is not None:
             user.is_active = is_active
 
         await self.session.commit()
+        user_cache.invalidate(current_tenant().slug, user_id)
         await self.session.refresh(user)
         return user
 
     async def delete_user(self, user_id: int) -> bool:
         result = await self.session.execute(delete(User).where(User.id == user_id))
         await self.session.commit()
+        user_cache.invalidate(current_tenant().slug, user_id)
         return result.rowcount > 0
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from app.api.routes import (
     health,
+    metrics,
     auth,
     users,
     donations,
@@ -20,6 +21,7 @@ router = APIRouter()
 
 # Health check (sin tenant)
 router.include_router(health.router, prefix="/health", tags=["health"])
+router.include_router(metrics.router, prefix="/metrics", tags=["health"])
 
 # Super Admin routes (sin tenant)
 router.include_router(superadmin.router)
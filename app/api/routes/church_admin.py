@@ -2,7 +2,7 @@
 Rutas de administración de la iglesia - Solo para admins del tenant
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,10 +14,20 @@ from app.api.schemas.church import (
 )
 from app.core.tenant import get_tenant_db, require_tenant
 from app.core.deps import require_admin
+from app.core.pagination import PageParams, build_page, page_items, page_params
+from app.api.routes.ws import manager
+from app.core.response_cache import invalidate_public_cache
+from app.core.sse import public_events
+from app.db.rows import RowMapper
 from app.models.user import User
 
 router = APIRouter(prefix="/admin", tags=["church-admin"])
 
+CONFIG_ROWS = RowMapper(ChurchConfigRead)
+STREAM_ROWS = RowMapper(LiveStreamRead)
+CONTENT_ROWS = RowMapper(PublicContentRead)
+ANNOUNCEMENT_ROWS = RowMapper(AnnouncementRead)
+
 
 # ============== Configuración de Iglesia ==============
 
@@ -27,44 +37,13 @@ async def get_church_config(
     current_user: User = Depends(require_admin)
 ):
     """Obtiene la configuración completa de la iglesia"""
-    result = await session.execute(text("SELECT * FROM church_config LIMIT 1"))
+    result = await session.execute(text(f"SELECT {CONFIG_ROWS.columns} FROM church_config LIMIT 1"))
     config = result.fetchone()
     
     if not config:
         raise HTTPException(status_code=404, detail="Configuración no encontrada")
     
-    return ChurchConfigRead(
-        id=config.id,
-        church_name=config.church_name,
-        slogan=config.slogan,
-        description=config.description,
-        about_us=config.about_us,
-        mission=config.mission,
-        vision=config.vision,
-        values=config.values,
-        history=config.history,
-        address=config.address,
-        city=config.city,
-        country=config.country,
-        phone=config.phone,
-        email=config.email,
-        website=config.website,
-        logo_url=config.logo_url,
-        cover_image_url=config.cover_image_url,
-        primary_color=config.primary_color,
-        secondary_color=config.secondary_color,
-        social_facebook=config.social_facebook,
-        social_instagram=config.social_instagram,
-        social_youtube=config.social_youtube,
-        social_twitter=config.social_twitter,
-        social_tiktok=config.social_tiktok,
-        donation_info=config.donation_info,
-        bank_info=config.bank_info,
-        paypal_email=config.paypal_email,
-        donation_link=config.donation_link,
-        service_schedule=config.service_schedule,
-        updated_at=config.updated_at
-    )
+    return CONFIG_ROWS.response(config)
 
 
 @router.patch("/config", response_model=ChurchConfigRead)
@@ -95,47 +74,17 @@ async def update_church_config(
     updates.append("updated_at = NOW()")
     
     result = await session.execute(
-        text(f"UPDATE church_config SET {', '.join(updates)} WHERE id = 1 RETURNING *"),
+        text(f"UPDATE church_config SET {', '.join(updates)} WHERE id = 1 RETURNING {CONFIG_ROWS.columns}"),
         params
     )
     config = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("config")
     
     if not config:
         raise HTTPException(status_code=404, detail="Configuración no encontrada")
     
-    return ChurchConfigRead(
-        id=config.id,
-        church_name=config.church_name,
-        slogan=config.slogan,
-        description=config.description,
-        about_us=config.about_us,
-        mission=config.mission,
-        vision=config.vision,
-        values=config.values,
-        history=config.history,
-        address=config.address,
-        city=config.city,
-        country=config.country,
-        phone=config.phone,
-        email=config.email,
-        website=config.website,
-        logo_url=config.logo_url,
-        cover_image_url=config.cover_image_url,
-        primary_color=config.primary_color,
-        secondary_color=config.secondary_color,
-        social_facebook=config.social_facebook,
-        social_instagram=config.social_instagram,
-        social_youtube=config.social_youtube,
-        social_twitter=config.social_twitter,
-        social_tiktok=config.social_tiktok,
-        donation_info=config.donation_info,
-        bank_info=config.bank_info,
-        paypal_email=config.paypal_email,
-        donation_link=config.donation_link,
-        service_schedule=config.service_schedule,
-        updated_at=config.updated_at
-    )
+    return CONFIG_ROWS.response(config)
 
 
 # ============== Transmisiones en Vivo ==============
@@ -147,27 +96,11 @@ async def list_streams(
 ):
     """Lista todas las transmisiones"""
     result = await session.execute(
-        text("SELECT * FROM live_streams ORDER BY created_at DESC")
+        text(f"SELECT {STREAM_ROWS.columns} FROM live_streams ORDER BY created_at DESC")
     )
     streams = result.fetchall()
     
-    return [LiveStreamRead(
-        id=s.id,
-        title=s.title,
-        description=s.description,
-        stream_url=s.stream_url,
-        youtube_video_id=s.youtube_video_id,
-        facebook_video_id=s.facebook_video_id,
-        platform=s.platform,
-        is_live=s.is_live,
-        is_featured=s.is_featured,
-        scheduled_at=s.scheduled_at,
-        started_at=s.started_at,
-        ended_at=s.ended_at,
-        thumbnail_url=s.thumbnail_url,
-        view_count=s.view_count,
-        created_at=s.created_at
-    ) for s in streams]
+    return STREAM_ROWS.list_response(streams)
 
 
 @router.post("/streams", response_model=LiveStreamRead, status_code=status.HTTP_201_CREATED)
@@ -178,12 +111,12 @@ async def create_stream(
 ):
     """Crea una nueva transmisión"""
     result = await session.execute(
-        text("""
+        text(f"""
             INSERT INTO live_streams (title, description, stream_url, youtube_video_id, 
                 facebook_video_id, platform, is_live, is_featured, scheduled_at, thumbnail_url, created_by_id)
             VALUES (:title, :description, :stream_url, :youtube_video_id, 
                 :facebook_video_id, :platform, :is_live, :is_featured, :scheduled_at, :thumbnail_url, :created_by_id)
-            RETURNING *
+            RETURNING {STREAM_ROWS.columns}
         """),
         {
             "title": data.title,
@@ -201,24 +134,9 @@ async def create_stream(
     )
     stream = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("streams")
     
-    return LiveStreamRead(
-        id=stream.id,
-        title=stream.title,
-        description=stream.description,
-        stream_url=stream.stream_url,
-        youtube_video_id=stream.youtube_video_id,
-        facebook_video_id=stream.facebook_video_id,
-        platform=stream.platform,
-        is_live=stream.is_live,
-        is_featured=stream.is_featured,
-        scheduled_at=stream.scheduled_at,
-        started_at=stream.started_at,
-        ended_at=stream.ended_at,
-        thumbnail_url=stream.thumbnail_url,
-        view_count=stream.view_count,
-        created_at=stream.created_at
-    )
+    return STREAM_ROWS.response(stream, status_code=status.HTTP_201_CREATED)
 
 
 @router.patch("/streams/{stream_id}", response_model=LiveStreamRead)
@@ -241,32 +159,17 @@ async def update_stream(
         raise HTTPException(status_code=400, detail="No hay campos para actualizar")
     
     result = await session.execute(
-        text(f"UPDATE live_streams SET {', '.join(updates)} WHERE id = :id RETURNING *"),
+        text(f"UPDATE live_streams SET {', '.join(updates)} WHERE id = :id RETURNING {STREAM_ROWS.columns}"),
         params
     )
     stream = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("streams")
     
     if not stream:
         raise HTTPException(status_code=404, detail="Transmisión no encontrada")
     
-    return LiveStreamRead(
-        id=stream.id,
-        title=stream.title,
-        description=stream.description,
-        stream_url=stream.stream_url,
-        youtube_video_id=stream.youtube_video_id,
-        facebook_video_id=stream.facebook_video_id,
-        platform=stream.platform,
-        is_live=stream.is_live,
-        is_featured=stream.is_featured,
-        scheduled_at=stream.scheduled_at,
-        started_at=stream.started_at,
-        ended_at=stream.ended_at,
-        thumbnail_url=stream.thumbnail_url,
-        view_count=stream.view_count,
-        created_at=stream.created_at
-    )
+    return STREAM_ROWS.response(stream)
 
 
 @router.post("/streams/{stream_id}/go-live", response_model=LiveStreamRead)
@@ -277,37 +180,38 @@ async def start_live_stream(
 ):
     """Inicia una transmisión en vivo"""
     result = await session.execute(
-        text("""
+        text(f"""
             UPDATE live_streams 
             SET is_live = TRUE, started_at = NOW() 
             WHERE id = :id 
-            RETURNING *
+            RETURNING {STREAM_ROWS.columns}
         """),
         {"id": stream_id}
     )
     stream = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("streams")
     
     if not stream:
         raise HTTPException(status_code=404, detail="Transmisión no encontrada")
-    
-    return LiveStreamRead(
-        id=stream.id,
-        title=stream.title,
-        description=stream.description,
-        stream_url=stream.stream_url,
-        youtube_video_id=stream.youtube_video_id,
-        facebook_video_id=stream.facebook_video_id,
-        platform=stream.platform,
-        is_live=stream.is_live,
-        is_featured=stream.is_featured,
-        scheduled_at=stream.scheduled_at,
-        started_at=stream.started_at,
-        ended_at=stream.ended_at,
-        thumbnail_url=stream.thumbnail_url,
-        view_count=stream.view_count,
-        created_at=stream.created_at
+
+    await manager.broadcast(
+        "streams",
+        {"type": "stream.live", "stream_id": stream.id, "title": stream.title, "stream_url": stream.stream_url},
     )
+    await public_events.publish(
+        "stream.live",
+        {
+            "stream_id": stream.id,
+            "title": stream.title,
+            "platform": stream.platform,
+            "youtube_video_id": stream.youtube_video_id,
+            "facebook_video_id": stream.facebook_video_id,
+            "stream_url": stream.stream_url,
+        },
+    )
+    
+    return STREAM_ROWS.response(stream)
 
 
 @router.post("/streams/{stream_id}/end-live", response_model=LiveStreamRead)
@@ -318,37 +222,25 @@ async def end_live_stream(
 ):
     """Finaliza una transmisión en vivo"""
     result = await session.execute(
-        text("""
+        text(f"""
             UPDATE live_streams 
             SET is_live = FALSE, ended_at = NOW() 
             WHERE id = :id 
-            RETURNING *
+            RETURNING {STREAM_ROWS.columns}
         """),
         {"id": stream_id}
     )
     stream = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("streams")
     
     if not stream:
         raise HTTPException(status_code=404, detail="Transmisión no encontrada")
+
+    await manager.broadcast("streams", {"type": "stream.ended", "stream_id": stream.id, "title": stream.title})
+    await public_events.publish("stream.ended", {"stream_id": stream.id, "title": stream.title})
     
-    return LiveStreamRead(
-        id=stream.id,
-        title=stream.title,
-        description=stream.description,
-        stream_url=stream.stream_url,
-        youtube_video_id=stream.youtube_video_id,
-        facebook_video_id=stream.facebook_video_id,
-        platform=stream.platform,
-        is_live=stream.is_live,
-        is_featured=stream.is_featured,
-        scheduled_at=stream.scheduled_at,
-        started_at=stream.started_at,
-        ended_at=stream.ended_at,
-        thumbnail_url=stream.thumbnail_url,
-        view_count=stream.view_count,
-        created_at=stream.created_at
-    )
+    return STREAM_ROWS.response(stream)
 
 
 @router.delete("/streams/{stream_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -363,6 +255,7 @@ async def delete_stream(
         {"id": stream_id}
     )
     await session.commit()
+    await invalidate_public_cache("streams")
     return None
 
 
@@ -375,26 +268,11 @@ async def list_content(
 ):
     """Lista todo el contenido"""
     result = await session.execute(
-        text("SELECT * FROM public_content ORDER BY updated_at DESC")
+        text(f"SELECT {CONTENT_ROWS.columns} FROM public_content ORDER BY updated_at DESC")
     )
     contents = result.fetchall()
     
-    return [PublicContentRead(
-        id=c.id,
-        slug=c.slug,
-        title=c.title,
-        content=c.content,
-        excerpt=c.excerpt,
-        content_type=c.content_type,
-        featured_image_url=c.featured_image_url,
-        is_published=c.is_published,
-        is_featured=c.is_featured,
-        published_at=c.published_at,
-        meta_title=c.meta_title,
-        meta_description=c.meta_description,
-        created_at=c.created_at,
-        updated_at=c.updated_at
-    ) for c in contents]
+    return CONTENT_ROWS.list_response(contents)
 
 
 @router.post("/content", response_model=PublicContentRead, status_code=status.HTTP_201_CREATED)
@@ -405,14 +283,14 @@ async def create_content(
 ):
     """Crea nuevo contenido"""
     result = await session.execute(
-        text("""
+        text(f"""
             INSERT INTO public_content (slug, title, content, excerpt, content_type,
                 featured_image_url, is_published, is_featured, meta_title, meta_description,
                 published_at, created_by_id)
             VALUES (:slug, :title, :content, :excerpt, :content_type,
                 :featured_image_url, :is_published, :is_featured, :meta_title, :meta_description,
                 CASE WHEN :is_published THEN NOW() ELSE NULL END, :created_by_id)
-            RETURNING *
+            RETURNING {CONTENT_ROWS.columns}
         """),
         {
             **data.model_dump(),
@@ -421,23 +299,9 @@ async def create_content(
     )
     content = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("content")
     
-    return PublicContentRead(
-        id=content.id,
-        slug=content.slug,
-        title=content.title,
-        content=content.content,
-        excerpt=content.excerpt,
-        content_type=content.content_type,
-        featured_image_url=content.featured_image_url,
-        is_published=content.is_published,
-        is_featured=content.is_featured,
-        published_at=content.published_at,
-        meta_title=content.meta_title,
-        meta_description=content.meta_description,
-        created_at=content.created_at,
-        updated_at=content.updated_at
-    )
+    return CONTENT_ROWS.response(content, status_code=status.HTTP_201_CREATED)
 
 
 @router.patch("/content/{content_id}", response_model=PublicContentRead)
@@ -457,31 +321,17 @@ async def update_content(
             params[field] = value
     
     result = await session.execute(
-        text(f"UPDATE public_content SET {', '.join(updates)} WHERE id = :id RETURNING *"),
+        text(f"UPDATE public_content SET {', '.join(updates)} WHERE id = :id RETURNING {CONTENT_ROWS.columns}"),
         params
     )
     content = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("content")
     
     if not content:
         raise HTTPException(status_code=404, detail="Contenido no encontrado")
     
-    return PublicContentRead(
-        id=content.id,
-        slug=content.slug,
-        title=content.title,
-        content=content.content,
-        excerpt=content.excerpt,
-        content_type=content.content_type,
-        featured_image_url=content.featured_image_url,
-        is_published=content.is_published,
-        is_featured=content.is_featured,
-        published_at=content.published_at,
-        meta_title=content.meta_title,
-        meta_description=content.meta_description,
-        created_at=content.created_at,
-        updated_at=content.updated_at
-    )
+    return CONTENT_ROWS.response(content)
 
 
 @router.delete("/content/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -496,6 +346,7 @@ async def delete_content(
         {"id": content_id}
     )
     await session.commit()
+    await invalidate_public_cache("content")
     return None
 
 
@@ -503,22 +354,39 @@ async def delete_content(
 
 @router.get("/events")
 async def list_admin_events(
+    response: Response,
+    page: PageParams = Depends(page_params),
     session: AsyncSession = Depends(get_tenant_db),
     current_user: User = Depends(require_admin)
 ):
-    """Lista todos los eventos (vista admin) con conteo de registrados"""
+    """
+    Lista los eventos (vista admin) con conteo de registrados.
+
+    Paginado por (fecha de inicio, id) descendente; los eventos sin fecha
+    quedan al final.
+    """
+    where = ""
+    params = {"limit": page.limit + 1}
+    after = page.after_values(2)
+    if after:
+        where = "WHERE (COALESCE(e.start_date, DATE '0001-01-01'), e.id) < (:after_date, :after_id)"
+        params["after_date"], params["after_id"] = after
     result = await session.execute(
-        text("""
+        text(f"""
             SELECT e.id, e.name, e.description, e.start_date, e.end_date, e.start_time, e.end_time,
                    e.location, e.capacity, e.is_public, e.is_featured, e.image_url, e.created_at,
+                   COALESCE(e.start_date, DATE '0001-01-01') as sort_date,
                    COALESCE(COUNT(r.id) FILTER (WHERE NOT r.is_cancelled), 0) as registered_count
             FROM events e
             LEFT JOIN registrations r ON e.id = r.event_id
+            {where}
             GROUP BY e.id
-            ORDER BY e.start_date DESC
-        """)
+            ORDER BY sort_date DESC, e.id DESC
+            LIMIT :limit
+        """),
+        params
     )
-    events = result.fetchall()
+    events = page_items(response, build_page(result.fetchall(), page, key=lambda e: (e.sort_date, e.id)))
     
     return [{
         "id": e.id,
@@ -538,6 +406,48 @@ async def list_admin_events(
     } for e in events]
 
 
+@router.get("/events/{event_id}")
+async def get_admin_event(
+    event_id: int,
+    session: AsyncSession = Depends(get_tenant_db),
+    current_user: User = Depends(require_admin)
+):
+    """Obtiene un evento (vista admin) con su conteo de registrados"""
+    result = await session.execute(
+        text("""
+            SELECT e.id, e.name, e.description, e.start_date, e.end_date, e.start_time, e.end_time,
+                   e.location, e.capacity, e.is_public, e.is_featured, e.image_url, e.created_at,
+                   COALESCE(COUNT(r.id) FILTER (WHERE NOT r.is_cancelled), 0) as registered_count
+            FROM events e
+            LEFT JOIN registrations r ON e.id = r.event_id
+            WHERE e.id = :id
+            GROUP BY e.id
+        """),
+        {"id": event_id}
+    )
+    event = result.fetchone()
+    
+    if not event:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    
+    return {
+        "id": event.id,
+        "name": event.name,
+        "description": event.description,
+        "start_date": event.start_date.isoformat() if event.start_date else None,
+        "end_date": event.end_date.isoformat() if event.end_date else None,
+        "start_time": str(event.start_time) if event.start_time else None,
+        "end_time": str(event.end_time) if event.end_time else None,
+        "location": event.location,
+        "capacity": event.capacity,
+        "registered_count": event.registered_count,
+        "is_public": event.is_public,
+        "is_featured": event.is_featured,
+        "image_url": event.image_url,
+        "created_at": event.created_at.isoformat() if event.created_at else None
+    }
+
+
 def parse_date(date_str):
     """Convierte string a objeto date"""
     if not date_str:
@@ -578,7 +488,7 @@ async def create_admin_event(
 ):
     """Crea un nuevo evento"""
     result = await session.execute(
-        text("""
+        text(f"""
             INSERT INTO events (name, description, start_date, end_date, start_time, end_time,
                 location, capacity, is_public, is_featured, image_url, created_by_id)
             VALUES (:name, :description, :start_date, :end_date, :start_time, :end_time,
@@ -603,6 +513,11 @@ async def create_admin_event(
     )
     event = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("events")
+    await manager.broadcast(
+        "events",
+        {"type": "event.created", "event_id": event.id, "name": event.name, "capacity": event.capacity},
+    )
     
     return {
         "id": event.id,
@@ -663,6 +578,7 @@ async def update_admin_event(
     )
     event = result.fetchone()
     await session.commit()
+    await invalidate_public_cache("events")
     
     if not event:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
@@ -696,6 +612,7 @@ async def delete_admin_event(
         {"id": event_id}
     )
     await session.commit()
+    await invalidate_public_cache("events")
     return None
 
 
@@ -708,22 +625,11 @@ async def list_announcements(
 ):
     """Lista todos los anuncios"""
     result = await session.execute(
-        text("SELECT * FROM announcements ORDER BY priority DESC, created_at DESC")
+        text(f"SELECT {ANNOUNCEMENT_ROWS.columns} FROM announcements ORDER BY priority DESC, created_at DESC")
     )
     announcements = result.fetchall()
     
-    return [AnnouncementRead(
-        id=a.id,
-        title=a.title,
-        content=a.content,
-        announcement_type=a.announcement_type,
-        priority=a.priority,
-        is_public=a.is_public,
-        is_active=a.is_active,
-        start_date=a.start_date,
-        end_date=a.end_date,
-        created_at=a.created_at
-    ) for a in announcements]
+    return ANNOUNCEMENT_ROWS.list_response(announcements)
 
 
 @router.post("/announcements", response_model=AnnouncementRead, status_code=status.HTTP_201_CREATED)
@@ -739,7 +645,7 @@ async def create_announcement(
                 is_public, start_date, end_date, created_by_id)
             VALUES (:title, :content, :announcement_type, :priority,
                 :is_public, :start_date, :end_date, :created_by_id)
-            RETURNING *
+            RETURNING {ANNOUNCEMENT_ROWS.columns}
         """),
         {
             **data.model_dump(),
@@ -748,19 +654,23 @@ async def create_announcement(
     )
     announcement = result.fetchone()
     await session.commit()
-    
-    return AnnouncementRead(
-        id=announcement.id,
-        title=announcement.title,
-        content=announcement.content,
-        announcement_type=announcement.announcement_type,
-        priority=announcement.priority,
-        is_public=announcement.is_public,
-        is_active=announcement.is_active,
-        start_date=announcement.start_date,
-        end_date=announcement.end_date,
-        created_at=announcement.created_at
+    await invalidate_public_cache("announcements")
+    await manager.broadcast(
+        "announcements",
+        {
+            "type": "announcement.created",
+            "announcement_id": announcement.id,
+            "title": announcement.title,
+            "priority": announcement.priority,
+        },
     )
+    if announcement.is_public:
+        await public_events.publish(
+            "announcement.created",
+            {"announcement_id": announcement.id, "title": announcement.title, "priority": announcement.priority},
+        )
+    
+    return ANNOUNCEMENT_ROWS.response(announcement, status_code=status.HTTP_201_CREATED)
 
 
 @router.delete("/announcements/{announcement_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -775,5 +685,6 @@ async def delete_announcement(
         {"id": announcement_id}
     )
     await session.commit()
+    await invalidate_public_cache("announcements")
     return None
 
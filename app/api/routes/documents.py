@@ -1,12 +1,25 @@
+import asyncio
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, File, UploadFile, HTTPException, Form, Query, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 
 from app.api.schemas import DocumentRead
 from app.api.services.document import DocumentService
+from app.core.config import settings
 from app.core.deps import get_current_user, require_admin
-from app.db.session import get_session
+from app.core.http_cache import http_date, is_not_modified, requested_range, strong_etag
+from app.core.pagination import PageParams, page_items, page_params
+from app.core.storage import content_disposition, get_storage, iter_file_range
+from app.core.thumbnails import (
+    IMAGE_MIME,
+    derivative_extension,
+    derivative_mime,
+    get_derivative,
+    pregenerate_derivatives,
+    size_bucket,
+)
+from app.core.tenant import get_tenant_db
 from app.models.user import User
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -14,12 +27,13 @@ router = APIRouter(prefix="/documents", tags=["documents"])
 
 @router.post("", response_model=DocumentRead, status_code=201)
 async def upload_document(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     link_type: str | None = Form(None),
     ref_id: int | None = Form(None),
     description: str | None = Form(None),
     is_public: bool = Form(False),
-    session=Depends(get_session),
+    session=Depends(get_tenant_db),
     current_user: User = Depends(get_current_user),
 ):
     donation_id = ref_id if link_type == "donation" else None
@@ -28,7 +42,7 @@ async def upload_document(
 
     service = DocumentService(session)
     doc = await service.upload(
-        file_obj=file.file,
+        upload=file,
         filename=file.filename,
         mime_type=file.content_type or "",
         user_id=user_id,
@@ -37,13 +51,60 @@ async def upload_document(
         description=description,
         is_public=is_public,
     )
+    if doc.mime_type in IMAGE_MIME:
+        # Miniaturas comunes listas antes de que las pida la galería
+        background_tasks.add_task(pregenerate_derivatives, doc.checksum, doc.stored_path, doc.mime_type)
     return doc
 
 
+def _cache_headers(doc) -> dict[str, str]:
+    """
+    ETag fuerte desde el checksum: el contenido de un documento no cambia.
+
+    Los públicos pueden guardarse en caches compartidos; los privados solo en
+    el navegador del usuario.
+    """
+    if doc.is_public:
+        cache_control = f"public, max-age={settings.document_cache_max_age_public}"
+    else:
+        cache_control = f"private, max-age={settings.document_cache_max_age_private}"
+    headers = {"Cache-Control": cache_control}
+    if doc.checksum:
+        headers["ETag"] = strong_etag(doc.checksum)
+    if doc.uploaded_at:
+        headers["Last-Modified"] = http_date(doc.uploaded_at)
+    return headers
+
+
+async def _derivative_response(request: Request, doc, size: int) -> Response | None:
+    """Miniatura de una imagen (WebP si el navegador la acepta); None si no se pudo generar"""
+    bucket = size_bucket(size)
+    mime_type = derivative_mime(doc.mime_type, request.headers.get("accept"))
+    extension = derivative_extension(mime_type)
+    headers = _cache_headers(doc)
+    headers["ETag"] = strong_etag(f"{doc.checksum}-{bucket}-{extension}")
+    headers["Vary"] = "Accept"
+    if is_not_modified(request.headers, headers["ETag"], doc.uploaded_at):
+        return Response(status_code=304, headers=headers)
+
+    path = await get_derivative(doc.checksum, doc.stored_path, bucket, mime_type)
+    if path is None:
+        return None
+    return FileResponse(
+        path,
+        media_type=mime_type,
+        filename=f"{Path(doc.file_name).stem}-{bucket}.{extension}",
+        content_disposition_type="inline",
+        headers=headers,
+    )
+
+
 @router.get("/{doc_id}")
 async def download_document(
     doc_id: int,
-    session=Depends(get_session),
+    request: Request,
+    size: int | None = Query(None, ge=1, description="Lado mayor en px para miniaturas de imágenes"),
+    session=Depends(get_tenant_db),
     current_user: User = Depends(get_current_user),
 ):
     service = DocumentService(session)
@@ -56,15 +117,73 @@ async def download_document(
         if not (is_owner or is_admin):
             raise HTTPException(status_code=403, detail="No autorizado para acceder a este documento")
 
+    if size and doc.mime_type in IMAGE_MIME and doc.checksum:
+        derivative = await _derivative_response(request, doc, size)
+        if derivative is not None:
+            return derivative
+
+    headers = _cache_headers(doc)
+    etag = headers.get("ETag")
+    if is_not_modified(request.headers, etag, doc.uploaded_at):
+        return Response(status_code=304, headers=headers)
+
+    # Con S3 el cliente descarga directo del bucket con una URL firmada
+    url = get_storage().download_url(doc)
+    if url:
+        return RedirectResponse(url, status_code=307)
+
     path = Path(doc.stored_path)
-    if not path.exists():
+    try:
+        size = (await asyncio.to_thread(path.stat)).st_size
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Archivo no encontrado en almacenamiento")
 
-    return FileResponse(path, media_type=doc.mime_type, filename=doc.file_name)
+    headers["Accept-Ranges"] = "bytes"
+    byte_range = requested_range(request.headers, size, etag, doc.uploaded_at)
+    if byte_range is None:
+        return FileResponse(path, media_type=doc.mime_type, filename=doc.file_name, headers=headers)
+
+    start, end = byte_range
+    headers.update(
+        {
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+            "Content-Disposition": content_disposition(doc.file_name),
+        }
+    )
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=206,
+        media_type=doc.mime_type,
+        headers=headers,
+    )
+
+
+@router.delete("/{doc_id}", status_code=204)
+async def delete_document(
+    doc_id: int,
+    session=Depends(get_tenant_db),
+    current_user: User = Depends(get_current_user),
+):
+    service = DocumentService(session)
+    doc = await service.get(doc_id)
+
+    is_owner = doc.user_id == current_user.id
+    is_admin = current_user.role == "admin"
+    if not (is_owner or is_admin):
+        raise HTTPException(status_code=403, detail="No autorizado para eliminar este documento")
+
+    await service.delete(doc)
+    return None
+
 
 @router.get("", response_model=list[DocumentRead], dependencies=[Depends(require_admin)])
-async def list_documents(session=Depends(get_session)):
+async def list_documents(
+    response: Response,
+    session=Depends(get_tenant_db),
+    params: PageParams = Depends(page_params),
+):
     service = DocumentService(session)
-    return await service.list_all()
+    return page_items(response, await service.list_all(params))
 
 
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
 from app.api.schemas import EventCreate, EventRead
 from app.api.services.event import EventService
 from app.core.deps import get_current_user, require_admin
-from app.db.session import get_session
+from app.core.pagination import PageParams, page_items, page_params
+from app.core.response_cache import invalidate_public_cache
+from app.core.tenant import get_tenant_db
 from app.models.user import User
 from app.api.routes.ws import manager
 
@@ -11,7 +13,7 @@ router = APIRouter(prefix="/events", tags=["events"])
 
 
 @router.post("", response_model=EventRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
-async def create_event(payload: EventCreate, session=Depends(get_session), current_user: User = Depends(get_current_user)):
+async def create_event(payload: EventCreate, session=Depends(get_tenant_db), current_user: User = Depends(get_current_user)):
     service = EventService(session)
     event = await service.create_event(
         name=payload.name,
@@ -21,7 +23,9 @@ async def create_event(payload: EventCreate, session=Depends(get_session), curre
         capacity=payload.capacity,
         created_by_id=current_user.id,
     )
+    await invalidate_public_cache("events")
     await manager.broadcast(
+        "events",
         {
             "type": "event.created",
             "event_id": event.id,
@@ -33,7 +37,11 @@ async def create_event(payload: EventCreate, session=Depends(get_session), curre
 
 
 @router.get("", response_model=list[EventRead])
-async def list_events(session=Depends(get_session)):
+async def list_events(
+    response: Response,
+    session=Depends(get_tenant_db),
+    params: PageParams = Depends(page_params),
+):
     service = EventService(session)
-    return await service.list_events()
+    return page_items(response, await service.list_events(params))
 
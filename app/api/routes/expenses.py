@@ -3,13 +3,14 @@ Rutas de gestión de gastos - Solo para admins del tenant
 """
 from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.tenant import get_tenant_db
 from app.core.deps import require_admin, get_current_user
+from app.core.pagination import PageParams, build_page, page_items, page_params
 from app.models.user import User
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
@@ -61,6 +62,16 @@ class ExpenseRead(BaseModel):
     created_at: Optional[str]
 
 
+# Serializadores precalculados: las rutas ya construyen modelos validados y los
+# devuelven sin que FastAPI los vuelva a validar contra response_model
+_EXPENSE = TypeAdapter(ExpenseRead)
+_EXPENSE_LIST = TypeAdapter(list[ExpenseRead])
+
+
+def _json(adapter: TypeAdapter, content, status_code: int = 200, headers=None) -> Response:
+    return Response(adapter.dump_json(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
 # ============== Categorías de Gastos ==============
 
 @router.get("/categories", response_model=list[ExpenseCategoryRead])
@@ -129,12 +140,14 @@ async def delete_expense_category(
 
 @router.get("", response_model=list[ExpenseRead])
 async def list_expenses(
+    response: Response,
     status_filter: Optional[str] = None,
     category_id: Optional[int] = None,
+    page: PageParams = Depends(page_params),
     session: AsyncSession = Depends(get_tenant_db),
     current_user: User = Depends(require_admin)
 ):
-    """Lista todos los gastos con filtros opcionales"""
+    """Lista los gastos con filtros opcionales, paginados por (fecha, id) descendente"""
     query = """
         SELECT e.id, e.description, e.amount, e.category_id, c.name as category_name,
                e.expense_date, e.due_date, e.status, e.payment_method, e.receipt_number,
@@ -153,12 +166,19 @@ async def list_expenses(
         query += " AND e.category_id = :category_id"
         params["category_id"] = category_id
     
-    query += " ORDER BY e.expense_date DESC, e.created_at DESC"
+    after = page.after_values(2)
+    if after:
+        query += " AND (e.expense_date, e.id) < (:after_date, :after_id)"
+        params["after_date"], params["after_id"] = after
+    
+    query += " ORDER BY e.expense_date DESC, e.id DESC LIMIT :limit"
+    params["limit"] = page.limit + 1
     
     result = await session.execute(text(query), params)
-    expenses = result.fetchall()
+    expenses = page_items(response, build_page(result.fetchall(), page, key=lambda e: (e.expense_date, e.id)))
     
-    return [ExpenseRead(
+    # Se serializa la lista de una vez, con la cabecera del cursor
+    return _json(_EXPENSE_LIST, [ExpenseRead(
         id=e.id,
         description=e.description,
         amount=float(e.amount),
@@ -174,7 +194,7 @@ async def list_expenses(
         created_by_id=e.created_by_id,
         approved_by_id=e.approved_by_id,
         created_at=e.created_at.isoformat() if e.created_at else None
-    ) for e in expenses]
+    ) for e in expenses], headers=response.headers)
 
 
 @router.post("", response_model=ExpenseRead, status_code=status.HTTP_201_CREATED)
@@ -210,7 +230,7 @@ async def create_expense(
     expense = result.fetchone()
     await session.commit()
     
-    return ExpenseRead(
+    return _json(_EXPENSE, ExpenseRead(
         id=expense.id,
         description=expense.description,
         amount=float(expense.amount),
@@ -226,7 +246,7 @@ async def create_expense(
         created_by_id=expense.created_by_id,
         approved_by_id=expense.approved_by_id,
         created_at=expense.created_at.isoformat() if expense.created_at else None
-    )
+    ), status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{expense_id}", response_model=ExpenseRead)
@@ -252,7 +272,7 @@ async def get_expense(
     if not expense:
         raise HTTPException(status_code=404, detail="Gasto no encontrado")
     
-    return ExpenseRead(
+    return _json(_EXPENSE, ExpenseRead(
         id=expense.id,
         description=expense.description,
         amount=float(expense.amount),
@@ -268,7 +288,7 @@ async def get_expense(
         created_by_id=expense.created_by_id,
         approved_by_id=expense.approved_by_id,
         created_at=expense.created_at.isoformat() if expense.created_at else None
-    )
+    ))
 
 
 @router.patch("/{expense_id}/approve")
@@ -408,6 +428,35 @@ async def get_expenses_by_category(
     ]
 
 
+@router.get("/summary/by-status")
+async def get_expenses_by_status(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    session: AsyncSession = Depends(get_tenant_db),
+    current_user: User = Depends(require_admin)
+):
+    """Obtiene total y cantidad de gastos por estado en un rango de fechas"""
+    query = "SELECT status, SUM(amount) as total, COUNT(*) as count FROM expenses WHERE 1=1"
+    params = {}
+    
+    if start_date:
+        query += " AND expense_date >= :start_date"
+        params["start_date"] = start_date
+    
+    if end_date:
+        query += " AND expense_date <= :end_date"
+        params["end_date"] = end_date
+    
+    query += " GROUP BY status"
+    
+    result = await session.execute(text(query), params)
+    
+    return [
+        {"status": r.status, "total": float(r.total) if r.total else 0, "count": r.count}
+        for r in result.fetchall()
+    ]
+
+
 @router.get("/summary/monthly")
 async def get_monthly_expenses(
     year: Optional[int] = None,
@@ -0,0 +1,27 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+bearer = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(bearer)):
+    """Con METRICS_TOKEN configurado, exige Authorization: Bearer <token>"""
+    if not settings.metrics_token:
+        return
+    if credentials is None or not hmac.compare_digest(credentials.credentials, settings.metrics_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de métricas inválido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("", summary="Métricas en formato Prometheus", dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
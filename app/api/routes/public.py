@@ -2,7 +2,8 @@
 Rutas públicas de la iglesia - Sin autenticación requerida
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select, text, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,10 +12,18 @@ from app.api.schemas.church import (
     PublicContentRead, AnnouncementRead
 )
 from app.api.schemas.event import EventRead
+from app.core.sse import public_events
 from app.core.tenant import get_tenant_db, require_tenant
+from app.db.rows import RowMapper
 
 router = APIRouter(prefix="/public", tags=["public"])
 
+PUBLIC_INFO_ROWS = RowMapper(ChurchPublicInfo)
+EVENT_ROWS = RowMapper(EventRead)
+STREAM_ROWS = RowMapper(LiveStreamRead)
+CONTENT_ROWS = RowMapper(PublicContentRead)
+ANNOUNCEMENT_ROWS = RowMapper(AnnouncementRead)
+
 
 @router.get("/config", response_model=ChurchPublicInfo)
 async def get_church_info(
@@ -23,14 +32,7 @@ async def get_church_info(
 ):
     """Obtiene la información pública de la iglesia"""
     result = await session.execute(
-        text("""
-            SELECT church_name, slogan, description, about_us, mission, vision, 
-                   "values", history, address, city, country, phone, email, website,
-                   logo_url, cover_image_url, primary_color, secondary_color,
-                   social_facebook, social_instagram, social_youtube, social_twitter, social_tiktok,
-                   donation_info, donation_link, service_schedule
-            FROM church_config LIMIT 1
-        """)
+        text(f"SELECT {PUBLIC_INFO_ROWS.columns} FROM church_config LIMIT 1")
     )
     config = result.fetchone()
     
@@ -65,34 +67,7 @@ async def get_church_info(
             service_schedule=None
         )
     
-    return ChurchPublicInfo(
-        church_name=config.church_name,
-        slogan=config.slogan,
-        description=config.description,
-        about_us=config.about_us,
-        mission=config.mission,
-        vision=config.vision,
-        values=config.values,
-        history=config.history,
-        address=config.address,
-        city=config.city,
-        country=config.country,
-        phone=config.phone,
-        email=config.email,
-        website=config.website,
-        logo_url=config.logo_url,
-        cover_image_url=config.cover_image_url,
-        primary_color=config.primary_color,
-        secondary_color=config.secondary_color,
-        social_facebook=config.social_facebook,
-        social_instagram=config.social_instagram,
-        social_youtube=config.social_youtube,
-        social_twitter=config.social_twitter,
-        social_tiktok=config.social_tiktok,
-        donation_info=config.donation_info,
-        donation_link=config.donation_link,
-        service_schedule=config.service_schedule
-    )
+    return PUBLIC_INFO_ROWS.response(config)
 
 
 @router.get("/events", response_model=list[EventRead])
@@ -103,8 +78,8 @@ async def get_public_events(
     limit: int = Query(10, ge=1, le=50)
 ):
     """Lista los eventos públicos de la iglesia"""
-    query = """
-        SELECT id, name, description, start_date, end_date, capacity, created_by_id
+    query = f"""
+        SELECT {EVENT_ROWS.columns}
         FROM events 
         WHERE is_public = TRUE
     """
@@ -117,15 +92,7 @@ async def get_public_events(
     result = await session.execute(text(query), {"limit": limit})
     events = result.fetchall()
     
-    return [EventRead(
-        id=e.id,
-        name=e.name,
-        description=e.description,
-        start_date=e.start_date,
-        end_date=e.end_date,
-        capacity=e.capacity,
-        created_by_id=e.created_by_id
-    ) for e in events]
+    return EVENT_ROWS.list_response(events)
 
 
 @router.get("/events/{event_id}", response_model=EventRead)
@@ -136,8 +103,8 @@ async def get_public_event(
 ):
     """Obtiene detalle de un evento público"""
     result = await session.execute(
-        text("""
-            SELECT id, name, description, start_date, end_date, capacity, created_by_id
+        text(f"""
+            SELECT {EVENT_ROWS.columns}
             FROM events 
             WHERE id = :id AND is_public = TRUE
         """),
@@ -148,15 +115,7 @@ async def get_public_event(
     if not event:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
     
-    return EventRead(
-        id=event.id,
-        name=event.name,
-        description=event.description,
-        start_date=event.start_date,
-        end_date=event.end_date,
-        capacity=event.capacity,
-        created_by_id=event.created_by_id
-    )
+    return EVENT_ROWS.response(event)
 
 
 @router.get("/streams", response_model=list[LiveStreamRead])
@@ -167,7 +126,7 @@ async def get_live_streams(
     limit: int = Query(10, ge=1, le=50)
 ):
     """Lista las transmisiones disponibles"""
-    query = "SELECT * FROM live_streams WHERE 1=1"
+    query = f"SELECT {STREAM_ROWS.columns} FROM live_streams WHERE 1=1"
     
     if live_only:
         query += " AND is_live = TRUE"
@@ -177,23 +136,7 @@ async def get_live_streams(
     result = await session.execute(text(query), {"limit": limit})
     streams = result.fetchall()
     
-    return [LiveStreamRead(
-        id=s.id,
-        title=s.title,
-        description=s.description,
-        stream_url=s.stream_url,
-        youtube_video_id=s.youtube_video_id,
-        facebook_video_id=s.facebook_video_id,
-        platform=s.platform,
-        is_live=s.is_live,
-        is_featured=s.is_featured,
-        scheduled_at=s.scheduled_at,
-        started_at=s.started_at,
-        ended_at=s.ended_at,
-        thumbnail_url=s.thumbnail_url,
-        view_count=s.view_count,
-        created_at=s.created_at
-    ) for s in streams]
+    return STREAM_ROWS.list_response(streams)
 
 
 @router.get("/streams/live", response_model=LiveStreamRead | None)
@@ -203,8 +146,8 @@ async def get_current_live_stream(
 ):
     """Obtiene la transmisión en vivo actual (si existe)"""
     result = await session.execute(
-        text("""
-            SELECT * FROM live_streams 
+        text(f"""
+            SELECT {STREAM_ROWS.columns} FROM live_streams 
             WHERE is_live = TRUE 
             ORDER BY is_featured DESC, started_at DESC 
             LIMIT 1
@@ -215,22 +158,21 @@ async def get_current_live_stream(
     if not stream:
         return None
     
-    return LiveStreamRead(
-        id=stream.id,
-        title=stream.title,
-        description=stream.description,
-        stream_url=stream.stream_url,
-        youtube_video_id=stream.youtube_video_id,
-        facebook_video_id=stream.facebook_video_id,
-        platform=stream.platform,
-        is_live=stream.is_live,
-        is_featured=stream.is_featured,
-        scheduled_at=stream.scheduled_at,
-        started_at=stream.started_at,
-        ended_at=stream.ended_at,
-        thumbnail_url=stream.thumbnail_url,
-        view_count=stream.view_count,
-        created_at=stream.created_at
+    return STREAM_ROWS.response(stream)
+
+
+@router.get("/updates")
+async def public_updates(request: Request):
+    """
+    Stream SSE con los cambios de transmisiones y anuncios públicos.
+
+    Reemplaza el polling de /streams/live y /announcements: no toca la base de
+    datos y admite Last-Event-ID para reanudar tras una reconexión.
+    """
+    return StreamingResponse(
+        public_events.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -242,10 +184,8 @@ async def get_public_content(
 ):
     """Obtiene una página de contenido público por slug"""
     result = await session.execute(
-        text("""
-            SELECT id, slug, title, content, excerpt, content_type,
-                   featured_image_url, is_published, is_featured, published_at,
-                   meta_title, meta_description, created_at, updated_at
+        text(f"""
+            SELECT {CONTENT_ROWS.columns}
             FROM public_content 
             WHERE slug = :slug AND is_published = TRUE
         """),
@@ -256,22 +196,7 @@ async def get_public_content(
     if not content:
         raise HTTPException(status_code=404, detail="Contenido no encontrado")
     
-    return PublicContentRead(
-        id=content.id,
-        slug=content.slug,
-        title=content.title,
-        content=content.content,
-        excerpt=content.excerpt,
-        content_type=content.content_type,
-        featured_image_url=content.featured_image_url,
-        is_published=content.is_published,
-        is_featured=content.is_featured,
-        published_at=content.published_at,
-        meta_title=content.meta_title,
-        meta_description=content.meta_description,
-        created_at=content.created_at,
-        updated_at=content.updated_at
-    )
+    return CONTENT_ROWS.response(content)
 
 
 @router.get("/announcements", response_model=list[AnnouncementRead])
@@ -282,9 +207,8 @@ async def get_public_announcements(
 ):
     """Lista los anuncios públicos activos"""
     result = await session.execute(
-        text("""
-            SELECT id, title, content, announcement_type, priority,
-                   is_public, is_active, start_date, end_date, created_at
+        text(f"""
+            SELECT {ANNOUNCEMENT_ROWS.columns}
             FROM announcements 
             WHERE is_public = TRUE 
               AND is_active = TRUE
@@ -297,18 +221,7 @@ async def get_public_announcements(
     )
     announcements = result.fetchall()
     
-    return [AnnouncementRead(
-        id=a.id,
-        title=a.title,
-        content=a.content,
-        announcement_type=a.announcement_type,
-        priority=a.priority,
-        is_public=a.is_public,
-        is_active=a.is_active,
-        start_date=a.start_date,
-        end_date=a.end_date,
-        created_at=a.created_at
-    ) for a in announcements]
+    return ANNOUNCEMENT_ROWS.list_response(announcements)
 
 
 @router.get("/donation-info")
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, Query
 
 from app.api.schemas import RegistrationCreate, RegistrationRead
+from app.api.routes.ws import event_topic, manager
 from app.api.services.registration import RegistrationService
 from app.core.deps import require_admin
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 
 router = APIRouter(prefix="/events/{event_id}/registrations", tags=["registrations"])
 
 
 @router.post("", response_model=RegistrationRead, status_code=201)
-async def create_registration(event_id: int, payload: RegistrationCreate, session=Depends(get_session)):
+async def create_registration(event_id: int, payload: RegistrationCreate, session=Depends(get_tenant_db)):
     service = RegistrationService(session)
     reg = await service.register(
         event_id=event_id,
@@ -17,13 +18,23 @@ async def create_registration(event_id: int, payload: RegistrationCreate, sessio
         attendee_email=payload.attendee_email,
         notes=payload.notes,
     )
+    await manager.broadcast(
+        event_topic(event_id),
+        {
+            "type": "registration.created",
+            "event_id": event_id,
+            "registration_id": reg.id,
+            "attendee_name": reg.attendee_name,
+        },
+        admin_fields=("attendee_name",),
+    )
     return reg
 
 
 @router.get("", response_model=list[RegistrationRead], dependencies=[Depends(require_admin)])
 async def list_registrations(
     event_id: int,
-    session=Depends(get_session),
+    session=Depends(get_tenant_db),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
@@ -32,7 +43,7 @@ async def list_registrations(
 
 
 @router.delete("/{registration_id}", status_code=204, dependencies=[Depends(require_admin)])
-async def cancel_registration(event_id: int, registration_id: int, session=Depends(get_session)):
+async def cancel_registration(event_id: int, registration_id: int, session=Depends(get_tenant_db)):
     service = RegistrationService(session)
     await service.cancel(event_id, registration_id)
     return None
@@ -1,115 +1,217 @@
 from datetime import date
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import StreamingResponse
 import csv
 import io
 
+from app.core.config import settings
 from app.core.deps import require_admin
-from app.db.session import get_session
-from app.models.donation import Donation
+from app.core.responses import ORJSONResponse
+from app.core.tenant import get_tenant_db
+from app.models.donation import Donation, DonationDailyRollup
 
 router = APIRouter(prefix="/reports", tags=["reports"], dependencies=[Depends(require_admin)])
 
 
-def _apply_filters(query, start_date: date | None, end_date: date | None, donation_type: str | None):
+def _apply_filters(
+    query,
+    start_date: date | None,
+    end_date: date | None,
+    donation_type: str | None,
+    source=Donation,
+):
+    date_col = source.day if source is DonationDailyRollup else source.donation_date
     conditions = []
     if start_date:
-        conditions.append(Donation.donation_date >= start_date)
+        conditions.append(date_col >= start_date)
     if end_date:
-        conditions.append(Donation.donation_date <= end_date)
+        conditions.append(date_col <= end_date)
     if donation_type:
-        conditions.append(Donation.donation_type == donation_type)
+        conditions.append(source.donation_type == donation_type)
     if conditions:
         query = query.where(and_(*conditions))
     return query
 
 
-def _month_expr(session: AsyncSession):
+def _month_expr(session: AsyncSession, column=Donation.donation_date):
     dialect = session.bind.dialect.name
     if dialect == "sqlite":
-        return func.strftime("%Y-%m", Donation.donation_date)
+        return func.strftime("%Y-%m", column)
     # postgres or others
-    return func.to_char(Donation.donation_date, "YYYY-MM")
+    return func.to_char(column, "YYYY-MM")
+
+
+def _aggregate_columns():
+    """
+    Columnas de conteo y suma según la fuente.
+
+    Con REPORTS_USE_ROLLUPS los reportes leen donation_daily_rollups, cuyo
+    tamaño depende de los días con actividad y no del número de donaciones.
+    Todos los filtros actuales (fechas y tipo) se resuelven sobre el agregado;
+    la tabla donations solo se escanea si los agregados están desactivados.
+    """
+    if settings.reports_use_rollups:
+        return (
+            DonationDailyRollup,
+            func.coalesce(func.sum(DonationDailyRollup.donation_count), 0),
+            func.coalesce(func.sum(DonationDailyRollup.total_amount), 0),
+        )
+    return Donation, func.count(Donation.id), func.coalesce(func.sum(Donation.amount), 0)
+
+
+def _block(count, amount) -> dict:
+    return {"count": int(count or 0), "amount": float(amount or 0)}
+
+
+async def _aggregate_blocks(
+    session: AsyncSession,
+    start_date: date | None,
+    end_date: date | None,
+    donation_type: str | None,
+) -> dict:
+    """
+    Totales, desglose por tipo y por mes en una sola consulta.
+
+    En Postgres se usa GROUPING SETS ((mes), (tipo), ()) y grouping() indica a
+    qué bloque pertenece cada fila. En otros motores se agrupa por (mes, tipo)
+    y los tres bloques se acumulan en Python; el resultado tiene como máximo
+    meses x tipos filas.
+    """
+    source, count_col, amount_col = _aggregate_columns()
+    date_col = source.day if source is DonationDailyRollup else source.donation_date
+    month_col = _month_expr(session, date_col)
+    type_col = source.donation_type
+
+    totals = _block(0, 0)
+    by_type: dict[str, dict] = {}
+    by_month: dict[str, dict] = {}
+
+    if session.bind.dialect.name == "postgresql":
+        stmt = select(
+            month_col.label("month"),
+            type_col,
+            func.grouping(month_col),
+            func.grouping(type_col),
+            count_col,
+            amount_col,
+        ).group_by(func.grouping_sets(tuple_(month_col), tuple_(type_col), tuple_()))
+        stmt = _apply_filters(stmt, start_date, end_date, donation_type, source)
+        for month, dtype, month_grouped, type_grouped, count, amount in (await session.execute(stmt)).all():
+            if month_grouped and type_grouped:
+                totals = _block(count, amount)
+            elif type_grouped:
+                if month is not None:
+                    by_month[month] = _block(count, amount)
+            else:
+                by_type[dtype] = _block(count, amount)
+    else:
+        stmt = select(month_col.label("month"), type_col, count_col, amount_col).group_by(month_col, type_col)
+        stmt = _apply_filters(stmt, start_date, end_date, donation_type, source)
+        for month, dtype, count, amount in (await session.execute(stmt)).all():
+            blocks = [totals, by_type.setdefault(dtype, _block(0, 0))]
+            if month is not None:
+                blocks.append(by_month.setdefault(month, _block(0, 0)))
+            for block in blocks:
+                block["count"] += int(count or 0)
+                block["amount"] += float(amount or 0)
+        for block in (totals, *by_type.values(), *by_month.values()):
+            block["amount"] = round(block["amount"], 2)
+
+    return {"totals": totals, "by_type": by_type, "by_month": dict(sorted(by_month.items()))}
+
+
+def _filters(start_date: date | None, end_date: date | None, donation_type: str | None) -> dict:
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "donation_type": donation_type,
+    }
 
 
 @router.get("/summary")
 async def summary(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_tenant_db),
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     donation_type: str | None = Query(None),
 ):
-    base = select(Donation)
-    base = _apply_filters(base, start_date, end_date, donation_type)
-
-    total_amount_stmt = select(func.coalesce(func.sum(Donation.amount), 0))
-    total_amount_stmt = _apply_filters(total_amount_stmt, start_date, end_date, donation_type)
-
-    count_stmt = select(func.count(Donation.id))
-    count_stmt = _apply_filters(count_stmt, start_date, end_date, donation_type)
-
-    by_type_stmt = select(Donation.donation_type, func.count(Donation.id)).group_by(Donation.donation_type)
-    by_type_stmt = _apply_filters(by_type_stmt, start_date, end_date, donation_type)
-
-    total_amount = (await session.execute(total_amount_stmt)).scalar_one()
-    total_count = (await session.execute(count_stmt)).scalar_one()
-    by_type = (await session.execute(by_type_stmt)).all()
-
-    return {
-        "total_donations": total_count,
-        "total_amount": float(total_amount),
-        "by_type": {row[0]: row[1] for row in by_type},
-        "filters": {
-            "start_date": start_date,
-            "end_date": end_date,
-            "donation_type": donation_type,
-        },
-    }
+    blocks = await _aggregate_blocks(session, start_date, end_date, donation_type)
+    return ORJSONResponse({
+        "total_donations": blocks["totals"]["count"],
+        "total_amount": blocks["totals"]["amount"],
+        "by_type": {dtype: block["count"] for dtype, block in blocks["by_type"].items()},
+        "filters": _filters(start_date, end_date, donation_type),
+    })
 
 
 @router.get("/dashboard")
 async def dashboard(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_tenant_db),
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     donation_type: str | None = Query(None),
 ):
-    month_col = _month_expr(session)
+    blocks = await _aggregate_blocks(session, start_date, end_date, donation_type)
+    return ORJSONResponse({
+        "by_month": blocks["by_month"],
+        "by_type": blocks["by_type"],
+        "filters": _filters(start_date, end_date, donation_type),
+    })
 
-    base = select(month_col.label("month"), func.count(Donation.id), func.coalesce(func.sum(Donation.amount), 0.0)).group_by(
-        month_col
-    )
-    base = _apply_filters(base, start_date, end_date, donation_type)
 
-    by_month_rows = (await session.execute(base)).all()
-    by_month = {
-        row[0]: {"count": row[1], "amount": float(row[2])} for row in by_month_rows
-    }
+@router.get("/overview")
+async def overview(
+    session: AsyncSession = Depends(get_tenant_db),
+    start_date: date | None = Query(None),
+    end_date: date | None = Query(None),
+    donation_type: str | None = Query(None),
+):
+    """Resumen y dashboard juntos: una petición y una consulta para la pantalla de reportes"""
+    blocks = await _aggregate_blocks(session, start_date, end_date, donation_type)
+    return ORJSONResponse({
+        "total_donations": blocks["totals"]["count"],
+        "total_amount": blocks["totals"]["amount"],
+        "by_type": blocks["by_type"],
+        "by_month": blocks["by_month"],
+        "filters": _filters(start_date, end_date, donation_type),
+    })
 
-    by_type_stmt = select(Donation.donation_type, func.count(Donation.id), func.coalesce(func.sum(Donation.amount), 0.0)).group_by(
-        Donation.donation_type
-    )
-    by_type_stmt = _apply_filters(by_type_stmt, start_date, end_date, donation_type)
-    by_type_rows = (await session.execute(by_type_stmt)).all()
-    by_type = {row[0]: {"count": row[1], "amount": float(row[2])} for row in by_type_rows}
 
-    return {
-        "by_month": by_month,
-        "by_type": by_type,
-        "filters": {
-            "start_date": start_date,
-            "end_date": end_date,
-            "donation_type": donation_type,
-        },
-    }
+EXPORT_COLUMNS = ["id", "donor_name", "donation_type", "amount", "payment_method", "donation_date"]
+
+
+def _drain(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return chunk
+
+
+async def _iter_csv(bind, stmt, batch_size: int):
+    """
+    Genera el CSV por lotes desde un cursor del lado del servidor.
+
+    Usa su propia conexión del engine: la sesión de la dependencia se cierra
+    antes de que se envíe el cuerpo de la respuesta.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield _drain(buffer)
+
+    async with bind.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            writer.writerows(rows)
+            yield _drain(buffer)
 
 
 @router.get("/export")
 async def export_report(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_tenant_db),
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     donation_type: str | None = Query(None),
@@ -121,21 +223,12 @@ async def export_report(
         Donation.amount,
         Donation.payment_method,
         Donation.donation_date,
-    )
+    ).order_by(Donation.id)
     stmt = _apply_filters(stmt, start_date, end_date, donation_type)
-    rows = (await session.execute(stmt)).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "donor_name", "donation_type", "amount", "payment_method", "donation_date"])
-    for r in rows:
-        writer.writerow(r)
-    output.seek(0)
 
     filename = "donations_export.csv"
     return StreamingResponse(
-        output,
+        _iter_csv(session.bind, stmt, settings.report_export_batch_size),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-
@@ -1,6 +1,8 @@
 """
 Rutas del Super Administrador - Gestión de la plataforma
 """
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import FileResponse
 from sqlalchemy import select, text, func
@@ -8,13 +10,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.schemas.tenant import (
     TenantCreate, TenantRead, TenantUpdate,
+    ProvisioningJobRead, TenantProvisioningRead,
     TenantAdminCreate, TenantAdminRead,
     SuperAdminLogin, SuperAdminRead,
     SubscriptionPlanRead, PlatformStats
 )
 from app.api.schemas.auth import TokenPair
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
-from app.core.tenant import get_tenant_engine, get_tenant_db_url
+from app.core.security import (
+    verify_password_async, get_password_hash_async, create_access_token, create_refresh_token
+)
+from app.core.backups import (
+    BACKUP_COLUMNS, BACKUP_DONE, BACKUP_PENDING, BACKUP_RUNNING, SOURCE_UPLOAD,
+    backup_dir, backup_runner, format_for_filename, is_valid_filename, register_backup, save_upload
+)
+from app.core.provisioning import JOB_DONE, JOB_FAILED, JOB_PENDING, enqueue_provisioning, provisioning_queue
+from app.core.tenant import MASTER_DB, get_tenant_session
+from app.core.tenant_routing import notify_tenant_routes_changed
+from app.core.tenant_stats import tenant_stats
 
 router = APIRouter(prefix="/superadmin", tags=["superadmin"])
 
@@ -23,10 +35,7 @@ router = APIRouter(prefix="/superadmin", tags=["superadmin"])
 
 async def get_master_session():
     """Obtiene sesión de la base de datos master"""
-    from sqlalchemy.ext.asyncio import async_sessionmaker
-    engine = await get_tenant_engine("ekklesia_master")
-    session_factory = async_sessionmaker(engine, expire_on_commit=False)
-    session = session_factory()
+    session = await get_tenant_session(MASTER_DB)
     try:
         yield session
     finally:
@@ -56,7 +65,7 @@ async def superadmin_login(
     )
     admin = result.fetchone()
     
-    if not admin or not verify_password(data.password, admin.hashed_password):
+    if not admin or not await verify_password_async(data.password, admin.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas"
@@ -127,7 +136,7 @@ async def list_tenants(
     ) for t in tenants]
 
 
-@router.post("/tenants", response_model=TenantRead, status_code=status.HTTP_201_CREATED)
+@router.post("/tenants", response_model=TenantProvisioningRead, status_code=status.HTTP_202_ACCEPTED)
 async def create_tenant(
     data: TenantCreate,
     session: AsyncSession = Depends(get_master_session),
@@ -135,12 +144,11 @@ async def create_tenant(
 ):
     """
     Crea un nuevo tenant (iglesia).
-    - Registra en la base master
-    - Crea la base de datos del tenant
-    - Aplica el esquema inicial
+    - Registra en la base master (inactivo hasta tener su base de datos)
+    - Encola el trabajo que crea la base de datos del tenant; su estado se
+      consulta en /superadmin/provisioning-jobs/{job_id}
     """
     import re
-    from sqlalchemy import text as sql_text
     
     # Validar slug
     if not re.match(r'^[a-z0-9-]+$', data.slug):
@@ -159,11 +167,11 @@ async def create_tenant(
     
     db_name = f"ekk_{data.slug.replace('-', '_')}"
     
-    # Crear registro del tenant
+    # Crear registro del tenant y su trabajo en la misma transacción
     result = await session.execute(
         text("""
-            INSERT INTO tenants (slug, name, subdomain, custom_domain, db_name, plan_id)
-            VALUES (:slug, :name, :subdomain, :custom_domain, :db_name, :plan_id)
+            INSERT INTO tenants (slug, name, subdomain, custom_domain, db_name, plan_id, is_active)
+            VALUES (:slug, :name, :subdomain, :custom_domain, :db_name, :plan_id, FALSE)
             RETURNING id, slug, name, subdomain, custom_domain, db_name, is_active, plan_id, created_at, expires_at
         """),
         {
@@ -176,72 +184,63 @@ async def create_tenant(
         }
     )
     tenant = result.fetchone()
+    job = await enqueue_provisioning(session, tenant.id)
     await session.commit()
+    provisioning_queue.notify()
     
-    # Crear la base de datos para el tenant
-    try:
-        # Conexión al servidor PostgreSQL (no a una DB específica)
-        from sqlalchemy import create_engine
-        from app.core.config import settings
-        
-        # Usar conexión síncrona para crear DB
-        base_url = str(settings.database_url).replace("+asyncpg", "").replace("ekklesia", "postgres")
-        sync_engine = create_engine(base_url, isolation_level="AUTOCOMMIT")
-        
-        with sync_engine.connect() as conn:
-            conn.execute(sql_text(f"CREATE DATABASE {db_name}"))
-        
-        sync_engine.dispose()
-        
-        # Aplicar schema al nuevo tenant
-        tenant_url = get_tenant_db_url(db_name).replace("+asyncpg", "")
-        tenant_engine = create_engine(tenant_url)
-        
-        # Leer y ejecutar el schema SQL
-        import os
-        schema_path = os.path.join(os.path.dirname(__file__), "../../db/sql/tenant_schema.sql")
-        with open(schema_path) as f:
-            schema_sql = f.read()
-        
-        with tenant_engine.connect() as conn:
-            # Ejecutar cada statement por separado
-            for statement in schema_sql.split(";"):
-                statement = statement.strip()
-                if statement:
-                    try:
-                        conn.execute(sql_text(statement))
-                    except Exception:
-                        pass  # Ignorar errores de objetos existentes
-            conn.commit()
-        
-        tenant_engine.dispose()
-        
-    except Exception as e:
-        # Si falla la creación de DB, eliminar el registro
-        await session.execute(
-            text("DELETE FROM tenants WHERE id = :id"),
-            {"id": tenant.id}
-        )
-        await session.commit()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al crear la base de datos: {str(e)}"
-        )
-    
-    return TenantRead(
-        id=tenant.id,
-        slug=tenant.slug,
-        name=tenant.name,
-        subdomain=tenant.subdomain,
-        custom_domain=tenant.custom_domain,
-        db_name=tenant.db_name,
-        is_active=tenant.is_active,
-        plan_id=tenant.plan_id,
-        created_at=tenant.created_at,
-        expires_at=tenant.expires_at
+    return TenantProvisioningRead(
+        tenant=TenantRead.model_validate(tenant),
+        job=ProvisioningJobRead.model_validate(job),
     )
 
 
+@router.get("/provisioning-jobs/{job_id}", response_model=ProvisioningJobRead)
+async def get_provisioning_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_master_session),
+    current_admin = Depends(get_current_superadmin)
+):
+    """Estado del trabajo que crea la base de datos de un tenant"""
+    result = await session.execute(
+        text("""
+            SELECT id, tenant_id, status, attempts, error, created_at, started_at, finished_at
+            FROM provisioning_jobs WHERE id = :id
+        """),
+        {"id": job_id}
+    )
+    job = result.fetchone()
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return ProvisioningJobRead.model_validate(job)
+
+
+@router.post("/provisioning-jobs/{job_id}/retry", response_model=ProvisioningJobRead)
+async def retry_provisioning_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_master_session),
+    current_admin = Depends(get_current_superadmin)
+):
+    """Vuelve a encolar un trabajo fallido"""
+    result = await session.execute(
+        text("""
+            UPDATE provisioning_jobs
+            SET status = :pending, error = NULL, started_at = NULL, finished_at = NULL
+            WHERE id = :id AND status = :failed
+            RETURNING id, tenant_id, status, attempts, error, created_at, started_at, finished_at
+        """),
+        {"id": job_id, "pending": JOB_PENDING, "failed": JOB_FAILED}
+    )
+    job = result.fetchone()
+    await session.commit()
+    if not job:
+        exists = await session.execute(text("SELECT 1 FROM provisioning_jobs WHERE id = :id"), {"id": job_id})
+        if not exists.fetchone():
+            raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+        raise HTTPException(status_code=409, detail="Solo se pueden reintentar trabajos fallidos")
+    provisioning_queue.notify()
+    return ProvisioningJobRead.model_validate(job)
+
+
 @router.get("/tenants/{tenant_id}", response_model=TenantRead)
 async def get_tenant(
     tenant_id: str,
@@ -320,6 +319,8 @@ async def update_tenant(
     
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant no encontrado")
+    # Dominios o activación pueden haber cambiado
+    await notify_tenant_routes_changed()
     
     return TenantRead(
         id=tenant.id,
@@ -343,35 +344,36 @@ async def create_tenant_admin(
     current_admin = Depends(get_current_superadmin)
 ):
     """Crea un administrador para un tenant específico"""
-    # Verificar que el tenant existe
+    # Verificar que el tenant existe y que su base ya fue creada
     result = await session.execute(
-        text("SELECT db_name FROM tenants WHERE id = :id"),
+        text("""
+            SELECT t.db_name,
+                   (SELECT j.status FROM provisioning_jobs j
+                    WHERE j.tenant_id = t.id ORDER BY j.id DESC LIMIT 1) AS job_status
+            FROM tenants t WHERE t.id = :id
+        """),
         {"id": tenant_id}
     )
     tenant = result.fetchone()
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant no encontrado")
+    if tenant.job_status is not None and tenant.job_status != JOB_DONE:
+        raise HTTPException(status_code=409, detail="Base de datos en aprovisionamiento")
     
-    # Crear usuario admin en la base del tenant
-    from sqlalchemy import create_engine
-    from sqlalchemy import text as sql_text
-    
-    tenant_url = get_tenant_db_url(tenant.db_name).replace("+asyncpg", "")
-    tenant_engine = create_engine(tenant_url)
-    
-    hashed_password = get_password_hash(data.password)
-    
-    with tenant_engine.connect() as conn:
-        conn.execute(
-            sql_text("""
+    # Crear usuario admin en la base del tenant (engine compartido del registro)
+    hashed_password = await get_password_hash_async(data.password)
+    tenant_session = await get_tenant_session(tenant.db_name)
+    try:
+        await tenant_session.execute(
+            text("""
                 INSERT INTO users (email, hashed_password, full_name, role)
                 VALUES (:email, :password, :name, 'admin')
             """),
             {"email": data.email, "password": hashed_password, "name": data.full_name}
         )
-        conn.commit()
-    
-    tenant_engine.dispose()
+        await tenant_session.commit()
+    finally:
+        await tenant_session.close()
     
     # Registrar referencia en master
     result = await session.execute(
@@ -428,23 +430,21 @@ async def get_platform_stats(
     session: AsyncSession = Depends(get_master_session),
     current_admin = Depends(get_current_superadmin)
 ):
-    """Obtiene estadísticas generales de la plataforma"""
-    # Total de tenants
-    result = await session.execute(text("SELECT COUNT(*) FROM tenants"))
-    total_tenants = result.scalar()
-    
-    # Tenants activos
-    result = await session.execute(text("SELECT COUNT(*) FROM tenants WHERE is_active = TRUE"))
-    active_tenants = result.scalar()
-    
-    # TODO: Agregar queries agregadas a cada tenant para usuarios y donaciones
-    
-    return PlatformStats(
-        total_tenants=total_tenants,
-        active_tenants=active_tenants,
-        total_users=0,  # Calcular sumando de todos los tenants
-        total_donations_amount=0.0
-    )
+    """
+    Obtiene estadísticas generales de la plataforma.
+
+    Usuarios y donaciones salen del snapshot tenant_stats (se actualiza en
+    segundo plano), no de consultar cada base de tenant en la petición.
+    """
+    return PlatformStats(**await tenant_stats.totals(session))
+
+
+@router.post("/stats/refresh")
+async def refresh_platform_stats(
+    current_admin = Depends(get_current_superadmin)
+):
+    """Vuelve a consultar ahora las bases de todos los tenants activos"""
+    return await tenant_stats.refresh()
 
 
 # ============== Gestión de Backups ==============
@@ -454,110 +454,121 @@ async def list_backups(
     session: AsyncSession = Depends(get_master_session),
     current_admin = Depends(get_current_superadmin)
 ):
-    """Lista los backups disponibles"""
-    import os
-    from pathlib import Path
-    
-    backup_dir = Path("./backups")
-    backup_dir.mkdir(exist_ok=True)
-    
-    backups = []
-    if backup_dir.exists():
-        for f in backup_dir.glob("*.sql*"):
-            stat = f.stat()
-            backups.append({
-                "filename": f.name,
-                "size_mb": round(stat.st_size / (1024**2), 2),
-                "created_at": stat.st_mtime,
-                "path": str(f)
-            })
-    
+    """Lista los backups del catálogo (los en curso incluidos, con su estado)"""
+    result = await session.execute(
+        text(f"""
+            SELECT {', '.join('b.' + c for c in BACKUP_COLUMNS.split(', '))}, t.slug AS tenant_slug
+            FROM backups b LEFT JOIN tenants t ON t.id = b.tenant_id
+            ORDER BY b.created_at DESC, b.id DESC
+        """)
+    )
+    return {
+        "backups": [_backup_dict(row) for row in result.fetchall()],
+        "backup_directory": str(backup_dir().absolute())
+    }
+
+
+def _backup_dict(row) -> dict:
+    backup = dict(row._mapping)
+    size = backup.get("size_bytes")
+    backup["size_mb"] = round(size / (1024**2), 2) if size is not None else None
+    return backup
+
+
+@router.post("/backups", status_code=status.HTTP_202_ACCEPTED)
+async def create_all_backups(
+    session: AsyncSession = Depends(get_master_session),
+    current_admin = Depends(get_current_superadmin)
+):
+    """Encola un backup de cada tenant activo (corren de a BACKUP_CONCURRENCY)"""
+    tenants = (
+        await session.execute(text("SELECT id, slug, db_name FROM tenants WHERE is_active = TRUE ORDER BY slug"))
+    ).fetchall()
+    queued = [(tenant, await backup_runner.enqueue(session, tenant)) for tenant in tenants]
+    await session.commit()
+    for tenant, backup in queued:
+        backup_runner.start(backup.id, tenant.db_name, backup.filename)
     return {
-        "backups": sorted(backups, key=lambda x: x["created_at"], reverse=True),
-        "backup_directory": str(backup_dir.absolute())
+        "message": f"{len(queued)} backups en curso",
+        "backups": [_backup_dict(backup) for _, backup in queued]
     }
 
 
-@router.post("/backups/{tenant_id}")
+@router.post("/backups/upload-file", status_code=status.HTTP_201_CREATED)
+async def upload_backup(
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_master_session),
+    current_admin = Depends(get_current_superadmin)
+):
+    """Sube un archivo de backup a la carpeta local (no restaura)"""
+    if not file.filename or not is_valid_filename(file.filename):
+        raise HTTPException(status_code=400, detail="Nombre de archivo inválido")
+
+    directory = backup_dir()
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    dest = directory / file.filename
+    if dest.exists():
+        raise HTTPException(status_code=409, detail="Ya existe un backup con ese nombre")
+
+    size = await save_upload(file, dest)
+    backup = await register_backup(
+        session,
+        tenant_id=None,
+        filename=dest.name,
+        fmt=format_for_filename(dest.name),
+        source=SOURCE_UPLOAD,
+        status=BACKUP_DONE,
+        size_bytes=size,
+    )
+    await session.commit()
+    return {"message": "Backup subido", **_backup_dict(backup)}
+
+
+@router.post("/backups/{tenant_id}", status_code=status.HTTP_202_ACCEPTED)
 async def create_backup(
     tenant_id: str,
     session: AsyncSession = Depends(get_master_session),
     current_admin = Depends(get_current_superadmin)
 ):
-    """Crea un backup de la base de datos de un tenant"""
-    import subprocess
-    from datetime import datetime
-    from pathlib import Path
-    from app.core.config import settings
-    
-    # Obtener info del tenant
+    """Encola el backup de la base de datos de un tenant; el estado se ve en GET /backups"""
     result = await session.execute(
-        text("SELECT db_name, slug FROM tenants WHERE id = :id"),
+        text("SELECT id, db_name, slug FROM tenants WHERE id = :id"),
         {"id": tenant_id}
     )
     tenant = result.fetchone()
-    
+
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant no encontrado")
-    
-    backup_dir = Path("./backups")
-    backup_dir.mkdir(exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = backup_dir / f"{tenant.slug}_{timestamp}.sql"
-    
-    try:
-        # Comando pg_dump - Host "db" es el nombre del servicio en docker-compose
-        cmd = [
-            "pg_dump",
-            "-h", "db",
-            "-p", "5432",
-            "-U", "ekklesia",
-            "-d", tenant.db_name,
-            "-f", str(backup_file),
-        ]
-        
-        env = {"PGPASSWORD": "ekklesia"}
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, env={**subprocess.os.environ, **env})
-        
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error al crear backup: {result.stderr}"
-            )
-        
-        stat = backup_file.stat()
-        return {
-            "message": "Backup creado exitosamente",
-            "filename": backup_file.name,
-            "size_mb": round(stat.st_size / (1024**2), 2),
-            "path": str(backup_file)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al crear backup: {str(e)}")
+
+    backup = await backup_runner.enqueue(session, tenant)
+    await session.commit()
+    backup_runner.start(backup.id, tenant.db_name, backup.filename)
+    return {"message": "Backup en curso", **_backup_dict(backup)}
 
 
 @router.delete("/backups/{filename}")
 async def delete_backup(
     filename: str,
+    session: AsyncSession = Depends(get_master_session),
     current_admin = Depends(get_current_superadmin)
 ):
-    """Elimina un archivo de backup"""
-    from pathlib import Path
-    import re
-    
+    """Elimina un archivo de backup y su registro en el catálogo"""
     # Validar nombre de archivo (prevenir path traversal)
-    if not re.match(r'^[\w\-\.]+\.sql(\.gz)?$', filename):
+    if not is_valid_filename(filename):
         raise HTTPException(status_code=400, detail="Nombre de archivo inválido")
-    
-    backup_path = Path("./backups") / filename
-    
-    if not backup_path.exists():
+
+    backup = (
+        await session.execute(text("SELECT status FROM backups WHERE filename = :filename"), {"filename": filename})
+    ).fetchone()
+    backup_path = backup_dir() / filename
+    if backup is None and not backup_path.exists():
         raise HTTPException(status_code=404, detail="Backup no encontrado")
-    
-    backup_path.unlink()
+    if backup is not None and backup.status in (BACKUP_PENDING, BACKUP_RUNNING):
+        raise HTTPException(status_code=409, detail="El backup todavía está en curso")
+
+    await asyncio.to_thread(backup_path.unlink, missing_ok=True)
+    await session.execute(text("DELETE FROM backups WHERE filename = :filename"), {"filename": filename})
+    await session.commit()
     return {"message": f"Backup {filename} eliminado"}
 
 
@@ -567,44 +578,14 @@ async def download_backup(
     current_admin = Depends(get_current_superadmin)
 ):
     """Descarga un archivo de backup"""
-    import re
-    from pathlib import Path
-    
-    if not re.match(r'^[\w\-\.]+\.sql(\.gz)?$', filename):
+    if not is_valid_filename(filename):
         raise HTTPException(status_code=400, detail="Nombre de archivo inválido")
-    
-    backup_path = Path("./backups") / filename
+
+    backup_path = backup_dir() / filename
     if not backup_path.exists():
         raise HTTPException(status_code=404, detail="Backup no encontrado")
-    
-    return FileResponse(backup_path, media_type="application/octet-stream", filename=filename)
 
-
-@router.post("/backups/upload-file")
-async def upload_backup(
-    file: UploadFile = File(...),
-    current_admin = Depends(get_current_superadmin)
-):
-    """Sube un archivo de backup a la carpeta local (no restaura)"""
-    import re
-    from pathlib import Path
-    
-    if not file.filename or not re.match(r'^[\w\-\.]+\.sql(\.gz)?$', file.filename):
-        raise HTTPException(status_code=400, detail="Nombre de archivo inválido")
-    
-    backup_dir = Path("./backups")
-    backup_dir.mkdir(exist_ok=True)
-    dest = backup_dir / file.filename
-    
-    content = await file.read()
-    dest.write_bytes(content)
-    
-    stat = dest.stat()
-    return {
-        "message": "Backup subido",
-        "filename": dest.name,
-        "size_mb": round(stat.st_size / (1024**2), 2)
-    }
+    return FileResponse(backup_path, media_type="application/octet-stream", filename=filename)
 
 
 # ============== Métricas de Ingresos ==============
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
 from app.api.schemas import UserRead, UserUpdate
 from app.api.services.user import UserService
 from app.core.deps import get_current_user, require_admin
-from app.db.session import get_session
+from app.core.pagination import PageParams, page_items, page_params
+from app.core.tenant import get_tenant_db
 from app.models.user import User
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -15,13 +16,17 @@ async def read_me(current_user: User = Depends(get_current_user)):
 
 
 @router.get("", response_model=list[UserRead], dependencies=[Depends(require_admin)])
-async def list_users(session=Depends(get_session)):
+async def list_users(
+    response: Response,
+    session=Depends(get_tenant_db),
+    params: PageParams = Depends(page_params),
+):
     service = UserService(session)
-    return await service.list_users()
+    return page_items(response, await service.list_users(params))
 
 
 @router.get("/{user_id}", response_model=UserRead, dependencies=[Depends(require_admin)])
-async def get_user(user_id: int, session=Depends(get_session)):
+async def get_user(user_id: int, session=Depends(get_tenant_db)):
     service = UserService(session)
     return await service.get_user(user_id)
 
@@ -32,7 +37,7 @@ async def get_user(user_id: int, session=Depends(get_session)):
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_admin)],
 )
-async def update_user(user_id: int, payload: UserUpdate, session=Depends(get_session)):
+async def update_user(user_id: int, payload: UserUpdate, session=Depends(get_tenant_db)):
     service = UserService(session)
     return await service.update_user(
         user_id,
@@ -48,7 +53,7 @@ async def update_user(user_id: int, payload: UserUpdate, session=Depends(get_ses
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[Depends(require_admin)],
 )
-async def delete_user(user_id: int, session=Depends(get_session)):
+async def delete_user(user_id: int, session=Depends(get_tenant_db)):
     service = UserService(session)
     await service.delete_user(user_id)
     return None
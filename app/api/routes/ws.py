@@ -1,54 +1,268 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+import json
+import logging
+import time
 
-from app.core.security import decode_token
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+
+from app.core.broadcast import BroadcastListener, get_broadcast
+from app.core.config import settings
+from app.core.deps import resolve_user_from_token
+from app.core.tenant import current_tenant, get_tenant_db
 
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_CHANNEL = "notifications"
+# Política con un cliente cuya cola de salida está llena
+SLOW_CONSUMER_DROP = "drop"
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+# Cierre por cliente lento: "try again later", el frontend se reconecta
+CLOSE_TRY_AGAIN_LATER = 1013
+# Cierre por exceder el límite de mensajes entrantes
+CLOSE_POLICY_VIOLATION = 1008
+
+# Temas a los que se puede suscribir un cliente; las inscripciones de un
+# evento concreto van en "event:<id>"
+TOPICS = frozenset({"donations", "events", "streams", "announcements"})
+EVENT_TOPIC_PREFIX = "event:"
+ADMIN_ROLES = frozenset({"admin"})
+
+
+def is_valid_topic(topic: str) -> bool:
+    if topic in TOPICS:
+        return True
+    event_id = topic.removeprefix(EVENT_TOPIC_PREFIX)
+    return topic.startswith(EVENT_TOPIC_PREFIX) and event_id.isdigit()
+
+
+def event_topic(event_id: int) -> str:
+    return f"{EVENT_TOPIC_PREFIX}{event_id}"
+
+
+class _Connection:
+    """
+    Socket con su cola de salida acotada y una tarea que la vacía.
+
+    Así un cliente lento solo se retrasa a sí mismo: el broadcast encola sin
+    esperar y cada envío tiene un tiempo máximo.
+    """
+
+    def __init__(self, manager: "ConnectionManager", websocket: WebSocket, is_admin: bool):
+        self.manager = manager
+        self.websocket = websocket
+        self.is_admin = is_admin
+        # Iglesia de la petición que abrió el socket: solo recibe sus eventos
+        self.tenant = current_tenant().slug
+        self.topics: set[str] = set()
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.writer = asyncio.create_task(self._write())
+        # Token bucket para los mensajes entrantes
+        self._tokens = float(settings.ws_inbound_burst)
+        self._refilled_at = time.monotonic()
+
+    def send(self, payload: dict) -> None:
+        """Respuesta directa a este cliente (se descarta si su cola está llena)"""
+        try:
+            self.queue.put_nowait(json.dumps(payload))
+        except asyncio.QueueFull:
+            pass
+
+    def allow_inbound(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            settings.ws_inbound_burst,
+            self._tokens + (now - self._refilled_at) * settings.ws_inbound_rate_per_second,
+        )
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _write(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(message), settings.ws_send_timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.info("WebSocket lento desconectado (timeout de envío)")
+                self.manager.evict(self.websocket)
+                return
+            except Exception:
+                self.manager.disconnect(self.websocket)
+                return
 
 
 class ConnectionManager:
-    def __init__(self):
-        self.active: list[WebSocket] = []
+    """
+    WebSockets conectados a este worker.
+
+    broadcast publica en el backend de difusión; cada worker tiene un listener
+    suscrito al canal que reenvía los mensajes a sus sockets locales, así el
+    evento llega a todos los workers y nodos. Cada mensaje lleva un tema y la
+    iglesia que lo publicó, y solo se encola en las conexiones de esa iglesia
+    suscritas al tema, ya serializado.
+    """
 
-    async def connect(self, websocket: WebSocket):
+    def __init__(self, channel: str = NOTIFICATIONS_CHANNEL):
+        self.channel = channel
+        self.active: dict[WebSocket, _Connection] = {}
+        self._by_topic: dict[str, set[_Connection]] = {}
+        self._listener = BroadcastListener(channel, self.send_local)
+        self._closing: set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, *, is_admin: bool = False, topics=()) -> _Connection:
         await websocket.accept()
-        self.active.append(websocket)
-        await websocket.send_json({"type": "welcome", "message": "Conectado a notificaciones"})
+        connection = _Connection(self, websocket, is_admin)
+        self.active[websocket] = connection
+        self.subscribe(connection, topics)
+        await self._listener.start()
+        connection.send(
+            {
+                "type": "welcome",
+                "message": "Conectado a notificaciones",
+                "topics": sorted(connection.topics),
+            }
+        )
+        return connection
+
+    def subscribe(self, connection: _Connection, topics) -> None:
+        for topic in topics:
+            if is_valid_topic(topic):
+                connection.topics.add(topic)
+                self._by_topic.setdefault(topic, set()).add(connection)
+
+    def unsubscribe(self, connection: _Connection, topics) -> None:
+        for topic in topics:
+            connection.topics.discard(topic)
+            subscribers = self._by_topic.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._by_topic[topic]
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active:
-            self.active.remove(websocket)
+        connection = self.active.pop(websocket, None)
+        if connection is None:
+            return
+        self.unsubscribe(connection, list(connection.topics))
+        if connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+
+    def evict(self, websocket: WebSocket, code: int = CLOSE_TRY_AGAIN_LATER):
+        """Saca a un cliente y cierra su socket en segundo plano"""
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close_socket(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_socket(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), settings.ws_send_timeout_seconds)
+        except Exception:
+            pass
 
-    async def broadcast(self, payload: dict):
-        for ws in list(self.active):
+    async def broadcast(self, topic: str, payload: dict, *, admin_fields: tuple[str, ...] = ()):
+        """
+        Publica `payload` a los suscriptores de `topic`.
+
+        Los campos de `admin_fields` (p. ej. montos) solo llegan a
+        administradores; el resto recibe el mensaje sin ellos.
+        """
+        message = json.dumps({k: v for k, v in payload.items() if k not in admin_fields}, default=str)
+        envelope = {"topic": topic, "tenant": current_tenant().slug, "message": message}
+        if admin_fields:
+            envelope["admin_message"] = json.dumps(payload, default=str)
+        try:
+            await get_broadcast().publish(self.channel, json.dumps(envelope))
+        except Exception:
+            # Una notificación perdida no debe tumbar la operación que la origina
+            logger.exception("No se pudo publicar la notificación %s", payload.get("type"))
+
+    def send_local(self, envelope: str):
+        """Encola el mensaje en los sockets locales suscritos sin esperar envíos"""
+        data = json.loads(envelope)
+        tenant = data.get("tenant", "")
+        message = data["message"]
+        admin_message = data.get("admin_message") or message
+        slow = []
+        for connection in self._by_topic.get(data["topic"], ()):
+            if connection.tenant != tenant:
+                continue
             try:
-                await ws.send_json(payload)
-            except Exception:
-                self.disconnect(ws)
+                connection.queue.put_nowait(admin_message if connection.is_admin else message)
+            except asyncio.QueueFull:
+                # Con SLOW_CONSUMER_DROP el cliente simplemente pierde este mensaje
+                if settings.ws_slow_consumer_policy == SLOW_CONSUMER_DISCONNECT:
+                    slow.append(connection.websocket)
+        for websocket in slow:
+            logger.info("WebSocket lento desconectado (cola llena)")
+            self.evict(websocket)
+
+    async def close(self):
+        await self._listener.close()
+        for websocket in list(self.active):
+            self.disconnect(websocket)
 
 
 manager = ConnectionManager()
 
 
+def handle_client_message(connection: _Connection, text: str) -> None:
+    """
+    Mensajes del cliente:
+    {"action": "subscribe" | "unsubscribe", "topics": [...]} o {"action": "ping"}
+    """
+    try:
+        data = json.loads(text)
+        action = data.get("action")
+        topics = data.get("topics", [])
+        if not isinstance(topics, list) or not all(isinstance(t, str) for t in topics):
+            raise ValueError("topics")
+    except (ValueError, AttributeError):
+        connection.send({"type": "error", "detail": "Mensaje inválido"})
+        return
+
+    if action == "subscribe":
+        manager.subscribe(connection, topics)
+    elif action == "unsubscribe":
+        manager.unsubscribe(connection, topics)
+    elif action == "ping":
+        connection.send({"type": "pong"})
+        return
+    else:
+        connection.send({"type": "error", "detail": "Acción desconocida"})
+        return
+    connection.send({"type": "subscriptions", "topics": sorted(connection.topics)})
+
+
 @router.websocket("/ws/notifications")
-async def notifications_ws(websocket: WebSocket):
+async def notifications_ws(websocket: WebSocket, session=Depends(get_tenant_db)):
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=4401)
         return
     try:
-        payload = decode_token(token)
-        if payload.get("scope") != "access_token":
-            raise ValueError("scope")
-    except Exception:
+        user = await resolve_user_from_token(token, session)
+    except HTTPException:
         await websocket.close(code=4401)
         return
+    finally:
+        # La sesión solo hace falta para validar el usuario; no retener la conexión
+        await session.close()
 
-    await manager.connect(websocket)
+    topics = [t for t in websocket.query_params.get("topics", "").split(",") if t]
+    connection = await manager.connect(websocket, is_admin=user.role in ADMIN_ROLES, topics=topics)
     try:
         while True:
             data = await websocket.receive_text()
-            await manager.broadcast({"type": "echo", "message": data})
+            if not connection.allow_inbound():
+                manager.evict(websocket, CLOSE_POLICY_VIOLATION)
+                return
+            handle_client_message(connection, data)
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
-
@@ -35,6 +35,25 @@ class TenantRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProvisioningJobRead(BaseModel):
+    id: int
+    tenant_id: UUID
+    status: str
+    attempts: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TenantProvisioningRead(BaseModel):
+    """Tenant recién registrado y el trabajo que crea su base de datos"""
+    tenant: TenantRead
+    job: ProvisioningJobRead
+
+
 class TenantAdminCreate(BaseModel):
     email: EmailStr
     password: str
@@ -98,4 +117,7 @@ class PlatformStats(BaseModel):
     active_tenants: int
     total_users: int
     total_donations_amount: float
+    # Snapshot más viejo entre los tenants activos y cuántos no pudieron leerse
+    stats_refreshed_at: datetime | None = None
+    stale_tenants: int = 0
 
@@ -6,8 +6,10 @@ from app.api.schemas import LoginRequest, UserCreate
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    verify_password,
+    decode_token,
+    verify_password_async,
 )
+from app.core.tenant import current_tenant, is_current_tenant
 
 
 class AuthService:
@@ -34,7 +36,7 @@ class AuthService:
 
     async def login(self, data: LoginRequest):
         user = await self.repo.get_by_email(data.email)
-        if not user or not verify_password(data.password, user.hashed_password):
+        if not user or not await verify_password_async(data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Credenciales inválidas",
@@ -46,15 +48,18 @@ class AuthService:
         return self._issue_tokens_from_refresh(refresh_token)
 
     def _issue_tokens(self, subject: str):
-        access = create_access_token(subject)
-        refresh = create_refresh_token(subject)
+        # Los tokens solo valen en la iglesia (Host) donde se emitieron
+        claims = {"tenant": current_tenant().slug}
+        access = create_access_token(subject, claims)
+        refresh = create_refresh_token(subject, claims)
         return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
 
     def _issue_tokens_from_refresh(self, token: str):
-        from app.core.security import decode_token
-
-        payload = decode_token(token)
-        if payload.get("scope") != "refresh_token":
+        try:
+            payload = decode_token(token)
+        except ValueError:
+            payload = {}
+        if payload.get("scope") != "refresh_token" or not is_current_tenant(payload.get("tenant")):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token inválido",
@@ -3,7 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.repositories.document import DocumentRepository
 from app.core.config import settings
-from app.core.storage import save_file
+from app.core.pagination import PageParams
+from app.core.storage import get_storage
 
 
 class DocumentService:
@@ -13,7 +14,7 @@ class DocumentService:
     async def upload(
         self,
         *,
-        file_obj,
+        upload,
         filename: str,
         mime_type: str,
         user_id: int | None,
@@ -23,9 +24,8 @@ class DocumentService:
         is_public: bool,
     ):
         try:
-            stored_path, size_bytes, checksum = save_file(
-                file_obj=file_obj,
-                filename=filename,
+            stored_path, size_bytes, checksum = await get_storage().save(
+                upload,
                 mime_type=mime_type,
                 max_size_bytes=settings.max_upload_mb * 1024 * 1024,
             )
@@ -55,6 +55,9 @@ class DocumentService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documento no encontrado")
         return doc
 
-    async def list_all(self):
-        return await self.repo.list_all()
+    async def list_all(self, params: PageParams):
+        return await self.repo.list_all(params)
 
+    async def delete(self, doc):
+        # El blob puede estar compartido con otros documentos; se libera con el GC
+        await self.repo.delete(doc)
@@ -1,7 +1,10 @@
+from datetime import date
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.repositories.donation import DonationRepository
+from app.core.pagination import PageParams
 
 
 class DonationService:
@@ -11,8 +14,10 @@ class DonationService:
     async def create_donation(self, *, user_id: int | None, data: dict):
         return await self.repo.create(user_id=user_id, **data)
 
-    async def list_for_admin(self):
-        return await self.repo.list_all()
+    async def list_for_admin(
+        self, params: PageParams, *, start_date: date | None = None, end_date: date | None = None
+    ):
+        return await self.repo.list_all(params, start_date=start_date, end_date=end_date)
 
     async def list_for_user(self, user_id: int):
         return await self.repo.list_by_user(user_id)
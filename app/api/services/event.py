@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.repositories.event import EventRepository
+from app.core.pagination import PageParams
 
 
 class EventService:
@@ -10,6 +11,6 @@ class EventService:
     async def create_event(self, **data):
         return await self.repo.create(**data)
 
-    async def list_events(self):
-        return await self.repo.list_all()
+    async def list_events(self, params: PageParams):
+        return await self.repo.list_all(params)
 
@@ -2,14 +2,15 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.repositories.user import UserRepository
+from app.core.pagination import PageParams
 
 
 class UserService:
     def __init__(self, session: AsyncSession):
         self.repo = UserRepository(session)
 
-    async def list_users(self):
-        return await self.repo.list_all()
+    async def list_users(self, params: PageParams):
+        return await self.repo.list_all(params)
 
     async def get_user(self, user_id: int):
         user = await self.repo.get_by_id(user_id)
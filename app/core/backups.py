@@ -0,0 +1,313 @@
+"""
+Backups de las bases de tenants con pg_dump, en segundo plano.
+
+- Cada backup es una tarea del worker: pg_dump corre como subproceso asyncio
+  y su salida se escribe por bloques en BACKUP_PATH, sin bloquear el event
+  loop ni cargar el dump en memoria. BACKUP_CONCURRENCY limita cuántos corren
+  a la vez (p. ej. al respaldar todos los tenants).
+- Formato (BACKUP_FORMAT): "custom" (pg_dump -Fc, comprimido, para
+  pg_restore) o "gzip" (SQL plano comprimido al vuelo).
+- El catálogo vive en la tabla backups de la base master: listar no recorre
+  el disco y cada backup tiene su estado (pending, running, done, failed).
+- Retención: tras cada backup se borran los de más de BACKUP_RETENTION_DAYS
+  días, conservando siempre los BACKUP_KEEP_MIN más recientes de cada tenant.
+  Los archivos subidos a mano no se borran solos.
+"""
+import asyncio
+import logging
+import os
+import re
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import aiofiles
+from fastapi import UploadFile
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.core.tenant import MASTER_DB, get_db_url, get_session
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PENDING = "pending"
+BACKUP_RUNNING = "running"
+BACKUP_DONE = "done"
+BACKUP_FAILED = "failed"
+
+SOURCE_PG_DUMP = "pg_dump"
+SOURCE_UPLOAD = "upload"
+
+FORMAT_CUSTOM = "custom"
+FORMAT_GZIP = "gzip"
+FORMAT_PLAIN = "plain"
+EXTENSIONS = {FORMAT_CUSTOM: ".dump", FORMAT_GZIP: ".sql.gz", FORMAT_PLAIN: ".sql"}
+
+# Nombres aceptados para descargar, borrar y subir (sin rutas)
+FILENAME_RE = re.compile(r"^[\w\-\.]+\.(sql|sql\.gz|dump)$")
+CHUNK_SIZE = 256 * 1024
+MAX_ERROR_LENGTH = 2000
+
+BACKUP_COLUMNS = "id, tenant_id, filename, format, source, status, size_bytes, error, created_at, finished_at"
+
+
+class BackupError(Exception):
+    pass
+
+
+def backup_dir() -> Path:
+    return Path(settings.backup_path)
+
+
+def is_valid_filename(filename: str) -> bool:
+    return bool(FILENAME_RE.match(filename))
+
+
+def format_for_filename(filename: str) -> str:
+    for fmt, extension in EXTENSIONS.items():
+        if filename.endswith(extension):
+            return fmt
+    raise ValueError(filename)
+
+
+def new_filename(slug: str, fmt: str) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{slug}_{timestamp}_{uuid.uuid4().hex[:6]}{EXTENSIONS[fmt]}"
+
+
+def pg_dump_command(db_url: str, fmt: str) -> tuple[list[str], dict[str, str]]:
+    """Argumentos y entorno de pg_dump (salida por stdout) para la base de `db_url`"""
+    url = make_url(db_url)
+    cmd = ["pg_dump", "--no-owner", "-h", url.host or "localhost", "-p", str(url.port or 5432)]
+    if url.username:
+        cmd += ["-U", url.username]
+    if fmt == FORMAT_CUSTOM:
+        cmd += ["--format=custom", f"--compress={settings.backup_compress_level}"]
+    else:
+        cmd += ["--format=plain"]
+    cmd += ["-d", url.database]
+    env = {**os.environ}
+    if url.password:
+        env["PGPASSWORD"] = url.password
+    return cmd, env
+
+
+async def _unlink(path: Path) -> None:
+    await asyncio.to_thread(path.unlink, missing_ok=True)
+
+
+async def dump_database(db_name: str, dest: Path, fmt: str) -> int:
+    """Escribe el dump de `db_name` en `dest` y devuelve su tamaño en bytes"""
+    cmd, env = pg_dump_command(get_db_url(db_name), fmt)
+    partial = dest.with_name(dest.name + ".partial")
+    compressor = zlib.compressobj(settings.backup_compress_level, zlib.DEFLATED, 31) if fmt == FORMAT_GZIP else None
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env
+    )
+    stderr = asyncio.create_task(process.stderr.read())
+    size = 0
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            while chunk := await process.stdout.read(CHUNK_SIZE):
+                if compressor is not None:
+                    # zlib suelta el GIL: comprimir en un hilo no frena el loop
+                    chunk = await asyncio.to_thread(compressor.compress, chunk)
+                size += len(chunk)
+                await out.write(chunk)
+            if compressor is not None:
+                tail = compressor.flush()
+                size += len(tail)
+                await out.write(tail)
+        code = await process.wait()
+        message = (await stderr).decode(errors="replace").strip()
+        if code != 0:
+            raise BackupError(message or f"pg_dump terminó con código {code}")
+        await asyncio.to_thread(os.replace, partial, dest)
+        return size
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr.cancel()
+        await _unlink(partial)
+        raise
+
+
+async def save_upload(upload: UploadFile, dest: Path) -> int:
+    """Copia la subida a `dest` por bloques (sin leer el archivo completo en memoria)"""
+    partial = dest.with_name(dest.name + ".partial")
+    size = 0
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                await out.write(chunk)
+        await asyncio.to_thread(os.replace, partial, dest)
+    except BaseException:
+        await _unlink(partial)
+        raise
+    return size
+
+
+async def register_backup(session, *, tenant_id, filename: str, fmt: str, source: str, status: str, size_bytes=None):
+    """Agrega el backup al catálogo (en la transacción de `session`)"""
+    result = await session.execute(
+        text(f"""
+            INSERT INTO backups (tenant_id, filename, format, source, status, size_bytes, finished_at)
+            VALUES (:tenant_id, :filename, :format, :source, :status, :size_bytes, :finished_at)
+            RETURNING {BACKUP_COLUMNS}
+        """),
+        {
+            "tenant_id": tenant_id,
+            "filename": filename,
+            "format": fmt,
+            "source": source,
+            "status": status,
+            "size_bytes": size_bytes,
+            "finished_at": datetime.now(timezone.utc) if status == BACKUP_DONE else None,
+        },
+    )
+    return result.fetchone()
+
+
+class BackupRunner:
+    """Ejecuta los backups encolados en este worker, con concurrencia limitada"""
+
+    def __init__(self, session_factory=None, dump=dump_database):
+        self.session_factory = session_factory or (lambda: get_session(MASTER_DB))
+        self.dump = dump
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def enqueue(self, session, tenant) -> object:
+        """Registra el backup pendiente de `tenant` (id, slug); llamar a start tras el commit"""
+        return await register_backup(
+            session,
+            tenant_id=tenant.id,
+            filename=new_filename(tenant.slug, settings.backup_format),
+            fmt=settings.backup_format,
+            source=SOURCE_PG_DUMP,
+            status=BACKUP_PENDING,
+        )
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def start(self, backup_id: int, db_name: str, filename: str) -> None:
+        self._spawn(self.run(backup_id, db_name, filename))
+
+    def recover(self) -> None:
+        """Al arrancar el worker: cierra en segundo plano los backups interrumpidos"""
+        self._spawn(self._recover())
+
+    async def _recover(self) -> None:
+        try:
+            await self.expire_interrupted()
+        except Exception:
+            logger.exception("No se pudieron revisar los backups interrumpidos")
+
+    async def run(self, backup_id: int, db_name: str, filename: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.backup_concurrency)
+        async with self._semaphore:
+            await self._update(backup_id, "status = :status", status=BACKUP_RUNNING)
+            try:
+                await asyncio.to_thread(backup_dir().mkdir, parents=True, exist_ok=True)
+                size = await asyncio.wait_for(
+                    self.dump(db_name, backup_dir() / filename, format_for_filename(filename)),
+                    settings.backup_timeout_seconds,
+                )
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    exc = BackupError("pg_dump excedió BACKUP_TIMEOUT_SECONDS")
+                logger.exception("Falló el backup %s (%s)", filename, db_name)
+                await self._update(
+                    backup_id,
+                    "status = :status, error = :error, finished_at = CURRENT_TIMESTAMP",
+                    status=BACKUP_FAILED,
+                    error=str(exc)[:MAX_ERROR_LENGTH] or type(exc).__name__,
+                )
+                return
+            await self._update(
+                backup_id,
+                "status = :status, size_bytes = :size, finished_at = CURRENT_TIMESTAMP",
+                status=BACKUP_DONE,
+                size=size,
+            )
+        try:
+            await self.apply_retention()
+        except Exception:
+            logger.exception("No se pudo aplicar la retención de backups")
+
+    async def _update(self, backup_id: int, assignments: str, **params) -> None:
+        session = await self.session_factory()
+        try:
+            await session.execute(text(f"UPDATE backups SET {assignments} WHERE id = :id"), {"id": backup_id, **params})
+            await session.commit()
+        finally:
+            await session.close()
+
+    async def apply_retention(self) -> list[str]:
+        """Borra los backups vencidos; devuelve los archivos eliminados"""
+        if settings.backup_retention_days <= 0:
+            return []
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.backup_retention_days)
+        session = await self.session_factory()
+        try:
+            result = await session.execute(
+                text("""
+                    SELECT id, filename FROM (
+                        SELECT id, filename, created_at,
+                               ROW_NUMBER() OVER (PARTITION BY tenant_id ORDER BY created_at DESC, id DESC) AS position
+                        FROM backups
+                        WHERE source = :source AND status = :done
+                    ) ranked
+                    WHERE position > :keep_min AND created_at < :cutoff
+                """),
+                {"source": SOURCE_PG_DUMP, "done": BACKUP_DONE, "keep_min": settings.backup_keep_min, "cutoff": cutoff},
+            )
+            expired = result.fetchall()
+            for row in expired:
+                await _unlink(backup_dir() / row.filename)
+                await session.execute(text("DELETE FROM backups WHERE id = :id"), {"id": row.id})
+            await session.commit()
+        finally:
+            await session.close()
+        if expired:
+            logger.info("Retención: %s backups eliminados", len(expired))
+        return [row.filename for row in expired]
+
+    async def expire_interrupted(self) -> None:
+        """Marca como fallidos los backups que quedaron a medias (p. ej. por un reinicio)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.backup_timeout_seconds)
+        session = await self.session_factory()
+        try:
+            await session.execute(
+                text("""
+                    UPDATE backups
+                    SET status = :failed, error = 'Interrumpido', finished_at = CURRENT_TIMESTAMP
+                    WHERE status IN (:pending, :running) AND created_at < :cutoff
+                """),
+                {"failed": BACKUP_FAILED, "pending": BACKUP_PENDING, "running": BACKUP_RUNNING, "cutoff": cutoff},
+            )
+            await session.commit()
+        finally:
+            await session.close()
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        for task in list(self._tasks):
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks.clear()
+
+
+backup_runner = BackupRunner()
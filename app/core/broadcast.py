@@ -0,0 +1,242 @@
+"""
+Difusión de eventos entre workers (pub/sub).
+
+Cada worker de uvicorn solo conoce sus propios WebSockets; para que un
+evento llegue a todos, se publica en un canal y cada worker lo reenvía a sus
+conexiones. BROADCAST_URL elige el backend:
+
+- memory://  en proceso (un solo worker, tests)
+- redis://[:password@]host:port/db  cualquier servidor con protocolo Redis
+  (Redis, Valkey, KeyDB...) con el cliente RESP de app.core.resp.
+
+Orden: cada worker publica por una única conexión y en serie, y recibe por
+una única suscripción que entrega en el orden de llegada, así que los
+mensajes de un canal llegan en el orden en que se publicaron.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+from app.core.resp import RespClient, encode_command, read_reply
+
+logger = logging.getLogger(__name__)
+
+# Espera entre reintentos de la suscripción tras perder la conexión (segundos)
+RECONNECT_DELAY_SECONDS = 1.0
+# Espera máxima a que una suscripción nueva esté lista
+SUBSCRIBE_TIMEOUT_SECONDS = 5
+
+
+class MemoryBroadcast:
+    """Backend en proceso: el publish entrega directamente a los suscriptores"""
+
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[AsyncIterator[str]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield _iter_queue(queue)
+        finally:
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    async def aclose(self) -> None:
+        self._subscribers.clear()
+
+
+async def _iter_queue(queue: asyncio.Queue) -> AsyncIterator[str]:
+    while True:
+        yield await queue.get()
+
+
+class RedisBroadcast:
+    """
+    Backend pub/sub sobre el protocolo de Redis.
+
+    Usa dos conexiones por worker: una para PUBLISH (RespClient, en serie)
+    y otra en modo suscripción compartida por todos los canales locales. Si la
+    suscripción se cae, se reconecta y vuelve a suscribir los canales; lo
+    publicado mientras tanto se pierde, como en cualquier pub/sub sin
+    persistencia.
+    """
+
+    def __init__(self, client: RespClient):
+        # Conexión de comandos para PUBLISH; la suscripción abre la suya
+        self.client = client
+        self._subscriber: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._queues: dict[str, set[asyncio.Queue]] = {}
+        # Canales con SUBSCRIBE confirmado en la conexión actual
+        self._confirmed: dict[str, asyncio.Event] = {}
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBroadcast":
+        return cls(RespClient.from_url(url))
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.client.execute("PUBLISH", channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[AsyncIterator[str]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        first = channel not in self._queues
+        self._queues.setdefault(channel, set()).add(queue)
+        try:
+            if first:
+                self._confirmed[channel] = asyncio.Event()
+                if self._reader_task is None:
+                    self._reader_task = asyncio.create_task(self._run_subscriber())
+                elif self._subscriber is not None:
+                    self._subscriber.write(encode_command("SUBSCRIBE", channel))
+            # Al volver, lo que se publique en el canal ya llega a la cola
+            await self._confirmed[channel].wait()
+            yield _iter_queue(queue)
+        finally:
+            queues = self._queues.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._queues[channel]
+                    self._confirmed.pop(channel, None)
+                    if self._subscriber is not None:
+                        self._subscriber.write(encode_command("UNSUBSCRIBE", channel))
+
+    async def _run_subscriber(self) -> None:
+        while True:
+            writer = None
+            try:
+                reader, writer = await self.client.open()
+                self._subscriber = writer
+                if self._queues:
+                    writer.write(encode_command("SUBSCRIBE", *self._queues))
+                while True:
+                    reply = await read_reply(reader)
+                    self._dispatch(reply)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Suscripción de broadcast caída (%s); reintentando", exc)
+            finally:
+                self._subscriber = None
+                for event in self._confirmed.values():
+                    event.clear()
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _dispatch(self, reply) -> None:
+        if not isinstance(reply, list) or len(reply) < 3:
+            return
+        kind, channel = reply[0].decode(), reply[1].decode()
+        if kind == "subscribe":
+            if channel in self._confirmed:
+                self._confirmed[channel].set()
+        elif kind == "message":
+            message = reply[2].decode()
+            for queue in self._queues.get(channel, ()):
+                queue.put_nowait(message)
+
+    async def aclose(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        await self.client.aclose()
+
+
+Broadcast = MemoryBroadcast | RedisBroadcast
+
+
+class BroadcastListener:
+    """
+    Tarea del worker que entrega cada mensaje de `channel` a `handler`.
+
+    Arranca con la primera llamada a start() (y de nuevo si el event loop
+    cambió, como pasa entre tests); start() vuelve cuando la suscripción ya
+    recibe mensajes.
+    """
+
+    def __init__(self, channel: str, handler: Callable[[str], None]):
+        self.channel = channel
+        self.handler = handler
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+
+    async def start(self) -> None:
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        elif self._ready.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), SUBSCRIBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("La suscripción a %s aún no está lista", self.channel)
+
+    async def _listen(self) -> None:
+        async with get_broadcast().subscribe(self.channel) as messages:
+            self._ready.set()
+            async for message in messages:
+                try:
+                    self.handler(message)
+                except Exception:
+                    logger.exception("Mensaje inválido descartado en el canal %s", self.channel)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+def create_broadcast(url: str) -> Broadcast:
+    scheme = urlsplit(url).scheme
+    if scheme == "memory":
+        return MemoryBroadcast()
+    if scheme == "redis":
+        return RedisBroadcast.from_url(url)
+    raise ValueError(f"BROADCAST_URL no soportada: {url}")
+
+
+_broadcast: Broadcast | None = None
+
+
+def get_broadcast() -> Broadcast:
+    global _broadcast
+    if _broadcast is None:
+        _broadcast = create_broadcast(settings.broadcast_url)
+    return _broadcast
+
+
+def set_broadcast(broadcast: Broadcast | None) -> None:
+    """Reemplaza el backend (tests)"""
+    global _broadcast
+    _broadcast = broadcast
+
+
+async def close_broadcast() -> None:
+    global _broadcast
+    if _broadcast is not None:
+        await _broadcast.aclose()
+        _broadcast = None
@@ -8,17 +8,131 @@ class Settings(BaseSettings):
 
     database_url: AnyUrl = "postgresql+asyncpg://ekklesia:ekklesia@db:5432/ekklesia"
 
+    # Pool de conexiones (compartido por get_session y get_tenant_db)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_timeout: int = 30
+    db_statement_cache_size: int = 500
+
+    # Engines de las bases de tenants (registro de app.db.session): pool chico
+    # por base, máximo de engines abiertos (se cierra el usado hace más
+    # tiempo), cierre tras DB_ENGINE_IDLE_SECONDS sin uso y tope de conexiones
+    # del proceso sumando todos los pools (0 sin tope; p. ej. max_connections
+    # del servidor dividido por la cantidad de workers)
+    db_tenant_pool_size: int = 2
+    db_tenant_max_overflow: int = 3
+    db_max_tenant_engines: int = 50
+    db_engine_idle_seconds: int = 600
+    db_connection_budget: int = 0
+
     secret_key: str = "CHANGE_ME"
     access_token_exp_minutes: int = 30
     refresh_token_exp_minutes: int = 60 * 24 * 30
     jwt_algorithm: str = "HS256"
 
+    # Pool para bcrypt: "thread" o "process"
+    password_hash_workers: int = 4
+    password_hash_executor: str = "thread"
+
+    # Cache de usuarios autenticados (0 desactiva)
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 10000
+
+    # Difusión de notificaciones entre workers: memory:// o redis://host:6379/0
+    broadcast_url: str = "memory://"
+    # Cola de salida por WebSocket (mensajes), timeout de envío y qué hacer
+    # con un cliente que no da abasto: "disconnect" (se reconecta) o "drop"
+    ws_send_queue_size: int = 64
+    ws_send_timeout_seconds: float = 5
+    ws_slow_consumer_policy: str = "disconnect"
+    # Mensajes entrantes por conexión (token bucket); al excederlo se cierra
+    ws_inbound_rate_per_second: float = 2
+    ws_inbound_burst: int = 10
+    # SSE públicas (/public/updates): heartbeat, eventos guardados para
+    # reanudar con Last-Event-ID y cola por cliente
+    sse_heartbeat_seconds: float = 15
+    sse_replay_buffer_size: int = 256
+    sse_queue_size: int = 64
+
+    # Cache de respuestas de /api/public: memory:// (por worker) o redis://...
+    # TTL 0 la desactiva
+    public_cache_url: str = "memory://"
+    public_cache_ttl_seconds: int = 300
+    public_cache_max_entries: int = 1000
+
+    # Aprovisionamiento de tenants: workers de la cola en este proceso (0 no
+    # ejecuta trabajos), bases de repuesto listas para asignar (0 no crea
+    # plantilla ni repuestos al arrancar), intervalo de revisión de la cola y
+    # tiempo tras el que un trabajo colgado se reintenta
+    provisioning_workers: int = 2
+    provisioning_spare_databases: int = 0
+    provisioning_poll_seconds: float = 5
+    provisioning_job_timeout_seconds: int = 600
+
+    # Estadísticas de la plataforma (/superadmin/stats): cada cuánto se
+    # consultan las bases de los tenants (0 lo desactiva), cuántas a la vez,
+    # tiempo máximo por tenant y caché en memoria de los totales
+    tenant_stats_refresh_seconds: int = 300
+    tenant_stats_concurrency: int = 8
+    tenant_stats_timeout_seconds: float = 5
+    tenant_stats_cache_seconds: int = 30
+
+    # Resolución de la iglesia por Host (app.core.tenant_routing): activa,
+    # dominio base de los subdominios (<subdomain>.<dominio>), vigencia de la
+    # tabla de rutas en memoria y si un host desconocido usa la base
+    # principal (si no, 404)
+    multi_tenant: bool = False
+    tenant_base_domain: str | None = None
+    tenant_routes_ttl_seconds: int = 60
+    tenant_fallback_to_main: bool = True
+
+    # Backups de tenants (pg_dump): carpeta, formato "custom" (pg_restore) o
+    # "gzip" (SQL comprimido), nivel de compresión, dumps simultáneos, tiempo
+    # máximo por dump y retención (días; 0 la desactiva) conservando siempre
+    # los últimos BACKUP_KEEP_MIN de cada tenant
+    backup_path: str = "./backups"
+    backup_format: str = "custom"
+    backup_compress_level: int = 6
+    backup_concurrency: int = 2
+    backup_timeout_seconds: int = 3600
+    backup_retention_days: int = 14
+    backup_keep_min: int = 3
+
+    # Métricas (/api/metrics): token Bearer opcional para leerlas y umbral
+    # a partir del cual una petición se registra como lenta (0 lo desactiva)
+    metrics_token: str | None = None
+    slow_request_ms: int = 1000
+
+    # Listados paginados (?limit=&cursor=)
+    page_size_default: int = 50
+    page_size_max: int = 200
+
+    # Reportes: leer de donation_daily_rollups en vez de escanear donations
+    reports_use_rollups: bool = True
+    # Exportación CSV: filas por lote leídas del cursor
+    report_export_batch_size: int = 1000
+
+    # Almacén de documentos: "local" (storage_path) o "s3"
+    storage_backend: str = "local"
     storage_path: str = "./storage"
     max_upload_mb: int = 10
     s3_endpoint_url: str | None = None
     s3_access_key: str | None = None
     s3_secret_key: str | None = None
     s3_bucket: str | None = None
+    s3_region: str = "us-east-1"
+    # Endpoint que ve el navegador para las URLs firmadas (si difiere del interno)
+    s3_public_endpoint_url: str | None = None
+    s3_presign_expires_seconds: int = 300
+    s3_multipart_threshold_mb: int = 8
+    s3_multipart_part_mb: int = 8
+    # Cache-Control de descargas (segundos): públicos en caches compartidos, privados solo en el navegador
+    document_cache_max_age_public: int = 86400
+    document_cache_max_age_private: int = 3600
+    # Tope de la cache en disco de miniaturas (LRU)
+    derivative_cache_mb: int = 256
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
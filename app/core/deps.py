@@ -3,16 +3,20 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
-from app.db.session import get_session
+from app.core.tenant import current_tenant, get_tenant_db, is_current_tenant
+from app.core.user_cache import UserPrincipal, user_cache
 from app.api.repositories.user import UserRepository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_session),
-):
+async def resolve_user_from_token(token: str, session: AsyncSession) -> UserPrincipal:
+    """
+    Valida el access token y devuelve el principal (desde cache si es posible).
+
+    El token solo vale en la iglesia para la que se emitió (claim "tenant"):
+    los ids de usuario se repiten entre las bases de los tenants.
+    """
     try:
         payload = decode_token(token)
     except ValueError:
@@ -22,14 +26,20 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if payload.get("scope") != "access_token":
+    if payload.get("scope") != "access_token" or not is_current_tenant(payload.get("tenant")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    tenant = current_tenant().slug
     user_id = int(payload.get("sub"))
+    principal = user_cache.get(tenant, user_id)
+    if principal is not None:
+        return principal
+
+    version = user_cache.version(tenant, user_id)
     repo = UserRepository(session)
     user = await repo.get_by_id(user_id)
     if not user:
@@ -43,7 +53,16 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuario inactivo",
         )
-    return user
+    principal = UserPrincipal.from_user(user)
+    user_cache.set(tenant, principal, version)
+    return principal
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    session: AsyncSession = Depends(get_tenant_db),
+) -> UserPrincipal:
+    return await resolve_user_from_token(token, session)
 
 
 async def require_admin(current_user=Depends(get_current_user)):
@@ -53,4 +72,3 @@ async def require_admin(current_user=Depends(get_current_user)):
             detail="Se requieren privilegios de administrador",
         )
     return current_user
-
@@ -0,0 +1,114 @@
+"""
+Utilidades HTTP de cache: ETag, peticiones condicionales (304) y Range (206).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping
+
+from fastapi import HTTPException, status
+
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etags(header: str) -> list[str]:
+    # Comparación débil (RFC 9110 §13.1.2): W/"x" equivale a "x"
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def _parse_http_date(value: str) -> datetime | None:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _truncate(value: datetime) -> datetime:
+    # Las fechas HTTP tienen resolución de segundos
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str | None, last_modified: datetime | None) -> bool:
+    """
+    True si la copia del cliente sigue vigente y basta con un 304.
+
+    If-None-Match tiene prioridad: si viene, If-Modified-Since se ignora.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        tags = _etags(if_none_match)
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and _truncate(last_modified) <= since
+    return False
+
+
+def requested_range(
+    headers: Mapping[str, str],
+    size: int,
+    etag: str | None,
+    last_modified: datetime | None = None,
+) -> tuple[int, int] | None:
+    """
+    Rango (inicio, fin inclusivo) pedido con `Range: bytes=...`, o None para
+    responder el archivo completo.
+
+    Solo se atiende un rango; varios rangos o un If-Range que no coincide
+    devuelven el archivo completo, como permite el RFC. Un rango fuera del
+    archivo responde 416.
+    """
+    header = headers.get("range")
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+
+    if_range = headers.get("if-range")
+    if if_range:
+        if if_range.startswith(('"', "W/")):
+            if etag is None or if_range != etag:
+                return None
+        elif last_modified is None or _parse_http_date(if_range) != _truncate(last_modified):
+            return None
+
+    start_text, _, end_text = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            suffix = int(end_text)
+            if suffix < 0:
+                return None
+            if suffix == 0:
+                raise _unsatisfiable(size)
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise _unsatisfiable(size)
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _unsatisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="Rango no satisfacible",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
@@ -0,0 +1,307 @@
+"""
+Métricas del proceso en formato de texto de Prometheus (/api/metrics).
+
+- MetricsMiddleware mide cada petición HTTP por ruta (la plantilla, p. ej.
+  /api/events/{event_id}, no la URL concreta) y registra las peticiones
+  lentas en el log.
+- instrument_engine cuenta las sentencias SQL y su tiempo, y se las atribuye
+  a la petición en curso a través de un ContextVar.
+- La espera por una conexión del pool la mide el pool de app.db.session, que
+  además publica cuántos engines y conexiones tiene abiertos su registro.
+
+Los valores son de este worker: con varios workers cada scrape ve el suyo.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Segundos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Sentencias SQL por petición
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Etiqueta de las peticiones que no corresponden a ninguna ruta (404)
+UNMATCHED_ROUTE = "unmatched"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Gauge:
+    """Valor actual; con set_function se calcula al momento del scrape"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function = None
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def set_function(self, function) -> None:
+        """`function()` devuelve {labels: valor}"""
+        self._function = function
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        return self._function() if self._function is not None else dict(self._values)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> (conteo por bucket no acumulado [+Inf al final], suma)
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def sum(self, *labels: str) -> float:
+        series = self._series.get(labels)
+        return series[1][0] if series else 0.0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else _number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total[0])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[Counter | Gauge | Histogram] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(
+    Counter("http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+)
+REQUEST_SECONDS = registry.register(
+    Histogram("http_request_duration_seconds", "Duración de las peticiones HTTP", ("method", "route"))
+)
+REQUEST_DB_STATEMENTS = registry.register(
+    Histogram(
+        "http_request_db_statements",
+        "Sentencias SQL ejecutadas por petición",
+        ("method", "route"),
+        buckets=STATEMENT_BUCKETS,
+    )
+)
+REQUEST_DB_SECONDS = registry.register(
+    Histogram("http_request_db_seconds", "Tiempo en la base de datos por petición", ("method", "route"))
+)
+SLOW_REQUESTS = registry.register(
+    Counter("http_slow_requests_total", "Peticiones por encima de SLOW_REQUEST_MS", ("method", "route"))
+)
+DB_STATEMENTS = registry.register(
+    Counter("db_statements_total", "Sentencias SQL ejecutadas (dentro y fuera de peticiones)")
+)
+POOL_WAIT_SECONDS = registry.register(
+    Histogram("db_pool_wait_seconds", "Espera para obtener una conexión del pool")
+)
+DB_ENGINES = registry.register(
+    Gauge("db_engines", "Engines abiertos en el registro (pinned: principal y master)", ("kind",))
+)
+DB_POOL_CONNECTIONS = registry.register(
+    Gauge("db_pool_connections", "Conexiones de los pools del registro", ("state",))
+)
+DB_ENGINE_EVICTIONS = registry.register(
+    Counter("db_engine_evictions_total", "Engines de tenant cerrados por el registro", ("reason",))
+)
+
+
+@dataclass(slots=True)
+class RequestStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+_current_request: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _current_request.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    DB_STATEMENTS.inc()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Cuenta las sentencias de `engine` (el sync_engine de un AsyncEngine)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def observe_pool_wait(seconds: float) -> None:
+    POOL_WAIT_SECONDS.observe(seconds)
+
+
+class MetricsMiddleware:
+    """Latencia, sentencias SQL y tiempo de base de datos por ruta"""
+
+    def __init__(self, app: ASGIApp, router: Router, exclude: tuple[str, ...] = ()):
+        self.app = app
+        self.router = router
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_request.reset(token)
+            self._record(scope, status, elapsed, stats)
+
+    def _route(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        # Respuestas que no llegaron al router (cache pública, 413...)
+        for candidate in self.router.routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return candidate.path
+        return UNMATCHED_ROUTE
+
+    def _record(self, scope: Scope, status: int, elapsed: float, stats: RequestStats) -> None:
+        method, route = scope["method"], self._route(scope)
+        REQUESTS.inc(method, route, str(status))
+        REQUEST_SECONDS.observe(elapsed, method, route)
+        REQUEST_DB_STATEMENTS.observe(stats.statements, method, route)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+        if settings.slow_request_ms and elapsed * 1000 >= settings.slow_request_ms:
+            SLOW_REQUESTS.inc(method, route)
+            logger.warning(
+                "Petición lenta: %s %s -> %s en %.0f ms (%d sentencias SQL, %.0f ms en base de datos)",
+                method,
+                scope["path"],
+                status,
+                elapsed * 1000,
+                stats.statements,
+                stats.db_seconds * 1000,
+            )
@@ -0,0 +1,39 @@
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Margen para los campos del formulario y los separadores multipart
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rechaza subidas por Content-Length antes de leer el cuerpo.
+
+    FastAPI parsea el multipart (y lo vuelca a disco) antes de ejecutar la
+    ruta, así que el límite de save_upload llega tarde para un cuerpo enorme.
+    Las peticiones sin Content-Length siguen limitadas por save_upload.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefixes: tuple[str, ...]):
+        self.app = app
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["method"] in ("POST", "PUT")
+            and scope["path"].startswith(self.path_prefixes)
+        ):
+            length = Headers(scope=scope).get("content-length")
+            max_bytes = settings.max_upload_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+            if length and length.isdigit() and int(length) > max_bytes:
+                response = JSONResponse(
+                    {"detail": "Archivo excede el tamaño máximo permitido"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,129 @@
+"""
+Paginación por keyset para los listados.
+
+El cliente envía ?limit=&cursor= y recibe la página como lista JSON; si hay más
+filas, la respuesta trae la cabecera X-Next-Cursor con el cursor siguiente.
+El cursor es opaco (base64 de las claves de orden de la última fila), así que
+cada página es un WHERE (claves) > (cursor) sobre el índice en lugar de un
+OFFSET que recorre todas las filas anteriores.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    limit: int
+    after: tuple | None = None
+
+    def after_values(self, count: int) -> tuple | None:
+        """Claves del cursor; 400 si no corresponden al orden del listado"""
+        if self.after is not None and len(self.after) != count:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        return self.after
+
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: str | None = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("tipo de cursor desconocido")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or not values:
+            raise ValueError("cursor vacío")
+        return tuple(_decode_value(v) for v in values)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def page_params(
+    limit: int | None = Query(None, ge=1, description="Tamaño de página"),
+    cursor: str | None = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+) -> PageParams:
+    """Dependencia común: aplica el tamaño por defecto y el máximo permitido"""
+    size = min(limit or settings.page_size_default, settings.page_size_max)
+    return PageParams(limit=size, after=decode_cursor(cursor) if cursor else None)
+
+
+def build_page(rows: Sequence, params: PageParams, key: Callable[[Any], Sequence[Any]]) -> Page:
+    """
+    Corta la página a partir de limit + 1 filas leídas.
+
+    La fila sobrante solo indica que hay más; el cursor son las claves de la
+    última fila devuelta.
+    """
+    items = list(rows[: params.limit])
+    if len(rows) > params.limit:
+        return Page(items=items, next_cursor=encode_cursor(key(items[-1])))
+    return Page(items=items)
+
+
+async def paginate(
+    session: AsyncSession,
+    stmt: Select,
+    keys: Sequence,
+    params: PageParams,
+    *,
+    descending: bool = False,
+) -> Page:
+    """
+    Pagina un select ORM por las columnas `keys` (la última debe ser única).
+
+    Todas las claves se ordenan en el mismo sentido para poder comparar la
+    tupla completa contra el cursor.
+    """
+    after = params.after_values(len(keys))
+    if after is not None:
+        position = tuple_(*keys)
+        stmt = stmt.where(position < tuple_(*after) if descending else position > tuple_(*after))
+    order = [key.desc() for key in keys] if descending else list(keys)
+    result = await session.execute(stmt.order_by(*order).limit(params.limit + 1))
+    rows = result.scalars().all()
+    names = [key.key for key in keys]
+    return build_page(rows, params, lambda obj: [getattr(obj, name) for name in names])
+
+
+def page_items(response: Response, page: Page) -> list:
+    """Publica el cursor siguiente en la cabecera y devuelve las filas"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
@@ -0,0 +1,363 @@
+"""
+Aprovisionamiento de bases de datos de tenants en segundo plano.
+
+create_tenant solo registra el tenant (inactivo) y un trabajo en
+provisioning_jobs de la base master; los workers de la cola lo toman con
+FOR UPDATE SKIP LOCKED (sirve con varios workers y nodos) y el estado se
+consulta en /superadmin/provisioning-jobs/{id}.
+
+Crear la base de un tenant no reejecuta tenant_schema.sql:
+
+- El esquema se aplica una vez, en una sola transacción, a una base
+  plantilla versionada por el hash del archivo (ekk_template_<hash>).
+- Opcionalmente se mantienen PROVISIONING_SPARE_DATABASES bases de repuesto
+  ya copiadas de la plantilla (ekk_spare_<hash>_<id>); un tenant nuevo toma
+  una con ALTER DATABASE ... RENAME, que tarda milisegundos. Reponerlas y
+  tomarlas se coordina entre workers con un advisory lock (SPARES_LOCK).
+- Sin repuestos disponibles se copia la plantilla (CREATE DATABASE ...
+  TEMPLATE), que sigue siendo mucho más rápido que aplicar el esquema.
+
+Si tenant_schema.sql cambia, el hash cambia: se crea una plantilla nueva y los
+repuestos viejos se descartan.
+"""
+import asyncio
+import hashlib
+import logging
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.tenant import MASTER_DB, get_db_url, get_session
+from app.core.tenant_routing import notify_tenant_routes_changed
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = Path(__file__).resolve().parents[1] / "db" / "sql" / "tenant_schema.sql"
+# Base de mantenimiento del servidor de tenants (para CREATE/ALTER DATABASE)
+SERVER_DB = "postgres"
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+# Largo máximo del error guardado en el trabajo
+MAX_ERROR_LENGTH = 2000
+# Advisory lock del pool de repuestos: exclusivo para reponer, compartido para tomar
+SPARES_LOCK = "ekk_spares"
+
+
+@lru_cache
+def schema_sql() -> str:
+    return SCHEMA_PATH.read_text(encoding="utf-8")
+
+
+def schema_version() -> str:
+    return hashlib.sha256(schema_sql().encode()).hexdigest()[:12]
+
+
+def template_name() -> str:
+    return f"ekk_template_{schema_version()}"
+
+
+def spare_prefix() -> str:
+    return f"ekk_spare_{schema_version()}_"
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class TenantProvisioner:
+    """Crea bases de tenant copiando la plantilla del esquema actual"""
+
+    def __init__(self, server_url: str | None = None):
+        self.server_url = server_url or get_db_url(SERVER_DB)
+        self._engine: AsyncEngine | None = None
+
+    def _server(self) -> AsyncEngine:
+        # CREATE/ALTER DATABASE no pueden ir en una transacción; sin pool para
+        # no dejar conexiones abiertas
+        if self._engine is None:
+            self._engine = create_async_engine(self.server_url, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+        return self._engine
+
+    async def _execute(self, sql: str, params: dict | None = None):
+        async with self._server().connect() as conn:
+            return (await conn.execute(text(sql), params or {})).fetchall()
+
+    async def database_exists(self, name: str) -> bool:
+        rows = await self._execute("SELECT 1 FROM pg_database WHERE datname = :name", {"name": name})
+        return bool(rows)
+
+    async def create_database(self, db_name: str) -> str:
+        """Crea `db_name` con el esquema actual; devuelve cómo se obtuvo"""
+        if await self.database_exists(db_name):
+            # Reintento de un trabajo que ya había creado la base
+            return "existing"
+        if await self._claim_spare(db_name):
+            return "spare"
+        await self.ensure_template()
+        await self._execute(f"CREATE DATABASE {quote_ident(db_name)} TEMPLATE {quote_ident(template_name())}")
+        return "template"
+
+    async def _claim_spare(self, db_name: str) -> bool:
+        async with self._server().connect() as conn:
+            # Mientras otro worker repone el pool se copia la plantilla en vez de esperar
+            locked = (
+                await conn.execute(text("SELECT pg_try_advisory_lock_shared(hashtext(:name))"), {"name": SPARES_LOCK})
+            ).scalar()
+            if not locked:
+                return False
+            try:
+                for spare in await self._spares(conn):
+                    try:
+                        await conn.execute(text(f"ALTER DATABASE {quote_ident(spare)} RENAME TO {quote_ident(db_name)}"))
+                        return True
+                    except Exception:
+                        # Otro worker la tomó primero
+                        continue
+                return False
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock_shared(hashtext(:name))"), {"name": SPARES_LOCK})
+
+    async def _spares(self, conn) -> list[str]:
+        rows = await conn.execute(
+            text("SELECT datname FROM pg_database WHERE starts_with(datname, :prefix) ORDER BY datname"),
+            {"prefix": spare_prefix()},
+        )
+        return [row.datname for row in rows]
+
+    async def ensure_template(self) -> None:
+        """Crea la plantilla del esquema actual si no existe (una sola vez entre workers)"""
+        name = template_name()
+        async with self._server().connect() as conn:
+            await conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": name})
+            try:
+                row = (
+                    await conn.execute(text("SELECT datistemplate FROM pg_database WHERE datname = :name"), {"name": name})
+                ).fetchone()
+                if row is not None and row.datistemplate:
+                    return
+                if row is not None:
+                    # Quedó a medias (p. ej. el proceso murió aplicando el esquema)
+                    await conn.execute(text(f"DROP DATABASE {quote_ident(name)}"))
+                await conn.execute(text(f"CREATE DATABASE {quote_ident(name)}"))
+                try:
+                    await self._apply_schema(name)
+                except Exception:
+                    await conn.execute(text(f"DROP DATABASE {quote_ident(name)}"))
+                    raise
+                # IS_TEMPLATE marca la plantilla como completa
+                await conn.execute(text(f"ALTER DATABASE {quote_ident(name)} WITH IS_TEMPLATE true"))
+                logger.info("Plantilla de tenant %s creada", name)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+
+    async def _apply_schema(self, db_name: str) -> None:
+        engine = create_async_engine(get_db_url(db_name), poolclass=NullPool)
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                # Protocolo simple de asyncpg: el script completo (con bloques
+                # DO $$ ... $$) en un solo viaje y una sola transacción
+                async with driver.transaction():
+                    await driver.execute(schema_sql())
+        finally:
+            await engine.dispose()
+
+    async def replenish(self, target: int) -> int:
+        """Completa el pool de repuestos y descarta los de esquemas viejos (un worker a la vez)"""
+        async with self._server().connect() as conn:
+            await conn.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": SPARES_LOCK})
+            try:
+                stale = await conn.execute(
+                    text(
+                        "SELECT datname FROM pg_database WHERE starts_with(datname, 'ekk_spare_') "
+                        "AND NOT starts_with(datname, :prefix)"
+                    ),
+                    {"prefix": spare_prefix()},
+                )
+                for row in stale.fetchall():
+                    await conn.execute(text(f"DROP DATABASE IF EXISTS {quote_ident(row.datname)}"))
+
+                missing = target - len(await self._spares(conn))
+                if missing <= 0:
+                    return 0
+                await self.ensure_template()
+                for _ in range(missing):
+                    spare = f"{spare_prefix()}{uuid.uuid4().hex[:8]}"
+                    await conn.execute(
+                        text(f"CREATE DATABASE {quote_ident(spare)} TEMPLATE {quote_ident(template_name())}")
+                    )
+                return missing
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": SPARES_LOCK})
+
+    async def aclose(self) -> None:
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+async def enqueue_provisioning(session, tenant_id) -> object:
+    """Registra el trabajo en la transacción de `session` (la del tenant nuevo)"""
+    result = await session.execute(
+        text("""
+            INSERT INTO provisioning_jobs (tenant_id, status)
+            VALUES (:tenant_id, :status)
+            RETURNING id, tenant_id, status, attempts, error, created_at, started_at, finished_at
+        """),
+        {"tenant_id": tenant_id, "status": JOB_PENDING},
+    )
+    return result.fetchone()
+
+
+class ProvisioningQueue:
+    """
+    Workers de este proceso que ejecutan los trabajos pendientes.
+
+    notify() despierta a un worker tras encolar; además revisan la tabla
+    cada PROVISIONING_POLL_SECONDS para tomar trabajos encolados por otros
+    procesos o que quedaron colgados (running por más de
+    PROVISIONING_JOB_TIMEOUT_SECONDS, p. ej. por un reinicio).
+    """
+
+    def __init__(self, provisioner: TenantProvisioner | None = None, session_factory=None):
+        self.provisioner = provisioner or TenantProvisioner()
+        self.session_factory = session_factory or (lambda: get_session(MASTER_DB))
+        self._wakeup = asyncio.Event()
+        self._replenish = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks or settings.provisioning_workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._replenish = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(settings.provisioning_workers)]
+        if settings.provisioning_spare_databases > 0:
+            self._tasks.append(asyncio.create_task(self._keep_spares()))
+            self._replenish.set()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("No se pudo leer la cola de aprovisionamiento")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.provisioning_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self.run(job)
+
+    async def _claim(self):
+        session = await self.session_factory()
+        try:
+            result = await session.execute(
+                text("""
+                    UPDATE provisioning_jobs
+                    SET status = :running, started_at = NOW(), attempts = attempts + 1
+                    WHERE id = (
+                        SELECT id FROM provisioning_jobs
+                        WHERE status = :pending
+                           OR (status = :running AND started_at < NOW() - make_interval(secs => :timeout))
+                        ORDER BY id
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, tenant_id
+                """),
+                {
+                    "running": JOB_RUNNING,
+                    "pending": JOB_PENDING,
+                    "timeout": float(settings.provisioning_job_timeout_seconds),
+                },
+            )
+            job = result.fetchone()
+            await session.commit()
+            return job
+        finally:
+            await session.close()
+
+    async def run(self, job) -> None:
+        """Crea la base del tenant del trabajo `job` (ya marcado running) y lo cierra"""
+        session = await self.session_factory()
+        try:
+            tenant = (
+                await session.execute(text("SELECT db_name FROM tenants WHERE id = :id"), {"id": job.tenant_id})
+            ).fetchone()
+            try:
+                if tenant is None:
+                    raise LookupError("El tenant ya no existe")
+                source = await self.provisioner.create_database(tenant.db_name)
+            except Exception as exc:
+                logger.exception("Falló el aprovisionamiento del trabajo %s", job.id)
+                await session.execute(
+                    text("""
+                        UPDATE provisioning_jobs
+                        SET status = :failed, error = :error, finished_at = CURRENT_TIMESTAMP
+                        WHERE id = :id
+                    """),
+                    {"failed": JOB_FAILED, "error": str(exc)[:MAX_ERROR_LENGTH] or type(exc).__name__, "id": job.id},
+                )
+                await session.commit()
+                return
+            await session.execute(text("UPDATE tenants SET is_active = TRUE WHERE id = :id"), {"id": job.tenant_id})
+            await session.execute(
+                text("""
+                    UPDATE provisioning_jobs
+                    SET status = :done, error = NULL, finished_at = CURRENT_TIMESTAMP
+                    WHERE id = :id
+                """),
+                {"done": JOB_DONE, "id": job.id},
+            )
+            await session.commit()
+            await notify_tenant_routes_changed()
+            logger.info("Base %s aprovisionada (%s)", tenant.db_name, source)
+            if source == "spare":
+                self._replenish.set()
+        finally:
+            await session.close()
+
+    async def _keep_spares(self) -> None:
+        while True:
+            await self._replenish.wait()
+            self._replenish.clear()
+            try:
+                created = await self.provisioner.replenish(settings.provisioning_spare_databases)
+                if created:
+                    logger.info("%s bases de repuesto creadas", created)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("No se pudo completar el pool de bases de repuesto")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+        await self.provisioner.aclose()
+
+
+provisioning_queue = ProvisioningQueue()
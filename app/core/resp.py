@@ -0,0 +1,107 @@
+"""
+Cliente mínimo del protocolo de Redis (RESP2) sobre asyncio.
+
+Sirve para Redis, Valkey, KeyDB o cualquier compatible; lo usan la difusión
+de eventos y la cache de respuestas compartida. Solo cubre lo necesario:
+comandos en serie por una conexión y lectura de respuestas.
+"""
+import asyncio
+from urllib.parse import unquote, urlsplit
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args: str | bytes) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Lee una respuesta RESP2 completa"""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Conexión cerrada por el servidor")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Respuesta RESP inesperada: {line[:40]!r}")
+
+
+class RespClient:
+    """Conexión de comandos: uno a la vez, reconectando si el servidor la cerró"""
+
+    def __init__(self, host: str, port: int = 6379, *, password: str | None = None, db: int = 0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.db = db
+        self._connection: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespClient":
+        parts = urlsplit(url)
+        db = parts.path.strip("/")
+        return cls(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            password=unquote(parts.password) if parts.password else None,
+            db=int(db) if db else 0,
+        )
+
+    async def open(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Conexión nueva, autenticada y con la base seleccionada"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                writer.write(encode_command("AUTH", self.password))
+                await read_reply(reader)
+            if self.db:
+                writer.write(encode_command("SELECT", str(self.db)))
+                await read_reply(reader)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def execute(self, *args: str | bytes):
+        async with self._lock:
+            for attempt in range(2):
+                if self._connection is None:
+                    self._connection = await self.open()
+                reader, writer = self._connection
+                try:
+                    writer.write(encode_command(*args))
+                    await writer.drain()
+                    return await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # Conexión caída (p. ej. reinicio del servidor): un reintento
+                    writer.close()
+                    self._connection = None
+                    if attempt:
+                        raise
+
+    async def aclose(self) -> None:
+        if self._connection is not None:
+            self._connection[1].close()
+            self._connection = None
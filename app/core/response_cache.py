@@ -0,0 +1,360 @@
+"""
+Cache de respuestas de las rutas públicas (/api/public).
+
+Los datos públicos solo cambian cuando un admin los edita, así que las
+respuestas GET exitosas se guardan durante PUBLIC_CACHE_TTL_SECONDS con
+etiquetas (config, events, streams, content, announcements) y las rutas de
+escritura de church_admin invalidan la etiqueta que tocan. El TTL acota lo
+que depende de la fecha (eventos próximos, anuncios vigentes).
+
+PUBLIC_CACHE_URL elige dónde se guardan:
+
+- memory://  en cada worker (LRU); las invalidaciones viajan por el backend
+  de difusión para que todos los workers las apliquen
+- redis://host:6379/0  compartida por todos los workers y nodos
+
+Cada respuesta lleva ETag (304 con If-None-Match) y X-Cache: HIT, MISS o
+BYPASS (respuestas no 200, que no se guardan).
+
+Cada etiqueta tiene una generación que sube al invalidarla. La middleware la
+lee antes de generar la respuesta y no la guarda si cambió mientras tanto: así
+una invalidación que llega en medio (p. ej. go-live de una transmisión) no deja
+la respuesta vieja en cache hasta que venza el TTL.
+
+Claves y etiquetas llevan la iglesia de la petición (app.core.tenant): cada
+iglesia tiene sus entradas y una edición solo invalida las suyas.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.broadcast import BroadcastListener, get_broadcast
+from app.core.config import settings
+from app.core.http_cache import is_not_modified, strong_etag
+from app.core.resp import RespClient
+from app.core.tenant import current_tenant
+
+logger = logging.getLogger(__name__)
+
+CACHE_HEADER = "X-Cache"
+INVALIDATION_CHANNEL = "public-cache"
+# Primer segmento de /api/public/<segmento> -> etiqueta que lo invalida
+PUBLIC_CACHE_TAGS = {
+    "config": "config",
+    "donation-info": "config",
+    "events": "events",
+    "streams": "streams",
+    "content": "content",
+    "announcements": "announcements",
+}
+# Cabeceras de la respuesta original que no se guardan
+_SKIPPED_HEADERS = {b"content-length", b"date", b"server", b"set-cookie"}
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+
+    def dumps(self) -> bytes:
+        return json.dumps(
+            {
+                "status": self.status,
+                "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers],
+                "body": base64.b64encode(self.body).decode(),
+                "etag": self.etag,
+            }
+        ).encode()
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedResponse":
+        raw = json.loads(data)
+        return cls(
+            status=raw["status"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in raw["headers"]],
+            body=base64.b64decode(raw["body"]),
+            etag=raw["etag"],
+        )
+
+
+class MemoryResponseStore:
+    shared = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, CachedResponse, tuple[str, ...]]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    async def generation(self, tag: str) -> int:
+        return self._generations.get(tag, 0)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, response, _ = item
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def set(self, key: str, response: CachedResponse, tags: tuple[str, ...], ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, response, tags)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_local(self, tags: frozenset[str]) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        for key in [k for k, (_, _, entry_tags) in self._entries.items() if tags.intersection(entry_tags)]:
+            del self._entries[key]
+
+    async def invalidate(self, tags: frozenset[str]) -> None:
+        self.invalidate_local(tags)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        self.clear()
+
+
+class RedisResponseStore:
+    """Entradas en claves con expiración; cada etiqueta es un set de claves"""
+
+    shared = True
+
+    def __init__(self, client: RespClient, prefix: str = "ekklesia:public-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def generation(self, tag: str) -> int:
+        return int(await self.client.execute("GET", f"{self.prefix}gen:{tag}") or 0)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        data = await self.client.execute("GET", f"{self.prefix}entry:{key}")
+        return CachedResponse.loads(data) if data is not None else None
+
+    async def set(self, key: str, response: CachedResponse, tags: tuple[str, ...], ttl: float) -> None:
+        ttl_ms = str(int(ttl * 1000))
+        entry_key = f"{self.prefix}entry:{key}"
+        await self.client.execute("SET", entry_key, response.dumps(), "PX", ttl_ms)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            await self.client.execute("SADD", tag_key, entry_key)
+            await self.client.execute("PEXPIRE", tag_key, ttl_ms)
+
+    async def invalidate(self, tags: frozenset[str]) -> None:
+        for tag in tags:
+            await self.client.execute("INCR", f"{self.prefix}gen:{tag}")
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = await self.client.execute("SMEMBERS", tag_key) or []
+            await self.client.execute("DEL", tag_key, *keys)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+@dataclass(slots=True)
+class _KeyLock:
+    lock: asyncio.Lock
+    # Peticiones que tienen o esperan el lock
+    users: int = 0
+
+
+class ResponseCache:
+    def __init__(self, store: MemoryResponseStore | RedisResponseStore):
+        self.store = store
+        self._locks: dict[str, _KeyLock] = {}
+        self._listener = None
+        if not store.shared:
+            self._listener = BroadcastListener(INVALIDATION_CHANNEL, self._apply_invalidation)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        if self._listener is not None:
+            await self._listener.start()
+        return await self.store.get(key)
+
+    async def generation(self, tag: str) -> int:
+        return await self.store.generation(tag)
+
+    async def set(self, key: str, response: CachedResponse, tags: tuple[str, ...]) -> None:
+        await self.store.set(key, response, tags, settings.public_cache_ttl_seconds)
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """
+        Un solo cálculo por clave a la vez en este worker (el resto espera el
+        resultado). Cada llamada debe ir seguida de release(key).
+        """
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = _KeyLock(asyncio.Lock())
+        entry.users += 1
+        return entry.lock
+
+    def release(self, key: str) -> None:
+        entry = self._locks.get(key)
+        if entry is None:
+            return
+        entry.users -= 1
+        # Solo se borra cuando nadie más lo tiene ni lo espera
+        if entry.users <= 0:
+            del self._locks[key]
+
+    async def invalidate(self, *tags: str) -> None:
+        try:
+            await self.store.invalidate(frozenset(tags))
+            if not self.store.shared:
+                # Los demás workers tienen su propia copia en memoria
+                await get_broadcast().publish(INVALIDATION_CHANNEL, json.dumps(list(tags)))
+        except Exception:
+            # La escritura ya se confirmó; en el peor caso la entrada expira por TTL
+            logger.exception("No se pudo invalidar la cache pública (%s)", ", ".join(tags))
+
+    def _apply_invalidation(self, message: str) -> None:
+        self.store.invalidate_local(frozenset(json.loads(message)))
+
+    async def aclose(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+        await self.store.aclose()
+
+
+def create_response_cache(url: str) -> ResponseCache:
+    scheme = urlsplit(url).scheme
+    if scheme == "memory":
+        return ResponseCache(MemoryResponseStore(settings.public_cache_max_entries))
+    if scheme == "redis":
+        return ResponseCache(RedisResponseStore(RespClient.from_url(url)))
+    raise ValueError(f"PUBLIC_CACHE_URL no soportada: {url}")
+
+
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = create_response_cache(settings.public_cache_url)
+    return _cache
+
+
+def set_response_cache(cache: ResponseCache | None) -> None:
+    """Reemplaza la cache (tests)"""
+    global _cache
+    _cache = cache
+
+
+async def close_response_cache() -> None:
+    global _cache
+    if _cache is not None:
+        await _cache.aclose()
+        _cache = None
+
+
+async def invalidate_public_cache(*tags: str) -> None:
+    """Llamar tras el commit de una escritura que cambia datos públicos"""
+    if settings.public_cache_ttl_seconds > 0:
+        await get_response_cache().invalidate(*(_tenant_tag(tag) for tag in tags))
+
+
+def _tenant_tag(tag: str) -> str:
+    return f"{current_tenant().slug}:{tag}"
+
+
+def _cache_key(scope: Scope) -> str:
+    query = sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+    return f"{current_tenant().slug}:{scope['path']}?{urlencode(query)}"
+
+
+class PublicCacheMiddleware:
+    """Sirve desde la cache los GET bajo `path_prefix` (salvo `exclude`)"""
+
+    def __init__(self, app: ASGIApp, path_prefix: str, exclude: tuple[str, ...] = ()):
+        self.app = app
+        self.path_prefix = path_prefix.rstrip("/") + "/"
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(self.path_prefix)
+            or scope["path"] in self.exclude
+            or settings.public_cache_ttl_seconds <= 0
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        cache = get_response_cache()
+        key = _cache_key(scope)
+        cached = await cache.get(key)
+        outcome = "HIT"
+        if cached is None:
+            segment = scope["path"][len(self.path_prefix):].split("/", 1)[0]
+            tag = _tenant_tag(PUBLIC_CACHE_TAGS.get(segment, segment))
+            lock = cache.lock(key)
+            try:
+                async with lock:
+                    cached = await cache.get(key)
+                    if cached is None:
+                        generation = await cache.generation(tag)
+                        cached = await self._render(scope, receive)
+                        outcome = "MISS" if cached.status == 200 else "BYPASS"
+                        # Si se invalidó mientras se generaba, la respuesta puede ser vieja
+                        if cached.status == 200 and await cache.generation(tag) == generation:
+                            await cache.set(key, cached, (tag,))
+            finally:
+                cache.release(key)
+        await self._send(scope, send, cached, outcome)
+
+    async def _render(self, scope: Scope, receive: Receive) -> CachedResponse:
+        status = 500
+        headers: list[tuple[bytes, bytes]] = []
+        body = bytearray()
+
+        async def capture(message: Message) -> None:
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in _SKIPPED_HEADERS]
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        data = bytes(body)
+        return CachedResponse(
+            status=status,
+            headers=headers,
+            body=data,
+            etag=strong_etag(hashlib.sha256(data).hexdigest()[:32]),
+        )
+
+    async def _send(self, scope: Scope, send: Send, response: CachedResponse, outcome: str) -> None:
+        headers = [
+            *response.headers,
+            (CACHE_HEADER.lower().encode(), outcome.encode()),
+        ]
+        status = response.status
+        body = response.body
+        if status == 200:
+            headers += [(b"etag", response.etag.encode()), (b"cache-control", b"public, no-cache")]
+            if is_not_modified(Headers(scope=scope), response.etag, None):
+                status, body = 304, b""
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,31 @@
+"""
+Respuestas JSON serializadas con orjson.
+
+ORJSONResponse es la clase de respuesta por defecto de la app: serializa en C
+y entiende date, datetime y UUID de forma nativa (Decimal sale como número,
+igual que con jsonable_encoder).
+
+Los modelos de pydantic no pasan por aquí: las rutas que ya los construyen
+validados los serializan con un TypeAdapter precalculado (como RowMapper en
+app/db/rows.py), de una sola vez y sin volver a Python por cada modelo.
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,272 @@
+"""
+Cliente mínimo para almacenamiento compatible con S3 (AWS, MinIO, R2...).
+
+Firma Signature V4 sobre httpx y usa URLs path-style (endpoint/bucket/key),
+que es lo que aceptan todos los compatibles. Solo cubre lo que necesita el
+almacén de documentos: objetos, subida multiparte, listado y URLs firmadas.
+"""
+import hashlib
+import hmac
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class S3Error(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"S3 {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _signing_key(secret_key: str, date_stamp: str, region: str, service: str) -> bytes:
+    key = _hmac(f"AWS4{secret_key}".encode(), date_stamp)
+    key = _hmac(key, region)
+    key = _hmac(key, service)
+    return _hmac(key, "aws4_request")
+
+
+def _encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _canonical_query(params: dict[str, str]) -> str:
+    encoded = sorted((_encode(k), _encode(str(v))) for k, v in params.items())
+    return "&".join(f"{k}={v}" for k, v in encoded)
+
+
+def _timestamps(now: datetime | None) -> tuple[str, str]:
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return now.strftime("%Y%m%dT%H%M%SZ"), now.strftime("%Y%m%d")
+
+
+def _signature(
+    *,
+    method: str,
+    url: str,
+    params: dict[str, str],
+    headers: dict[str, str],
+    payload_hash: str,
+    secret_key: str,
+    amz_date: str,
+    scope: str,
+) -> tuple[str, str]:
+    """Retorna (signed_headers, firma) para la petición canónica"""
+    parts = urlsplit(url)
+    canonical_headers = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    canonical_headers["host"] = parts.netloc
+    signed_headers = ";".join(sorted(canonical_headers))
+    canonical_request = "\n".join(
+        [
+            method,
+            _encode(parts.path or "/", safe="/-_.~"),
+            _canonical_query(params),
+            "".join(f"{k}:{canonical_headers[k]}\n" for k in sorted(canonical_headers)),
+            signed_headers,
+            payload_hash,
+        ]
+    )
+    string_to_sign = "\n".join(
+        [ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+    )
+    date_stamp, region, service, _ = scope.split("/")
+    key = _signing_key(secret_key, date_stamp, region, service)
+    return signed_headers, hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+
+def presign_url(
+    *,
+    method: str,
+    url: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires: int,
+    params: dict[str, str] | None = None,
+    service: str = "s3",
+    now: datetime | None = None,
+) -> str:
+    """URL firmada en la query (válida `expires` segundos, sin cabeceras extra)"""
+    amz_date, date_stamp = _timestamps(now)
+    scope = f"{date_stamp}/{region}/{service}/aws4_request"
+    query = {
+        **(params or {}),
+        "X-Amz-Algorithm": ALGORITHM,
+        "X-Amz-Credential": f"{access_key}/{scope}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": "host",
+    }
+    _, signature = _signature(
+        method=method,
+        url=url,
+        params=query,
+        headers={},
+        payload_hash=UNSIGNED_PAYLOAD,
+        secret_key=secret_key,
+        amz_date=amz_date,
+        scope=scope,
+    )
+    return f"{url}?{_canonical_query(query)}&X-Amz-Signature={signature}"
+
+
+class S3Client:
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        access_key: str,
+        secret_key: str,
+        bucket: str,
+        region: str = "us-east-1",
+        public_endpoint_url: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        # Host que ve el navegador (p. ej. detrás de un proxy); entra en la firma
+        self.public_endpoint_url = (public_endpoint_url or endpoint_url).rstrip("/")
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket = bucket
+        self.region = region
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(transport=self._transport, timeout=60)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def object_url(self, key: str, *, public: bool = False) -> str:
+        base = self.public_endpoint_url if public else self.endpoint_url
+        return f"{base}/{self.bucket}/{_encode(key, safe='/-_.~')}" if key else f"{base}/{self.bucket}"
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        *,
+        params: dict[str, str] | None = None,
+        content: bytes = b"",
+        headers: dict[str, str] | None = None,
+        ok: tuple[int, ...] = (200,),
+    ) -> httpx.Response:
+        url = self.object_url(key)
+        params = params or {}
+        payload_hash = hashlib.sha256(content).hexdigest()
+        amz_date, date_stamp = _timestamps(None)
+        scope = f"{date_stamp}/{self.region}/s3/aws4_request"
+        signed = {
+            **(headers or {}),
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+        }
+        signed_headers, signature = _signature(
+            method=method,
+            url=url,
+            params=params,
+            headers=signed,
+            payload_hash=payload_hash,
+            secret_key=self.secret_key,
+            amz_date=amz_date,
+            scope=scope,
+        )
+        signed["Authorization"] = (
+            f"{ALGORITHM} Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        query = _canonical_query(params)
+        response = await self._http().request(
+            method, f"{url}?{query}" if query else url, content=content, headers=signed
+        )
+        if response.status_code not in ok:
+            raise S3Error(response.status_code, response.text[:500])
+        return response
+
+    async def head_object(self, key: str) -> bool:
+        response = await self._request("HEAD", key, ok=(200, 404))
+        return response.status_code == 200
+
+    async def get_object(self, key: str) -> bytes:
+        return (await self._request("GET", key)).content
+
+    async def put_object(self, key: str, data: bytes, content_type: str) -> None:
+        await self._request("PUT", key, content=data, headers={"content-type": content_type})
+
+    async def touch_object(self, key: str, content_type: str) -> None:
+        """Copia el objeto sobre sí mismo para renovar su LastModified"""
+        await self._request(
+            "PUT",
+            key,
+            headers={
+                "content-type": content_type,
+                "x-amz-copy-source": f"/{self.bucket}/{_encode(key, safe='/-_.~')}",
+                "x-amz-metadata-directive": "REPLACE",
+            },
+        )
+
+    async def delete_object(self, key: str) -> None:
+        await self._request("DELETE", key, ok=(200, 204))
+
+    async def create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = await self._request(
+            "POST", key, params={"uploads": ""}, headers={"content-type": content_type}
+        )
+        return ET.fromstring(response.content).findtext(f"{S3_NS}UploadId")
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = await self._request(
+            "PUT", key, params={"partNumber": str(part_number), "uploadId": upload_id}, content=data
+        )
+        return response.headers["etag"]
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, etags: list[str]) -> None:
+        parts = "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+            for n, etag in enumerate(etags, start=1)
+        )
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+        await self._request("POST", key, params={"uploadId": upload_id}, content=body)
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        await self._request("DELETE", key, params={"uploadId": upload_id}, ok=(200, 204, 404))
+
+    async def list_objects(self, prefix: str) -> AsyncIterator[tuple[str, datetime]]:
+        """(key, LastModified) de los objetos bajo `prefix`, paginando ListObjectsV2"""
+        params = {"list-type": "2", "prefix": prefix}
+        while True:
+            response = await self._request("GET", "", params=params)
+            root = ET.fromstring(response.content)
+            for item in root.iter(f"{S3_NS}Contents"):
+                modified = item.findtext(f"{S3_NS}LastModified").replace("Z", "+00:00")
+                yield item.findtext(f"{S3_NS}Key"), datetime.fromisoformat(modified)
+            token = root.findtext(f"{S3_NS}NextContinuationToken")
+            if root.findtext(f"{S3_NS}IsTruncated") != "true" or not token:
+                return
+            params = {**params, "continuation-token": token}
+
+    def presigned_get_url(self, key: str, expires: int, params: dict[str, str] | None = None) -> str:
+        return presign_url(
+            method="GET",
+            url=self.object_url(key, public=True),
+            access_key=self.access_key,
+            secret_key=self.secret_key,
+            region=self.region,
+            expires=expires,
+            params=params,
+        )
@@ -0,0 +1,127 @@
+"""
+Server-Sent Events para visitantes anónimos (estado de transmisiones y anuncios).
+
+Los eventos se publican en el backend de difusión (canal "public"), así que
+llegan a los clientes de todos los workers. Cada worker guarda los últimos
+eventos en un buffer circular: un navegador que se reconecta con
+Last-Event-ID recibe lo que se perdió. Todos los workers reciben el canal en
+el mismo orden, así que el id sirve en cualquiera de ellos; si ya no está en
+el buffer se envía un evento "reset" para que el cliente recargue el estado.
+
+Cada evento lleva la iglesia de la petición que lo publicó (app.core.tenant)
+y solo llega a los visitantes de esa iglesia.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator
+
+from app.core.broadcast import BroadcastListener, get_broadcast
+from app.core.config import settings
+from app.core.tenant import current_tenant
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_CHANNEL = "public"
+# Espera de reconexión sugerida al navegador (ms)
+RETRY_MS = 5000
+
+
+def format_event(event_id: str | None, event: str, data: str) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class EventHub:
+    def __init__(self, channel: str = PUBLIC_CHANNEL):
+        self.channel = channel
+        # (id, iglesia, evento ya formateado) en orden de llegada
+        self._buffer: deque[tuple[str, str, str]] = deque(maxlen=settings.sse_replay_buffer_size)
+        # Cola de cada cliente -> iglesia
+        self._clients: dict[asyncio.Queue, str] = {}
+        self._listener = BroadcastListener(channel, self._deliver)
+
+    async def publish(self, event: str, payload: dict) -> None:
+        # Id ordenable y único entre workers; se asigna al publicar
+        event_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        message = json.dumps({
+            "id": event_id,
+            "event": event,
+            "tenant": current_tenant().slug,
+            "data": json.dumps(payload, default=str),
+        })
+        try:
+            await get_broadcast().publish(self.channel, message)
+        except Exception:
+            logger.exception("No se pudo publicar el evento público %s", event)
+
+    def _deliver(self, message: str) -> None:
+        data = json.loads(message)
+        tenant = data.get("tenant", "")
+        text = format_event(data["id"], data["event"], data["data"])
+        self._buffer.append((data["id"], tenant, text))
+        for queue, client_tenant in list(self._clients.items()):
+            if client_tenant != tenant:
+                continue
+            try:
+                queue.put_nowait(text)
+            except asyncio.QueueFull:
+                # Cliente lento: se le cierra el stream y al reconectar
+                # recupera lo perdido desde el buffer
+                self._clients.pop(queue, None)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def _missed(self, last_event_id: str, tenant: str) -> list[str] | None:
+        ids = [event_id for event_id, _, _ in self._buffer]
+        if last_event_id not in ids:
+            return None
+        return [
+            text
+            for _, event_tenant, text in list(self._buffer)[ids.index(last_event_id) + 1:]
+            if event_tenant == tenant
+        ]
+
+    async def stream(self, last_event_id: str | None = None) -> AsyncIterator[str]:
+        """Cuerpo text/event-stream de un cliente; termina si se queda atrás"""
+        tenant = current_tenant().slug
+        await self._listener.start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.sse_queue_size)
+        # Sin await entre el replay y el registro: ningún evento se pierde ni se duplica
+        missed = self._missed(last_event_id, tenant) if last_event_id else []
+        self._clients[queue] = tenant
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if missed is None:
+                yield format_event(None, "reset", "{}")
+            else:
+                for text in missed:
+                    yield text
+            while True:
+                try:
+                    text = await asyncio.wait_for(queue.get(), settings.sse_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ": ping\n\n"
+                    continue
+                if text is None:
+                    return
+                yield text
+        finally:
+            self._clients.pop(queue, None)
+
+    async def close(self):
+        await self._listener.close()
+        for queue in list(self._clients):
+            self._clients.pop(queue, None)
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+public_events = EventHub()
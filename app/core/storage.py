@@ -1,14 +1,29 @@
+import asyncio
 import os
+import time
 import uuid
 import hashlib
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import BinaryIO
+from typing import Iterator
+from urllib.parse import quote
+
+import aiofiles
+from fastapi import UploadFile
 
 from app.core.config import settings
+from app.core.s3 import S3Client
 
 
 ALLOWED_MIME = {"application/pdf", "image/png", "image/jpeg"}
 
+# Los archivos se guardan por contenido: blobs/ab/cd/<sha256>, en disco local o
+# en un bucket S3 según STORAGE_BACKEND. Varios Document pueden apuntar al mismo
+# blob; los huérfanos los elimina scripts/collect_orphan_blobs.py.
+BLOBS_DIR = "blobs"
+TMP_DIR = "tmp"
+S3_SCHEME = "s3://"
+
 
 def ensure_storage_dir() -> Path:
     path = Path(settings.storage_path)
@@ -16,30 +31,277 @@ def ensure_storage_dir() -> Path:
     return path
 
 
-def save_file(file_obj: BinaryIO, filename: str, mime_type: str, max_size_bytes: int) -> tuple[str, int, str]:
+def blob_key(checksum: str) -> str:
+    return f"{BLOBS_DIR}/{checksum[:2]}/{checksum[2:4]}/{checksum}"
+
+
+def blob_path(checksum: str) -> Path:
+    return Path(settings.storage_path) / blob_key(checksum)
+
+
+# Tamaño de lectura según el archivo: ~16 lecturas, entre 64 KiB y 1 MiB
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+def chunk_size_for(size: int | None) -> int:
+    if not size:
+        return DEFAULT_CHUNK_SIZE
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, size // 16))
+
+
+def _new_tmp_path() -> Path:
+    tmp_dir = ensure_storage_dir() / TMP_DIR
+    tmp_dir.mkdir(exist_ok=True)
+    return tmp_dir / uuid.uuid4().hex
+
+
+async def spool_upload(upload: UploadFile, mime_type: str, max_size_bytes: int) -> tuple[Path, int, str]:
+    """
+    Copia la subida a un temporal del almacén y retorna (temporal, tamaño, sha256).
+
+    Todo el I/O va fuera del event loop: UploadFile.read usa el threadpool si
+    el archivo ya está en disco y la escritura usa aiofiles. El sha256 se
+    calcula en la misma pasada. El llamador debe borrar el temporal.
+    """
     if mime_type not in ALLOWED_MIME:
         raise ValueError("Tipo de archivo no permitido")
+    if upload.size is not None and upload.size > max_size_bytes:
+        raise ValueError("Archivo excede el tamaño máximo permitido")
 
-    storage_dir = ensure_storage_dir()
-    token = uuid.uuid4().hex
-    stored_name = f"{token}_{filename}"
-    stored_path = storage_dir / stored_name
-
+    tmp_path = await asyncio.to_thread(_new_tmp_path)
+    chunk_size = chunk_size_for(upload.size)
     hasher = hashlib.sha256()
     size = 0
 
-    with open(stored_path, "wb") as dest:
-        chunk = file_obj.read(8192)
-        while chunk:
-            size += len(chunk)
-            if size > max_size_bytes:
-                dest.close()
-                stored_path.unlink(missing_ok=True)
-                raise ValueError("Archivo excede el tamaño máximo permitido")
-            hasher.update(chunk)
-            dest.write(chunk)
-            chunk = file_obj.read(8192)
-
-    checksum = hasher.hexdigest()
-    return str(stored_path), size, checksum
+    try:
+        async with aiofiles.open(tmp_path, "wb") as dest:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_size_bytes:
+                    raise ValueError("Archivo excede el tamaño máximo permitido")
+                hasher.update(chunk)
+                await dest.write(chunk)
+    except BaseException:
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        raise
+
+    return tmp_path, size, hasher.hexdigest()
+
+
+def _commit_blob(tmp_path: Path, checksum: str) -> Path:
+    stored_path = blob_path(checksum)
+    if stored_path.exists():
+        # Renovar mtime: el GC respeta un margen para blobs recién referenciados
+        os.utime(stored_path)
+        return stored_path
+    stored_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp_path, stored_path)
+    return stored_path
+
+
+def iter_blobs() -> Iterator[Path]:
+    root = Path(settings.storage_path) / BLOBS_DIR
+    if not root.exists():
+        return
+    for path in root.glob("*/*/*"):
+        if path.is_file():
+            yield path
+
+
+def collect_orphan_blobs(referenced: set[str], grace_seconds: int = 3600, dry_run: bool = False) -> list[Path]:
+    """
+    Elimina blobs sin ningún Document que los referencie.
+
+    `referenced` son los stored_path vigentes. Los blobs modificados hace menos
+    de `grace_seconds` se conservan: pueden pertenecer a una subida cuyo
+    Document aún no se ha confirmado.
+    """
+    referenced_resolved = {str(Path(p).resolve()) for p in referenced}
+    cutoff = time.time() - grace_seconds
+    removed = []
+    for path in iter_blobs():
+        if str(path.resolve()) in referenced_resolved:
+            continue
+        if path.stat().st_mtime > cutoff:
+            continue
+        if not dry_run:
+            path.unlink(missing_ok=True)
+        removed.append(path)
+    return removed
+
+
+async def iter_file_range(path: Path, start: int, end: int, chunk_size: int = MAX_CHUNK_SIZE):
+    """Bytes [start, end] del archivo, leídos con aiofiles"""
+    remaining = end - start + 1
+    async with aiofiles.open(path, "rb") as src:
+        await src.seek(start)
+        while remaining > 0:
+            chunk = await src.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class LocalStorage:
+    """Blobs en STORAGE_PATH; la API sirve los archivos"""
+
+    async def save(self, upload: UploadFile, mime_type: str, max_size_bytes: int) -> tuple[str, int, str]:
+        tmp_path, size, checksum = await spool_upload(upload, mime_type, max_size_bytes)
+        try:
+            stored_path = await asyncio.to_thread(_commit_blob, tmp_path, checksum)
+        finally:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        return str(stored_path), size, checksum
+
+    async def read_bytes(self, stored_path: str) -> bytes:
+        async with aiofiles.open(stored_path, "rb") as src:
+            return await src.read()
+
+    def download_url(self, doc) -> str | None:
+        return None
+
+    async def collect_orphans(self, referenced: set[str], grace_seconds: int, dry_run: bool) -> list[str]:
+        removed = await asyncio.to_thread(collect_orphan_blobs, referenced, grace_seconds, dry_run)
+        return [str(path) for path in removed]
+
+    async def aclose(self) -> None:
+        pass
+
+
+class S3Storage:
+    """
+    Blobs en un bucket compatible con S3.
+
+    stored_path queda como s3://bucket/blobs/ab/cd/<sha256>. Las descargas
+    redirigen a una URL firmada de corta duración: los bytes no pasan por la
+    API. Los archivos mayores que `multipart_threshold` se suben por partes.
+    """
+
+    def __init__(self, client: S3Client, *, multipart_threshold: int, part_size: int, presign_expires: int):
+        self.client = client
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.presign_expires = presign_expires
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        if not (settings.s3_endpoint_url and settings.s3_bucket):
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere S3_ENDPOINT_URL y S3_BUCKET")
+        client = S3Client(
+            endpoint_url=settings.s3_endpoint_url,
+            access_key=settings.s3_access_key or "",
+            secret_key=settings.s3_secret_key or "",
+            bucket=settings.s3_bucket,
+            region=settings.s3_region,
+            public_endpoint_url=settings.s3_public_endpoint_url,
+        )
+        return cls(
+            client,
+            multipart_threshold=settings.s3_multipart_threshold_mb * 1024 * 1024,
+            part_size=settings.s3_multipart_part_mb * 1024 * 1024,
+            presign_expires=settings.s3_presign_expires_seconds,
+        )
+
+    def _stored_path(self, key: str) -> str:
+        return f"{S3_SCHEME}{self.client.bucket}/{key}"
+
+    def _key(self, stored_path: str) -> str | None:
+        prefix = f"{S3_SCHEME}{self.client.bucket}/"
+        return stored_path[len(prefix):] if stored_path.startswith(prefix) else None
+
+    async def save(self, upload: UploadFile, mime_type: str, max_size_bytes: int) -> tuple[str, int, str]:
+        tmp_path, size, checksum = await spool_upload(upload, mime_type, max_size_bytes)
+        key = blob_key(checksum)
+        try:
+            if not await self.client.head_object(key):
+                if size > self.multipart_threshold:
+                    await self._upload_multipart(tmp_path, key, mime_type)
+                else:
+                    async with aiofiles.open(tmp_path, "rb") as src:
+                        await self.client.put_object(key, await src.read(), mime_type)
+            else:
+                # Igual que os.utime en LocalStorage: el blob reutilizado vuelve a
+                # quedar dentro del período de gracia de collect_orphans
+                await self.client.touch_object(key, mime_type)
+        finally:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        return self._stored_path(key), size, checksum
+
+    async def _upload_multipart(self, tmp_path: Path, key: str, mime_type: str) -> None:
+        upload_id = await self.client.create_multipart_upload(key, mime_type)
+        try:
+            etags = []
+            async with aiofiles.open(tmp_path, "rb") as src:
+                while part := await src.read(self.part_size):
+                    etags.append(await self.client.upload_part(key, upload_id, len(etags) + 1, part))
+            await self.client.complete_multipart_upload(key, upload_id, etags)
+        except BaseException:
+            await self.client.abort_multipart_upload(key, upload_id)
+            raise
+
+    async def read_bytes(self, stored_path: str) -> bytes:
+        key = self._key(stored_path)
+        if key is None:
+            # Documento anterior al cambio de backend, todavía en disco local
+            async with aiofiles.open(stored_path, "rb") as src:
+                return await src.read()
+        return await self.client.get_object(key)
+
+    def download_url(self, doc) -> str | None:
+        key = self._key(doc.stored_path)
+        if key is None:
+            return None
+        return self.client.presigned_get_url(
+            key,
+            self.presign_expires,
+            {
+                "response-content-type": doc.mime_type,
+                "response-content-disposition": content_disposition(doc.file_name),
+            },
+        )
+
+    async def collect_orphans(self, referenced: set[str], grace_seconds: int, dry_run: bool) -> list[str]:
+        referenced_keys = {self._key(path) for path in referenced}
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+        removed = []
+        async for key, modified in self.client.list_objects(f"{BLOBS_DIR}/"):
+            if key in referenced_keys or modified > cutoff:
+                continue
+            if not dry_run:
+                await self.client.delete_object(key)
+            removed.append(self._stored_path(key))
+        return removed
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_storage: LocalStorage | S3Storage | None = None
+
+
+def get_storage() -> LocalStorage | S3Storage:
+    global _storage
+    if _storage is None:
+        _storage = S3Storage.from_settings() if settings.storage_backend == "s3" else LocalStorage()
+    return _storage
+
+
+def set_storage(storage: LocalStorage | S3Storage | None) -> None:
+    """Reemplaza el backend (None vuelve a leerlo de settings)"""
+    global _storage
+    _storage = storage
+
 
+async def close_storage() -> None:
+    if _storage is not None:
+        await _storage.aclose()
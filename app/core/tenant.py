@@ -1,45 +1,89 @@
 """
-Utilidades de base de datos - Sistema de una sola iglesia
+Utilidades de base de datos por iglesia.
+
+Con MULTI_TENANT activo, TenantMiddleware (app.core.tenant_routing) resuelve
+la iglesia de cada petición por el Host y la deja en un ContextVar;
+get_tenant_db y require_tenant la usan. Sin iglesia resuelta (modo de una
+sola iglesia, o un host desconocido) se usa la base principal (DATABASE_URL).
 """
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
 from typing import Optional
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from app.core.config import settings
+from app.db import session as db_session
 
-# Cache de engines
-_engines: dict[str, any] = {}
-
-# Base de datos principal de la iglesia
+# Base de datos principal de la iglesia (su URL es DATABASE_URL)
 CHURCH_DB = "ekklesia"
 MASTER_DB = "ekklesia_master"
 
 
+@dataclass(frozen=True, slots=True)
+class TenantRoute:
+    """Iglesia a la que corresponde una petición"""
+    id: str
+    slug: str
+    name: str
+    db_name: str
+
+
+MAIN_TENANT = TenantRoute(id="1", slug="mi-iglesia", name="Mi Iglesia", db_name=CHURCH_DB)
+
+_current_tenant: ContextVar[TenantRoute | None] = ContextVar("current_tenant", default=None)
+
+
+def current_tenant() -> TenantRoute:
+    return _current_tenant.get() or MAIN_TENANT
+
+
+def set_current_tenant(tenant: TenantRoute | None) -> Token:
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token: Token) -> None:
+    _current_tenant.reset(token)
+
+
+def is_current_tenant(slug: str | None) -> bool:
+    """Si el claim "tenant" de un token es la iglesia de la petición.
+
+    Los tokens sin claim (emitidos antes de separar iglesias) son de la
+    iglesia principal.
+    """
+    return (slug or MAIN_TENANT.slug) == current_tenant().slug
+
+
 def get_db_url(db_name: str) -> str:
     """Construye la URL de conexión para una base de datos"""
     # Para la base de datos master usamos el host db_master
     if db_name == MASTER_DB:
         return f"postgresql+asyncpg://ekklesia:ekklesia@db_master:5432/{db_name}"
-    
-    # Para las demás, usamos el host db
-    base_url = str(settings.database_url)
-    parts = base_url.rsplit("/", 1)
-    return f"{parts[0]}/{db_name}"
+
+    # La base principal es DATABASE_URL tal cual (puede tener otro nombre)
+    if db_name == CHURCH_DB:
+        return str(settings.database_url)
+
+    # Las de los tenants, en el mismo servidor y con los mismos parámetros
+    url = make_url(str(settings.database_url)).set(database=db_name)
+    return url.render_as_string(hide_password=False)
+
+
+def _is_pinned(db_name: str) -> bool:
+    # La base principal y la master no se cierran; las de tenants quedan
+    # sujetas a los límites del registro (LRU, inactividad, presupuesto)
+    return db_name in (CHURCH_DB, MASTER_DB)
 
 
-async def get_engine(db_name: str):
-    """Obtiene o crea un engine para una base de datos"""
-    if db_name not in _engines:
-        db_url = get_db_url(db_name)
-        engine = create_async_engine(db_url, future=True, echo=False, pool_pre_ping=True)
-        _engines[db_name] = engine
-    return _engines[db_name]
+async def get_engine(db_name: str) -> AsyncEngine:
+    """Obtiene el engine compartido (registro de app.db.session) de una base de datos"""
+    return db_session.get_engine(get_db_url(db_name), pinned=_is_pinned(db_name))
 
 
 async def get_session(db_name: str) -> AsyncSession:
-    """Crea una sesión para una base de datos"""
-    engine = await get_engine(db_name)
-    session_factory = async_sessionmaker(engine, expire_on_commit=False)
-    return session_factory()
+    """Crea una sesión para una base de datos usando el sessionmaker cacheado"""
+    return db_session.get_sessionmaker(get_db_url(db_name), pinned=_is_pinned(db_name))()
 
 
 # Aliases para compatibilidad
@@ -50,10 +94,10 @@ get_tenant_session = get_session
 
 async def get_tenant_db():
     """
-    Dependencia de FastAPI para obtener sesión de BD de la iglesia.
-    Siempre usa la base de datos principal 'ekklesia'.
+    Dependencia de FastAPI para obtener sesión de BD de la iglesia de la
+    petición (la base principal 'ekklesia' si no hay una resuelta).
     """
-    session = await get_session(CHURCH_DB)
+    session = await get_session(current_tenant().db_name)
     try:
         yield session
     finally:
@@ -61,16 +105,11 @@ async def get_tenant_db():
 
 
 def require_tenant():
-    """Dependencia dummy para compatibilidad - siempre retorna la iglesia principal"""
-    return {
-        "id": "1",
-        "slug": "mi-iglesia",
-        "name": "Mi Iglesia",
-        "db_name": CHURCH_DB,
-    }
+    """Dependencia con la info de la iglesia de la petición"""
+    return asdict(current_tenant())
 
 
 def get_current_tenant() -> Optional[dict]:
-    """Retorna info de la iglesia principal"""
+    """Retorna info de la iglesia de la petición"""
     return require_tenant()
 
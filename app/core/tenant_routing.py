@@ -0,0 +1,191 @@
+"""
+Resolución de la iglesia de cada petición por el Host (MULTI_TENANT).
+
+La tabla de rutas (host -> iglesia) se carga de la base master y vive en
+memoria de cada worker, así que resolver una petición no consulta la master:
+
+- "<subdomain>.<TENANT_BASE_DOMAIN>" y custom_domain de cada tenant activo
+  apuntan a su base.
+- La tabla se recarga en segundo plano cuando vence TENANT_ROUTES_TTL_SECONDS
+  (mientras tanto se sigue usando la anterior) o al recibir un aviso por el
+  backend de difusión: notify_tenant_routes_changed() tras crear, activar o
+  editar un tenant.
+
+Un host que no es de ningún tenant usa la base principal, salvo con
+TENANT_FALLBACK_TO_MAIN=false, donde responde 404. Mientras la tabla no se
+pudo cargar nunca (p. ej. la master caída al arrancar) no se sabe qué hosts
+son desconocidos: se responde 503 en vez de servir la base principal.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import text
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.broadcast import BroadcastListener, get_broadcast
+from app.core.config import settings
+from app.core.tenant import MASTER_DB, TenantRoute, get_session, reset_current_tenant, set_current_tenant
+
+logger = logging.getLogger(__name__)
+
+ROUTES_CHANNEL = "tenant-routes"
+# Espera entre reintentos mientras la primera carga de la tabla falla
+ROUTES_RETRY_SECONDS = 5
+
+ROUTES_SQL = """
+    SELECT id, slug, name, db_name, subdomain, custom_domain
+    FROM tenants
+    WHERE is_active = TRUE
+"""
+
+
+def normalize_host(host: str) -> str:
+    """Host sin puerto, en minúsculas y sin el punto final"""
+    host = host.strip().lower()
+    if host.startswith("["):
+        # IPv6 literal: [::1]:8000
+        return host.split("]", 1)[0] + "]"
+    return host.rsplit(":", 1)[0].rstrip(".") if ":" in host else host.rstrip(".")
+
+
+class TenantRoutesUnavailable(Exception):
+    """La tabla de rutas todavía no se pudo cargar"""
+
+
+def build_routes(rows) -> dict[str, TenantRoute]:
+    routes: dict[str, TenantRoute] = {}
+    base_domain = (settings.tenant_base_domain or "").strip(".").lower()
+    for row in rows:
+        route = TenantRoute(id=str(row.id), slug=row.slug, name=row.name, db_name=row.db_name)
+        if row.subdomain and base_domain:
+            routes[normalize_host(f"{row.subdomain}.{base_domain}")] = route
+        if row.custom_domain:
+            routes[normalize_host(row.custom_domain)] = route
+    return routes
+
+
+class TenantRouter:
+    """Tabla host -> iglesia de este worker"""
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or (lambda: get_session(MASTER_DB))
+        self._routes: dict[str, TenantRoute] | None = None
+        self._loaded_at = 0.0
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refreshing: asyncio.Task | None = None
+        self._listener = BroadcastListener(ROUTES_CHANNEL, lambda _: self.invalidate())
+
+    async def resolve(self, host: str) -> TenantRoute | None:
+        routes = self._routes
+        if routes is None:
+            await self._listener.start()
+            # Primera carga: las peticiones esperan a una sola consulta
+            async with self._lock:
+                if self._routes is None and time.monotonic() >= self._retry_at:
+                    await self.refresh()
+            routes = self._routes
+            if routes is None:
+                raise TenantRoutesUnavailable()
+        elif time.monotonic() - self._loaded_at >= settings.tenant_routes_ttl_seconds:
+            self._schedule_refresh()
+        return routes.get(normalize_host(host))
+
+    async def refresh(self) -> None:
+        try:
+            session = await self.session_factory()
+            try:
+                rows = (await session.execute(text(ROUTES_SQL))).fetchall()
+            finally:
+                await session.close()
+        except Exception:
+            logger.exception("No se pudo cargar la tabla de rutas de tenants")
+            if self._routes is None:
+                # Sin tabla no se resuelve ningún host (503); se reintenta pronto
+                self._retry_at = time.monotonic() + ROUTES_RETRY_SECONDS
+            else:
+                # Se sigue usando la anterior hasta que vuelva a vencer el TTL
+                self._loaded_at = time.monotonic()
+            return
+        self._routes = build_routes(rows)
+        self._loaded_at = time.monotonic()
+        logger.info("Tabla de rutas de tenants cargada (%s hosts)", len(self._routes))
+
+    def invalidate(self) -> None:
+        self._loaded_at = 0.0
+        if self._routes is not None:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh())
+
+    async def aclose(self) -> None:
+        await self._listener.close()
+        if self._refreshing is not None:
+            self._refreshing.cancel()
+            try:
+                await self._refreshing
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._refreshing = None
+
+
+tenant_router = TenantRouter()
+
+
+async def notify_tenant_routes_changed() -> None:
+    """Llamar tras el commit de un cambio en tenants (dominios, activación)"""
+    try:
+        await get_broadcast().publish(ROUTES_CHANNEL, json.dumps({"changed": True}))
+    except Exception:
+        # En el peor caso la tabla se actualiza al vencer el TTL
+        logger.exception("No se pudo avisar el cambio de rutas de tenants")
+
+
+class TenantMiddleware:
+    """Deja la iglesia del Host en el contexto de la petición (ver app.core.tenant)"""
+
+    def __init__(self, app: ASGIApp, router: TenantRouter | None = None, exclude: tuple[str, ...] = ()):
+        self.app = app
+        self.router = router
+        self.exclude = exclude
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] not in ("http", "websocket")
+            or not settings.multi_tenant
+            or scope["path"].startswith(self.exclude)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        router = self.router or tenant_router
+        try:
+            tenant = await router.resolve(Headers(scope=scope).get("host", ""))
+        except TenantRoutesUnavailable:
+            await self._reject(scope, send, 503, 1013, "Servicio no disponible, reintente en unos segundos")
+            return
+        if tenant is None and not settings.tenant_fallback_to_main:
+            await self._reject(scope, send, 404, 4404, "Iglesia no encontrada")
+            return
+
+        token = set_current_tenant(tenant)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_current_tenant(token)
+
+    async def _reject(self, scope: Scope, send: Send, status: int, ws_code: int, detail: str) -> None:
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": ws_code})
+            return
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if status == 503:
+            headers.append((b"retry-after", str(ROUTES_RETRY_SECONDS).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
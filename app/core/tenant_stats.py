@@ -0,0 +1,206 @@
+"""
+Estadísticas de la plataforma agregadas de todas las bases de tenants.
+
+/superadmin/stats no consulta las bases de los tenants: lee la tabla
+tenant_stats de la base master (una fila por tenant), así que su costo no
+depende de cuántas iglesias haya y el resultado se cachea en memoria
+TENANT_STATS_CACHE_SECONDS.
+
+La tabla la completa TenantStatsCollector: cada TENANT_STATS_REFRESH_SECONDS
+consulta en paralelo (de a TENANT_STATS_CONCURRENCY, con un tiempo máximo por
+tenant) la base de cada tenant activo con una conexión de un solo uso: pasar
+por el registro de engines (app.db.session) marcaría a todos los tenants como
+usados y desalojaría los pools del tráfico real. Si un tenant no responde se
+conserva su último valor y se guarda el error; el dashboard lo muestra en
+stale_tenants. Con varios workers
+cada ronda la toma uno solo, que reclama la fila de tenant_stats_lease con un
+UPDATE condicional.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.tenant import MASTER_DB, get_db_url, get_session
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 500
+
+# Una sola ida a la base del tenant; las donaciones salen del agregado diario
+TENANT_STATS_SQL = """
+    SELECT
+        (SELECT COUNT(*) FROM users) AS total_users,
+        (SELECT COALESCE(SUM(total_amount), 0) FROM donation_daily_rollups) AS total_donations_amount
+"""
+
+UPSERT_STATS_SQL = """
+    INSERT INTO tenant_stats (tenant_id, total_users, total_donations_amount, refreshed_at, checked_at, error)
+    VALUES (:tenant_id, :total_users, :total_donations_amount, :checked_at, :checked_at, NULL)
+    ON CONFLICT (tenant_id) DO UPDATE SET
+        total_users = EXCLUDED.total_users,
+        total_donations_amount = EXCLUDED.total_donations_amount,
+        refreshed_at = EXCLUDED.refreshed_at,
+        checked_at = EXCLUDED.checked_at,
+        error = NULL
+"""
+
+# Un fallo no pisa los últimos valores conocidos
+UPSERT_ERROR_SQL = """
+    INSERT INTO tenant_stats (tenant_id, checked_at, error)
+    VALUES (:tenant_id, :checked_at, :error)
+    ON CONFLICT (tenant_id) DO UPDATE SET
+        checked_at = EXCLUDED.checked_at,
+        error = EXCLUDED.error
+"""
+
+# Reclama la ronda si el lease venció; RETURNING vacío = otro worker ya la tomó
+CLAIM_REFRESH_SQL = """
+    INSERT INTO tenant_stats_lease (id, claimed_until)
+    VALUES (1, :claimed_until)
+    ON CONFLICT (id) DO UPDATE SET claimed_until = EXCLUDED.claimed_until
+    WHERE tenant_stats_lease.claimed_until <= :now
+    RETURNING id
+"""
+
+PLATFORM_TOTALS_SQL = """
+    SELECT
+        COUNT(*) AS total_tenants,
+        COALESCE(SUM(CASE WHEN t.is_active THEN 1 ELSE 0 END), 0) AS active_tenants,
+        COALESCE(SUM(CASE WHEN t.is_active THEN s.total_users ELSE 0 END), 0) AS total_users,
+        COALESCE(SUM(CASE WHEN t.is_active THEN s.total_donations_amount ELSE 0 END), 0) AS total_donations_amount,
+        MIN(CASE WHEN t.is_active THEN s.refreshed_at END) AS stats_refreshed_at,
+        COALESCE(SUM(CASE WHEN t.is_active AND (s.tenant_id IS NULL OR s.error IS NOT NULL) THEN 1 ELSE 0 END), 0)
+            AS stale_tenants
+    FROM tenants t
+    LEFT JOIN tenant_stats s ON s.tenant_id = t.id
+"""
+
+
+async def collect_tenant_stats(db_name: str):
+    """Usuarios y total donado de la base `db_name` (fuera del registro de engines)"""
+    engine = create_async_engine(get_db_url(db_name), poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text(TENANT_STATS_SQL))).one()
+    finally:
+        await engine.dispose()
+
+
+class TenantStatsCollector:
+    """Mantiene tenant_stats y sirve los totales de la plataforma"""
+
+    def __init__(self, session_factory=None, collect=collect_tenant_stats):
+        self.session_factory = session_factory or (lambda: get_session(MASTER_DB))
+        self.collect = collect
+        self._cache: tuple[float, dict] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def totals(self, session) -> dict:
+        """Totales de la plataforma desde la tabla de snapshot (cacheados)"""
+        if self._cache is not None and time.monotonic() - self._cache[0] < settings.tenant_stats_cache_seconds:
+            return self._cache[1]
+        row = (await session.execute(text(PLATFORM_TOTALS_SQL))).one()
+        totals = dict(row._mapping)
+        self._cache = (time.monotonic(), totals)
+        return totals
+
+    def invalidate(self) -> None:
+        self._cache = None
+
+    async def refresh(self) -> dict[str, int]:
+        """Consulta todas las bases activas y actualiza tenant_stats"""
+        session = await self.session_factory()
+        try:
+            tenants = (
+                await session.execute(text("SELECT id, db_name FROM tenants WHERE is_active = TRUE"))
+            ).fetchall()
+        finally:
+            await session.close()
+
+        semaphore = asyncio.Semaphore(max(settings.tenant_stats_concurrency, 1))
+        results = await asyncio.gather(*(self._collect_one(semaphore, tenant) for tenant in tenants))
+
+        checked_at = datetime.now(timezone.utc)
+        collected, failed = [], []
+        for tenant, row, error in results:
+            if error is None:
+                collected.append({
+                    "tenant_id": tenant.id,
+                    "total_users": row.total_users,
+                    "total_donations_amount": row.total_donations_amount,
+                    "checked_at": checked_at,
+                })
+            else:
+                failed.append({"tenant_id": tenant.id, "error": error, "checked_at": checked_at})
+
+        session = await self.session_factory()
+        try:
+            if collected:
+                await session.execute(text(UPSERT_STATS_SQL), collected)
+            if failed:
+                await session.execute(text(UPSERT_ERROR_SQL), failed)
+            await session.commit()
+        finally:
+            await session.close()
+        self.invalidate()
+        return {"refreshed": len(collected), "failed": len(failed)}
+
+    async def _collect_one(self, semaphore: asyncio.Semaphore, tenant):
+        async with semaphore:
+            try:
+                row = await asyncio.wait_for(self.collect(tenant.db_name), settings.tenant_stats_timeout_seconds)
+                return tenant, row, None
+            except asyncio.TimeoutError:
+                error = f"Sin respuesta en {settings.tenant_stats_timeout_seconds} s"
+            except Exception as exc:
+                error = str(exc)[:MAX_ERROR_LENGTH] or type(exc).__name__
+            logger.warning("No se pudieron leer las estadísticas de %s: %s", tenant.db_name, error)
+            return tenant, None, error
+
+    async def _claim_refresh(self) -> bool:
+        """Reclama la próxima ronda; solo un worker por TENANT_STATS_REFRESH_SECONDS la obtiene"""
+        now = datetime.now(timezone.utc)
+        claimed_until = now + timedelta(seconds=settings.tenant_stats_refresh_seconds)
+        session = await self.session_factory()
+        try:
+            claimed = (
+                await session.execute(text(CLAIM_REFRESH_SQL), {"now": now, "claimed_until": claimed_until})
+            ).fetchone()
+            await session.commit()
+        finally:
+            await session.close()
+        return claimed is not None
+
+    def start(self) -> None:
+        if self._task is None and settings.tenant_stats_refresh_seconds > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if await self._claim_refresh():
+                    result = await self.refresh()
+                    logger.info("Estadísticas de tenants actualizadas: %s", result)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("No se pudieron actualizar las estadísticas de tenants")
+            await asyncio.sleep(settings.tenant_stats_refresh_seconds)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+
+tenant_stats = TenantStatsCollector()
@@ -0,0 +1,162 @@
+"""
+Miniaturas y variantes WebP de los documentos de imagen.
+
+Las derivadas se identifican por checksum, tamaño y formato: sirven para todos
+los documentos con el mismo contenido y nunca hay que invalidarlas. Se guardan
+en STORAGE_PATH/derivatives con un tope (DERIVATIVE_CACHE_MB); al superarlo se
+borran las usadas hace más tiempo (cada acierto renueva el mtime). El proceso
+lleva la cuenta de bytes escritos y solo recorre el directorio al pasar el tope.
+
+Pillow se importa al generar: sin él, las descargas con ?size= sirven el
+original.
+"""
+import asyncio
+import io
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MIME = {"image/png", "image/jpeg"}
+THUMBNAIL_SIZES = (64, 128, 256, 512, 1024)
+# Tamaños que se generan en segundo plano al subir una imagen
+PREGENERATED_SIZES = (128, 512)
+DERIVATIVES_DIR = "derivatives"
+
+_FORMATS = {
+    "image/webp": ("WEBP", "webp"),
+    "image/jpeg": ("JPEG", "jpg"),
+    "image/png": ("PNG", "png"),
+}
+
+# Bytes en cache por directorio de derivadas; se inicializa con el primer
+# recorrido y se corrige en cada _evict (otros procesos también escriben)
+_cache_bytes: dict[Path, int] = {}
+_cache_lock = threading.Lock()
+
+
+def size_bucket(size: int) -> int:
+    """Menor tamaño estándar que cubre `size` (así la cache no crece por cada píxel)"""
+    for bucket in THUMBNAIL_SIZES:
+        if size <= bucket:
+            return bucket
+    return THUMBNAIL_SIZES[-1]
+
+
+def derivative_mime(source_mime: str, accept: str | None) -> str:
+    return "image/webp" if accept and "image/webp" in accept else source_mime
+
+
+def derivative_extension(mime_type: str) -> str:
+    return _FORMATS[mime_type][1]
+
+
+def _root() -> Path:
+    return Path(settings.storage_path) / DERIVATIVES_DIR
+
+
+def derivative_path(checksum: str, size: int, mime_type: str) -> Path:
+    return _root() / checksum[:2] / f"{checksum}-{size}.{derivative_extension(mime_type)}"
+
+
+def render_derivative(data: bytes, size: int, mime_type: str) -> bytes:
+    """Redimensiona dentro de un cuadrado de `size` px y codifica en `mime_type`"""
+    from PIL import Image, ImageOps
+
+    image_format = _FORMATS[mime_type][0]
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((size, size))
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        if image_format == "PNG":
+            image.save(out, image_format, optimize=True)
+        else:
+            image.save(out, image_format, quality=80)
+    return out.getvalue()
+
+
+def _cached(path: Path) -> Path | None:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def _store(path: Path, data: bytes) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    try:
+        replaced = path.stat().st_size
+    except FileNotFoundError:
+        replaced = 0
+    os.replace(tmp_path, path)
+
+    max_bytes = settings.derivative_cache_mb * 1024 * 1024
+    root = _root()
+    with _cache_lock:
+        total = _cache_bytes.get(root)
+        if total is not None:
+            total = _cache_bytes[root] = total + len(data) - replaced
+        if total is None or total > max_bytes:
+            _evict(max_bytes)
+    return path
+
+
+def _evict(max_bytes: int) -> int:
+    """Borra las derivadas con mtime más antiguo hasta quedar bajo `max_bytes`.
+
+    Devuelve los bytes que quedan en cache.
+    """
+    entries = []
+    total = 0
+    for path in _root().glob("*/*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    if total > max_bytes:
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= max_bytes:
+                break
+    _cache_bytes[_root()] = total
+    return total
+
+
+async def get_derivative(checksum: str, stored_path: str, size: int, mime_type: str) -> Path | None:
+    """Ruta de la derivada (generándola si falta) o None si no se puede generar"""
+    path = derivative_path(checksum, size, mime_type)
+    cached = await asyncio.to_thread(_cached, path)
+    if cached is not None:
+        return cached
+
+    try:
+        data = await get_storage().read_bytes(stored_path)
+        rendered = await asyncio.to_thread(render_derivative, data, size, mime_type)
+    except ImportError:
+        logger.warning("Pillow no está instalado; se sirve la imagen original")
+        return None
+    except Exception:
+        logger.exception("No se pudo generar la derivada %s-%s", checksum, size)
+        return None
+    return await asyncio.to_thread(_store, path, rendered)
+
+
+async def pregenerate_derivatives(checksum: str, stored_path: str, mime_type: str) -> None:
+    """Tarea de fondo tras subir una imagen: tamaños comunes en WebP y formato original"""
+    for size in PREGENERATED_SIZES:
+        for target in ("image/webp", mime_type):
+            await get_derivative(checksum, stored_path, size, target)
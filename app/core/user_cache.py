@@ -0,0 +1,93 @@
+"""
+Cache en proceso de usuarios autenticados.
+
+Evita consultar la tabla users en cada request autenticado: guarda un
+principal inmutable por usuario activo durante un TTL corto. Los ids se
+repiten entre iglesias (cada una tiene su base), así que todo se indexa por
+(tenant, user_id). Cada usuario tiene una versión que se incrementa al
+invalidarlo; las entradas se indexan por (tenant, user_id, versión), así una
+carga que empezó antes de una invalidación nunca puede reinstalar datos viejos.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class UserPrincipal:
+    """Vista de solo lectura del usuario autenticado"""
+    id: int
+    email: str
+    full_name: str | None
+    role: str
+    is_active: bool
+    created_at: datetime | None = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+class UserCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int, int], tuple[float, UserPrincipal]] = OrderedDict()
+        self._versions: dict[tuple[str, int], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, tenant: str, user_id: int) -> int:
+        return self._versions.get((tenant, user_id), 0)
+
+    def get(self, tenant: str, user_id: int) -> UserPrincipal | None:
+        key = (tenant, user_id, self.version(tenant, user_id))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, tenant: str, principal: UserPrincipal, version: int) -> None:
+        """Guarda el principal bajo la versión leída antes de cargarlo"""
+        if self.ttl_seconds <= 0 or version != self.version(tenant, principal.id):
+            return
+        key = (tenant, principal.id, version)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tenant: str, user_id: int) -> None:
+        old_version = self.version(tenant, user_id)
+        self._versions[(tenant, user_id)] = old_version + 1
+        self._entries.pop((tenant, user_id, old_version), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.user_cache_ttl_seconds,
+    max_entries=settings.user_cache_max_entries,
+)
@@ -0,0 +1,66 @@
+"""
+Mapeo de filas de text() a schemas de respuesta, sin ORM ni doble validación.
+
+Las rutas de church_admin y public leen con SQL crudo. Un RowMapper se crea
+una vez por schema y precalcula:
+
+- la lista de columnas explícita (en el orden de los campos, con comillas
+  para nombres reservados como "values"), para SELECT/RETURNING en vez de *
+- el mapeo por posición de columna a campo, construyendo el modelo con
+  model_construct (los datos ya vienen tipados de la base); las columnas
+  JSON, que asyncpg entrega como texto en consultas text(), se decodifican
+- un serializador JSON, para responder sin que FastAPI vuelva a validar el
+  modelo contra response_model
+"""
+import json
+from typing import Generic, Iterable, Sequence, TypeVar, get_args
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _quote(identifier: str) -> str:
+    return f'"{identifier}"'
+
+
+def _is_json(annotation) -> bool:
+    """Campos dict/list (columnas JSON/JSONB en la base)"""
+    return any(getattr(arg, "__origin__", arg) in (dict, list) for arg in (annotation, *get_args(annotation)))
+
+
+class RowMapper(Generic[ModelT]):
+    def __init__(self, model: type[ModelT], table_alias: str | None = None):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self._fields_set = frozenset(self.fields)
+        self._json_fields = tuple(
+            name for name, field in model.model_fields.items() if _is_json(field.annotation)
+        )
+        prefix = f"{table_alias}." if table_alias else ""
+        # Lista para SELECT/RETURNING; las filas llegan en el orden de self.fields
+        self.columns = ", ".join(f"{prefix}{_quote(field)}" for field in self.fields)
+        self._list_adapter = TypeAdapter(list[model])
+
+    def one(self, row: Sequence) -> ModelT:
+        values = dict(zip(self.fields, row))
+        for name in self._json_fields:
+            if isinstance(values[name], str):
+                values[name] = json.loads(values[name])
+        return self.model.model_construct(set(self._fields_set), **values)
+
+    def all(self, rows: Iterable[Sequence]) -> list[ModelT]:
+        return [self.one(row) for row in rows]
+
+    def response(self, row: Sequence, status_code: int = 200) -> Response:
+        """Respuesta JSON de una fila"""
+        return Response(
+            self.one(row).model_dump_json(),
+            status_code=status_code,
+            media_type="application/json",
+        )
+
+    def list_response(self, rows: Iterable[Sequence]) -> Response:
+        """Respuesta JSON de varias filas, serializadas de una sola vez"""
+        return Response(self._list_adapter.dump_json(self.all(rows)), media_type="application/json")
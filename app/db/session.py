@@ -1,14 +1,248 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import (
+    DB_ENGINE_EVICTIONS,
+    DB_ENGINES,
+    DB_POOL_CONNECTIONS,
+    instrument_engine,
+    observe_pool_wait,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Registro único de engines y sessionmakers, indexado por URL de conexión.
+# Tanto get_session como app.core.tenant comparten este registro, de modo que
+# cada base de datos tiene un solo pool de conexiones por proceso.
+#
+# Los engines "pinned" (base principal y master) usan DB_POOL_SIZE y no se
+# cierran nunca. Los de las bases de tenants usan un pool chico
+# (DB_TENANT_POOL_SIZE) y el registro los cierra:
+# - por LRU, al pasar de DB_MAX_TENANT_ENGINES,
+# - por presupuesto, si la suma de los pools pasaría de DB_CONNECTION_BUDGET,
+# - por inactividad, tras DB_ENGINE_IDLE_SECONDS sin uso.
+# Un engine con sesiones abiertas no se cierra, aunque todavía no hayan pedido
+# una conexión (p. ej. una subida que guarda el archivo antes de la primera
+# consulta): cerrarlo haría que SQLAlchemy armara un pool nuevo fuera del
+# registro y del presupuesto.
+
+
+@dataclass(slots=True)
+class _Entry:
+    engine: AsyncEngine
+    pinned: bool
+    # Conexiones que puede llegar a abrir (pool_size + max_overflow)
+    capacity: int
+    last_used: float
+    sessionmaker: async_sessionmaker[AsyncSession] | None = None
+    # Sesiones creadas con su sessionmaker y todavía sin cerrar
+    sessions: int = 0
+
+
+class _RegistrySession(AsyncSession):
+    """Sesión que cuenta como uso de su engine hasta que se cierra"""
+
+    def __init__(self, *args, entry: _Entry, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._entry: _Entry | None = entry
+        entry.sessions += 1
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            if self._entry is not None:
+                self._entry.sessions -= 1
+                self._entry = None
+
+
+# Ordenado del usado hace más tiempo al más reciente
+_registry: OrderedDict[str, _Entry] = OrderedDict()
+_disposing: set[asyncio.Task] = set()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool que mide la espera por una conexión (incluye abrir una nueva)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            observe_pool_wait(time.perf_counter() - started)
+
+
+def _engine_options(db_url: str, pinned: bool = True) -> dict:
+    """Opciones de pool según Settings (solo aplican a drivers con pool de red)."""
+    url = make_url(db_url)
+    options: dict = {"future": True, "echo": False}
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size if pinned else settings.db_tenant_pool_size,
+        max_overflow=settings.db_max_overflow if pinned else settings.db_tenant_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+def _dispose(engine: AsyncEngine) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sin event loop no se pueden cerrar conexiones async: se sueltan
+        engine.sync_engine.dispose(close=False)
+        return
+    task = loop.create_task(engine.dispose())
+    _disposing.add(task)
+    task.add_done_callback(_disposing.discard)
+
 
+def _evict(db_url: str, reason: str) -> None:
+    entry = _registry.pop(db_url)
+    DB_ENGINE_EVICTIONS.inc(reason)
+    _dispose(entry.engine)
+    logger.debug("Engine de %s cerrado (%s)", entry.engine.url.database, reason)
 
-engine = create_async_engine(str(settings.database_url), future=True, echo=False)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+def _in_use(entry: _Entry) -> bool:
+    return entry.sessions > 0 or _checked_out(entry.engine) > 0
+
+
+def _evictable() -> list[str]:
+    """Engines de tenant sin uso en curso, del usado hace más tiempo al más reciente"""
+    return [url for url, entry in _registry.items() if not entry.pinned and not _in_use(entry)]
+
+
+def _make_room(capacity: int, pinned: bool) -> None:
+    """Cierra engines de tenant hasta que entre uno nuevo de `capacity` conexiones"""
+    candidates = _evictable()
+    if not pinned and settings.db_max_tenant_engines > 0:
+        tenants = sum(1 for entry in _registry.values() if not entry.pinned)
+        while tenants >= settings.db_max_tenant_engines and candidates:
+            _evict(candidates.pop(0), "lru")
+            tenants -= 1
+    if settings.db_connection_budget > 0:
+        used = sum(entry.capacity for entry in _registry.values())
+        while used + capacity > settings.db_connection_budget and candidates:
+            url = candidates.pop(0)
+            used -= _registry[url].capacity
+            _evict(url, "budget")
+        if used + capacity > settings.db_connection_budget:
+            logger.warning(
+                "DB_CONNECTION_BUDGET (%s) excedido: %s conexiones posibles con engines en uso",
+                settings.db_connection_budget,
+                used + capacity,
+            )
+
+
+def evict_idle_engines(now: float | None = None) -> int:
+    """Cierra los engines de tenant sin uso hace más de DB_ENGINE_IDLE_SECONDS."""
+    if settings.db_engine_idle_seconds <= 0:
+        return 0
+    cutoff = (now if now is not None else time.monotonic()) - settings.db_engine_idle_seconds
+    idle = []
+    for url, entry in _registry.items():
+        if entry.last_used > cutoff:
+            # El resto se usó más recientemente
+            break
+        if not entry.pinned and not _in_use(entry):
+            idle.append(url)
+    for url in idle:
+        _evict(url, "idle")
+    return len(idle)
+
+
+def get_engine(db_url: str, *, pinned: bool = False) -> AsyncEngine:
+    """Obtiene (o crea una sola vez) el engine para una URL de base de datos."""
+    now = time.monotonic()
+    entry = _registry.get(db_url)
+    if entry is None:
+        options = _engine_options(db_url, pinned)
+        capacity = options.get("pool_size", 0) + options.get("max_overflow", 0)
+        _make_room(capacity, pinned)
+        engine = create_async_engine(db_url, **options)
+        instrument_engine(engine.sync_engine)
+        entry = _registry[db_url] = _Entry(engine, pinned, capacity, now)
+    else:
+        entry.last_used = now
+        _registry.move_to_end(db_url)
+    evict_idle_engines(now)
+    return entry.engine
+
+
+def get_sessionmaker(db_url: str, *, pinned: bool = False) -> async_sessionmaker[AsyncSession]:
+    """Sessionmaker cacheado por base de datos (se construye una sola vez)."""
+    engine = get_engine(db_url, pinned=pinned)
+    entry = _registry[db_url]
+    if entry.sessionmaker is None:
+        entry.sessionmaker = async_sessionmaker(engine, class_=_RegistrySession, expire_on_commit=False, entry=entry)
+    return entry.sessionmaker
+
+
+async def reap_idle_engines() -> None:
+    """Revisa periódicamente los engines inactivos (aunque no lleguen peticiones)."""
+    if settings.db_engine_idle_seconds <= 0:
+        return
+    while True:
+        await asyncio.sleep(max(settings.db_engine_idle_seconds / 2, 1))
+        evict_idle_engines()
+
+
+async def dispose_engines() -> None:
+    """Cierra todos los pools (usado al apagar la aplicación)."""
+    entries = list(_registry.values())
+    _registry.clear()
+    for entry in entries:
+        await entry.engine.dispose()
+    if _disposing:
+        await asyncio.gather(*_disposing, return_exceptions=True)
+
+
+def _engine_counts() -> dict[tuple[str, ...], float]:
+    pinned = sum(1 for entry in _registry.values() if entry.pinned)
+    return {("pinned",): pinned, ("tenant",): len(_registry) - pinned}
+
+
+def _connection_counts() -> dict[tuple[str, ...], float]:
+    checked_out = idle = 0
+    for entry in _registry.values():
+        pool = entry.engine.pool
+        if hasattr(pool, "checkedout"):
+            checked_out += pool.checkedout()
+            idle += pool.checkedin()
+    return {("checked_out",): checked_out, ("idle",): idle}
+
+
+DB_ENGINES.set_function(_engine_counts)
+DB_POOL_CONNECTIONS.set_function(_connection_counts)
 
 
 async def get_session():
     """Dependencia de FastAPI para obtener una sesión async."""
-    async with AsyncSessionLocal() as session:
+    # Se resuelve en cada llamada: tras dispose_engines (fin de un lifespan)
+    # el registro vuelve a crear un único pool para la base principal
+    async with get_sessionmaker(str(settings.database_url), pinned=True)() as session:
         yield session
-
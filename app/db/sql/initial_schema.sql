@@ -63,6 +63,15 @@ CREATE INDEX IF NOT EXISTS idx_donations_event_id ON donations (event_id);
 CREATE INDEX IF NOT EXISTS idx_donations_type ON donations (donation_type);
 CREATE INDEX IF NOT EXISTS idx_donations_date ON donations (donation_date);
 
+CREATE TABLE IF NOT EXISTS donation_daily_rollups (
+    day DATE NOT NULL,
+    donation_type donation_type_enum NOT NULL,
+    payment_method payment_method_enum NOT NULL,
+    donation_count INTEGER NOT NULL DEFAULT 0,
+    total_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, donation_type, payment_method)
+);
+
 CREATE TABLE IF NOT EXISTS documents (
     id SERIAL PRIMARY KEY,
     donation_id INTEGER REFERENCES donations(id) ON DELETE SET NULL,
@@ -49,6 +49,59 @@ CREATE INDEX IF NOT EXISTS idx_tenants_slug ON tenants(slug);
 CREATE INDEX IF NOT EXISTS idx_tenants_subdomain ON tenants(subdomain);
 CREATE INDEX IF NOT EXISTS idx_tenants_is_active ON tenants(is_active);
 
+-- =====================================================
+-- TRABAJOS DE APROVISIONAMIENTO (creación de la base de cada tenant)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS provisioning_jobs (
+    id SERIAL PRIMARY KEY,
+    tenant_id UUID NOT NULL REFERENCES tenants(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_provisioning_jobs_status ON provisioning_jobs(status, id);
+CREATE INDEX IF NOT EXISTS idx_provisioning_jobs_tenant ON provisioning_jobs(tenant_id);
+
+-- =====================================================
+-- ESTADÍSTICAS POR TENANT (snapshot para /superadmin/stats)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS tenant_stats (
+    tenant_id UUID PRIMARY KEY REFERENCES tenants(id) ON DELETE CASCADE,
+    total_users INTEGER NOT NULL DEFAULT 0,
+    total_donations_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+    refreshed_at TIMESTAMPTZ,                        -- último valor leído
+    checked_at TIMESTAMPTZ NOT NULL,                 -- último intento
+    error TEXT
+);
+
+-- Una sola fila: hasta cuándo un worker tiene reclamada la ronda de estadísticas
+CREATE TABLE IF NOT EXISTS tenant_stats_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    claimed_until TIMESTAMPTZ NOT NULL
+);
+
+-- =====================================================
+-- CATÁLOGO DE BACKUPS (archivos en BACKUP_PATH)
+-- =====================================================
+CREATE TABLE IF NOT EXISTS backups (
+    id SERIAL PRIMARY KEY,
+    tenant_id UUID REFERENCES tenants(id) ON DELETE SET NULL,
+    filename VARCHAR(255) UNIQUE NOT NULL,
+    format VARCHAR(20) NOT NULL,                     -- custom, gzip, plain
+    source VARCHAR(20) NOT NULL DEFAULT 'pg_dump',   -- pg_dump, upload
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',   -- pending, running, done, failed
+    size_bytes BIGINT,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_backups_tenant_created ON backups(tenant_id, created_at DESC);
+
 -- =====================================================
 -- SUPER ADMINISTRADORES
 -- =====================================================
@@ -368,6 +368,16 @@ CREATE TABLE IF NOT EXISTS donation_summaries (
     UNIQUE(period_type, period_start, donation_type)
 );
 
+-- Agregado diario de donaciones (mantenido por la API al crear donaciones)
+CREATE TABLE IF NOT EXISTS donation_daily_rollups (
+    day DATE NOT NULL,
+    donation_type donation_type NOT NULL,
+    payment_method payment_method NOT NULL,
+    donation_count INTEGER NOT NULL DEFAULT 0,
+    total_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, donation_type, payment_method)
+);
+
 -- Carpetas para gastos (organización)
 CREATE TABLE IF NOT EXISTS expense_folders (
     id SERIAL PRIMARY KEY,
@@ -469,6 +479,14 @@ INSERT INTO donations (donor_name, donation_type, user_id, amount, payment_metho
 ('Lucía Gómez', 'especial', 7, 300000, 'transferencia', CURRENT_DATE - INTERVAL '2 days', 'Ofrenda especial navidad')
 ON CONFLICT DO NOTHING;
 
+-- Agregados de las donaciones de ejemplo
+INSERT INTO donation_daily_rollups (day, donation_type, payment_method, donation_count, total_amount)
+SELECT donation_date, donation_type, payment_method, COUNT(*), SUM(amount)
+FROM donations
+GROUP BY donation_date, donation_type, payment_method
+ON CONFLICT (day, donation_type, payment_method) DO UPDATE
+SET donation_count = EXCLUDED.donation_count, total_amount = EXCLUDED.total_amount;
+
 -- Gastos de ejemplo
 INSERT INTO expenses (description, amount, category_id, expense_date, status, vendor, created_by_id) VALUES
 ('Servicio de luz - Noviembre', 250000, 1, CURRENT_DATE - INTERVAL '10 days', 'paid', 'EPM', 1),
@@ -1,8 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router as api_router
+from app.api.routes.ws import manager as notifications
+from app.core.backups import backup_runner
+from app.core.broadcast import close_broadcast
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.middleware import UploadSizeLimitMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.provisioning import provisioning_queue
+from app.core.response_cache import CACHE_HEADER, PublicCacheMiddleware, close_response_cache
+from app.core.responses import ORJSONResponse
+from app.core.sse import public_events
+from app.core.security import password_hasher
+from app.core.storage import close_storage
+from app.core.tenant_routing import TenantMiddleware, tenant_router
+from app.core.tenant_stats import tenant_stats
+from app.db.session import dispose_engines, reap_idle_engines
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Retoma los trabajos de aprovisionamiento pendientes
+    provisioning_queue.start()
+    backup_runner.recover()
+    tenant_stats.start()
+    engine_reaper = asyncio.create_task(reap_idle_engines())
+    yield
+    # Cerrar los pools compartidos al apagar el worker
+    await provisioning_queue.close()
+    await backup_runner.close()
+    await tenant_stats.close()
+    await tenant_router.aclose()
+    engine_reaper.cancel()
+    await notifications.close()
+    await public_events.close()
+    await close_response_cache()
+    await close_broadcast()
+    await dispose_engines()
+    await close_storage()
+    password_hasher.shutdown()
 
 
 def create_application() -> FastAPI:
@@ -12,6 +53,25 @@ def create_application() -> FastAPI:
         description="Ekklesia - Sistema de Gestión Eclesiástica",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+
+    # Se agregan antes que CORS para quedar por dentro: sus respuestas
+    # (413, respuestas cacheadas) también llevan las cabeceras CORS
+    app.add_middleware(PublicCacheMiddleware, path_prefix="/api/public", exclude=("/api/public/updates",))
+    app.add_middleware(UploadSizeLimitMiddleware, path_prefixes=("/api/documents",))
+    # Por fuera de la cache pública: sus claves llevan la iglesia resuelta
+    app.add_middleware(
+        TenantMiddleware,
+        exclude=("/api/superadmin", "/api/health", "/api/metrics"),
+    )
+    # Por fuera de los anteriores para medir también las respuestas cacheadas
+    # y los 413; el stream SSE queda fuera porque dura lo que dura la conexión
+    app.add_middleware(
+        MetricsMiddleware,
+        router=app.router,
+        exclude=("/api/metrics", "/api/public/updates"),
     )
 
     # CORS - permitir todos los orígenes en desarrollo
@@ -21,6 +81,7 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, CACHE_HEADER],
     )
 
     app.include_router(api_router, prefix="/api")
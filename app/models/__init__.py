@@ -1,8 +1,8 @@
 from app.models.user import User
-from app.models.donation import Donation
+from app.models.donation import Donation, DonationDailyRollup
 from app.models.document import Document
 from app.models.event import Event
 from app.models.registration import Registration
 
-__all__ = ["User", "Donation", "Document", "Event", "Registration"]
+__all__ = ["User", "Donation", "DonationDailyRollup", "Document", "Event", "Registration"]
 
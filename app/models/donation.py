@@ -1,10 +1,11 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
 from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Integer,
     Numeric,
     String,
     Text,
@@ -51,3 +52,23 @@ class Donation(Base):
     def __repr__(self) -> str:
         return f"Donation(id={self.id}, type={self.donation_type}, amount={self.amount})"
 
+
+class DonationDailyRollup(Base):
+    """Agregado diario de donaciones, mantenido al crear cada donación"""
+    __tablename__ = "donation_daily_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    donation_type: Mapped[str] = mapped_column(
+        Enum(*DONATION_TYPES, name="donation_type", create_type=False), primary_key=True
+    )
+    payment_method: Mapped[str] = mapped_column(
+        Enum(*PAYMENT_METHODS, name="payment_method", create_type=False), primary_key=True
+    )
+    donation_count: Mapped[int] = mapped_column(Integer, default=0)
+    total_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"DonationDailyRollup(day={self.day}, type={self.donation_type}, "
+            f"method={self.payment_method}, count={self.donation_count})"
+        )
@@ -4,7 +4,7 @@ Modelos para la base de datos MASTER (gestión de tenants/iglesias)
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, func
+from sqlalchemy import BigInteger, Boolean, DateTime, ForeignKey, Integer, Numeric, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -34,6 +34,50 @@ class Tenant(Base):
         return f"Tenant(slug={self.slug}, name={self.name})"
 
 
+class ProvisioningJob(Base):
+    """Trabajo en cola que crea la base de datos de un tenant"""
+    __tablename__ = "provisioning_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    tenant_id: Mapped[str] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
+class TenantStats(Base):
+    """Snapshot de las estadísticas de la base de un tenant"""
+    __tablename__ = "tenant_stats"
+
+    tenant_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_donations_amount: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    refreshed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    checked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    error: Mapped[str | None] = mapped_column(Text)
+
+
+class Backup(Base):
+    """Backup de la base de un tenant (archivo en BACKUP_PATH)"""
+    __tablename__ = "backups"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    tenant_id: Mapped[str | None] = mapped_column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="SET NULL"))
+    filename: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    format: Mapped[str] = mapped_column(String(20), nullable=False)
+    source: Mapped[str] = mapped_column(String(20), nullable=False, default="pg_dump")
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")
+    size_bytes: Mapped[int | None] = mapped_column(BigInteger)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
 class SuperAdmin(Base):
     """Super administrador de la plataforma (tu cuenta)"""
     __tablename__ = "super_admins"
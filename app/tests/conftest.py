@@ -1,7 +1,26 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from app.core.response_cache import set_response_cache
+from app.core.user_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    # Cada test usa su propia BD en memoria y los ids de usuario se repiten
+    user_cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_public_cache():
+    # Las respuestas públicas cacheadas dependen de la BD de cada test
+    set_response_cache(None)
+    yield
+    set_response_cache(None)
@@ -3,9 +3,10 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.core.security import create_access_token, create_refresh_token
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +22,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -56,3 +57,17 @@ async def test_register_login_and_me(async_client: AsyncClient):
     assert me["email"] == payload["email"]
     assert me["role"] == "member"
 
+
+@pytest.mark.asyncio
+async def test_tokens_without_tenant_claim_still_work_on_the_main_church(async_client: AsyncClient):
+    payload = {"email": "viejo@example.com", "password": "Secret123!", "full_name": "Viejo"}
+    user = (await async_client.post("/api/auth/register", json=payload)).json()
+
+    # Tokens emitidos antes del claim "tenant"
+    access = create_access_token(str(user["id"]))
+    resp_me = await async_client.get("/api/users/me", headers={"Authorization": f"Bearer {access}"})
+    assert resp_me.status_code == 200
+
+    refresh = create_refresh_token(str(user["id"]))
+    resp_refresh = await async_client.post("/api/auth/refresh", json={"refresh_token": refresh})
+    assert resp_refresh.status_code == 200
@@ -0,0 +1,250 @@
+import gzip
+import io
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import superadmin
+from app.core import backups
+from app.core.backups import (
+    BACKUP_DONE,
+    BACKUP_FAILED,
+    BACKUP_PENDING,
+    FORMAT_CUSTOM,
+    FORMAT_GZIP,
+    BackupError,
+    BackupRunner,
+    is_valid_filename,
+    pg_dump_command,
+)
+from app.core.config import settings
+from app.main import create_application
+
+MASTER_TABLES = [
+    """
+    CREATE TABLE tenants (
+        id TEXT PRIMARY KEY,
+        slug TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        db_name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE backups (
+        id INTEGER PRIMARY KEY,
+        tenant_id TEXT REFERENCES tenants(id),
+        filename TEXT UNIQUE NOT NULL,
+        format TEXT NOT NULL,
+        source TEXT NOT NULL DEFAULT 'pg_dump',
+        status TEXT NOT NULL DEFAULT 'pending',
+        size_bytes INTEGER,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    """,
+    "INSERT INTO tenants (id, slug, name, db_name) VALUES ('t1', 'central', 'Central', 'ekk_central')",
+    "INSERT INTO tenants (id, slug, name, db_name, is_active) VALUES ('t2', 'norte', 'Norte', 'ekk_norte', 0)",
+]
+
+
+@pytest_asyncio.fixture
+async def master(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backup_path", str(tmp_path))
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        for ddl in MASTER_TABLES:
+            await conn.execute(text(ddl))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def session_factory():
+        return sessionmaker()
+
+    yield session_factory
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(master, monkeypatch):
+    started = []
+    monkeypatch.setattr(backups.backup_runner, "start", lambda *args: started.append(args))
+
+    async def override_master_session():
+        session = await master()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app = create_application()
+    app.dependency_overrides[superadmin.get_master_session] = override_master_session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http, started
+
+
+async def _rows(master, sql: str, params: dict | None = None):
+    session = await master()
+    try:
+        return (await session.execute(text(sql), params or {})).fetchall()
+    finally:
+        await session.close()
+
+
+@pytest.mark.asyncio
+async def test_create_backup_is_queued_and_listed(client):
+    http, started = client
+
+    response = await http.post("/api/superadmin/backups/t1")
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == BACKUP_PENDING
+    assert body["filename"].startswith("central_") and body["filename"].endswith(".dump")
+    assert started == [(body["id"], "ekk_central", body["filename"])]
+
+    assert (await http.post("/api/superadmin/backups/nope")).status_code == 404
+    # Solo los tenants activos
+    assert (await http.post("/api/superadmin/backups")).json()["message"] == "1 backups en curso"
+
+    listed = (await http.get("/api/superadmin/backups")).json()["backups"]
+    assert len(listed) == 2
+    assert {b["tenant_slug"] for b in listed} == {"central"}
+    # No se borra un backup en curso
+    assert (await http.delete(f"/api/superadmin/backups/{body['filename']}")).status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_upload_is_registered_and_deleted_with_its_file(client, tmp_path):
+    http, _ = client
+    files = {"file": ("manual.sql.gz", io.BytesIO(b"x" * 600_000), "application/gzip")}
+
+    response = await http.post("/api/superadmin/backups/upload-file", files=files)
+    assert response.status_code == 201
+    assert response.json()["size_bytes"] == 600_000
+    assert response.json()["format"] == FORMAT_GZIP
+    assert (tmp_path / "manual.sql.gz").stat().st_size == 600_000
+    assert not list(tmp_path.glob("*.partial"))
+
+    files = {"file": ("manual.sql.gz", io.BytesIO(b"y"), "application/gzip")}
+    assert (await http.post("/api/superadmin/backups/upload-file", files=files)).status_code == 409
+    files = {"file": ("../manual.txt", io.BytesIO(b"y"), "text/plain")}
+    assert (await http.post("/api/superadmin/backups/upload-file", files=files)).status_code == 400
+
+    assert (await http.get("/api/superadmin/backups/manual.sql.gz/download")).content == b"x" * 600_000
+    assert (await http.delete("/api/superadmin/backups/manual.sql.gz")).status_code == 200
+    assert not (tmp_path / "manual.sql.gz").exists()
+    assert (await http.get("/api/superadmin/backups")).json()["backups"] == []
+
+
+@pytest.mark.asyncio
+async def test_run_records_result_and_failure(master, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backup_retention_days", 0)
+
+    async def fake_dump(db_name, dest, fmt):
+        if db_name == "ekk_roto":
+            raise BackupError("pg_dump: conexión rechazada")
+        dest.write_bytes(b"PGDMP")
+        return 5
+
+    session = await master()
+    for backup_id, filename in ((1, "central_ok.dump"), (2, "central_falla.dump")):
+        await session.execute(
+            text("INSERT INTO backups (id, tenant_id, filename, format) VALUES (:id, 't1', :filename, 'custom')"),
+            {"id": backup_id, "filename": filename},
+        )
+    await session.commit()
+    await session.close()
+
+    runner = BackupRunner(session_factory=master, dump=fake_dump)
+    await runner.run(1, "ekk_central", "central_ok.dump")
+    await runner.run(2, "ekk_roto", "central_falla.dump")
+
+    rows = {row.id: row for row in await _rows(master, "SELECT id, status, size_bytes, error, finished_at FROM backups")}
+    assert rows[1].status == BACKUP_DONE
+    assert rows[1].size_bytes == 5
+    assert rows[1].finished_at is not None
+    assert (tmp_path / "central_ok.dump").read_bytes() == b"PGDMP"
+    assert rows[2].status == BACKUP_FAILED
+    assert rows[2].error == "pg_dump: conexión rechazada"
+
+
+@pytest.mark.asyncio
+async def test_retention_keeps_recent_and_minimum_per_tenant(master, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "backup_retention_days", 7)
+    monkeypatch.setattr(settings, "backup_keep_min", 2)
+    now = datetime.utcnow()
+    entries = [
+        ("central_1.dump", "t1", "pg_dump", 30),
+        ("central_2.dump", "t1", "pg_dump", 20),
+        ("central_3.dump", "t1", "pg_dump", 10),
+        ("central_4.dump", "t1", "pg_dump", 1),
+        ("norte_1.dump", "t2", "pg_dump", 40),
+        ("subido.sql", None, "upload", 90),
+    ]
+    session = await master()
+    for filename, tenant_id, source, days in entries:
+        (tmp_path / filename).write_bytes(b"x")
+        await session.execute(
+            text("""
+                INSERT INTO backups (tenant_id, filename, format, source, status, created_at)
+                VALUES (:tenant_id, :filename, 'custom', :source, 'done', :created_at)
+            """),
+            {"tenant_id": tenant_id, "filename": filename, "source": source, "created_at": now - timedelta(days=days)},
+        )
+    await session.commit()
+    await session.close()
+
+    removed = await BackupRunner(session_factory=master).apply_retention()
+
+    # central_4 es reciente; central_3 se conserva por BACKUP_KEEP_MIN; norte es
+    # su único backup y los subidos a mano no vencen
+    assert sorted(removed) == ["central_1.dump", "central_2.dump"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "central_3.dump", "central_4.dump", "norte_1.dump", "subido.sql"
+    ]
+    assert len(await _rows(master, "SELECT id FROM backups")) == 4
+
+
+@pytest.mark.asyncio
+async def test_dump_database_streams_gzip_output(tmp_path, monkeypatch):
+    script = "import sys; [sys.stdout.write('INSERT INTO t VALUES (%d);\\n' % i) for i in range(50000)]"
+    monkeypatch.setattr(
+        backups, "pg_dump_command", lambda db_url, fmt: ([sys.executable, "-c", script], {})
+    )
+    dest = tmp_path / "central.sql.gz"
+
+    size = await backups.dump_database("ekk_central", dest, FORMAT_GZIP)
+
+    assert size == dest.stat().st_size
+    assert gzip.decompress(dest.read_bytes()).decode().splitlines()[-1] == "INSERT INTO t VALUES (49999);"
+
+    monkeypatch.setattr(
+        backups, "pg_dump_command", lambda db_url, fmt: ([sys.executable, "-c", "import sys; sys.exit('falla')"], {})
+    )
+    with pytest.raises(BackupError, match="falla"):
+        await backups.dump_database("ekk_central", tmp_path / "otro.sql.gz", FORMAT_GZIP)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["central.sql.gz"]
+
+
+def test_pg_dump_command_uses_database_url():
+    cmd, env = pg_dump_command("postgresql+asyncpg://ekk:secreto@db:5433/ekk_central", FORMAT_CUSTOM)
+    assert cmd[:3] == ["pg_dump", "--no-owner", "-h"]
+    assert cmd[cmd.index("-h") + 1] == "db"
+    assert cmd[cmd.index("-p") + 1] == "5433"
+    assert cmd[cmd.index("-U") + 1] == "ekk"
+    assert "--format=custom" in cmd
+    assert cmd[-2:] == ["-d", "ekk_central"]
+    assert env["PGPASSWORD"] == "secreto"
+    assert "secreto" not in " ".join(cmd)
+
+
+def test_backup_filenames_are_validated():
+    assert is_valid_filename("central_20240101_000000_abc123.dump")
+    assert is_valid_filename("manual.sql.gz")
+    assert not is_valid_filename("../etc/passwd.sql")
+    assert not is_valid_filename("notas.txt")
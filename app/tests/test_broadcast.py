@@ -0,0 +1,240 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+
+from app.api.routes.ws import CLOSE_TRY_AGAIN_LATER, ConnectionManager
+from app.core import broadcast as broadcast_module
+from app.core.config import settings
+from app.core.broadcast import MemoryBroadcast, RedisBroadcast, set_broadcast
+from app.core.resp import read_reply
+from app.core.tenant import TenantRoute, reset_current_tenant, set_current_tenant
+
+
+class FakeRedis:
+    """Servidor mínimo con protocolo Redis: SUBSCRIBE, UNSUBSCRIBE y PUBLISH"""
+
+    def __init__(self):
+        self.subscribers: dict[str, set[asyncio.StreamWriter]] = {}
+        self.connections: list[asyncio.StreamWriter] = []
+        self.server: asyncio.Server | None = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for writer in self.connections:
+            writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop_connections(self):
+        for writer in self.connections:
+            writer.close()
+        self.connections.clear()
+        self.subscribers.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections.append(writer)
+        try:
+            while True:
+                command = [part.decode() for part in await read_reply(reader)]
+                name, args = command[0].upper(), command[1:]
+                if name == "SUBSCRIBE":
+                    for n, channel in enumerate(args, start=1):
+                        self.subscribers.setdefault(channel, set()).add(writer)
+                        writer.write(b"*3\r\n" + _bulk("subscribe") + _bulk(channel) + f":{n}\r\n".encode())
+                elif name == "UNSUBSCRIBE":
+                    for channel in args:
+                        self.subscribers.get(channel, set()).discard(writer)
+                        writer.write(b"*3\r\n" + _bulk("unsubscribe") + _bulk(channel) + b":0\r\n")
+                elif name == "PUBLISH":
+                    channel, message = args
+                    receivers = self.subscribers.get(channel, set())
+                    for subscriber in receivers:
+                        subscriber.write(b"*3\r\n" + _bulk("message") + _bulk(channel) + _bulk(message))
+                    writer.write(f":{len(receivers)}\r\n".encode())
+                else:
+                    writer.write(f"-ERR unknown command '{name}'\r\n".encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _bulk(value: str) -> bytes:
+    data = value.encode()
+    return f"${len(data)}\r\n".encode() + data + b"\r\n"
+
+
+@pytest_asyncio.fixture
+async def fake_redis():
+    server = FakeRedis()
+    port = await server.start()
+    yield server, port
+    await server.stop()
+
+
+async def _collect(messages, count: int) -> list[str]:
+    received = []
+    async for message in messages:
+        received.append(message)
+        if len(received) == count:
+            return received
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_fans_out_to_every_worker_in_order(fake_redis):
+    _, port = fake_redis
+    workers = [RedisBroadcast.from_url(f"redis://127.0.0.1:{port}/0") for _ in range(2)]
+    try:
+        async with workers[0].subscribe("notifications") as first, workers[1].subscribe("notifications") as second:
+            for n in range(50):
+                await workers[n % 2].publish("notifications", f"evento {n}")
+            expected = [f"evento {n}" for n in range(50)]
+            results = await asyncio.wait_for(asyncio.gather(_collect(first, 50), _collect(second, 50)), 5)
+            assert results == [expected, expected]
+    finally:
+        for worker in workers:
+            await worker.aclose()
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_resubscribes_after_connection_loss(fake_redis, monkeypatch):
+    server, port = fake_redis
+    monkeypatch.setattr(broadcast_module, "RECONNECT_DELAY_SECONDS", 0.01)
+    worker = RedisBroadcast.from_url(f"redis://127.0.0.1:{port}")
+    try:
+        async with worker.subscribe("notifications") as messages:
+            server.drop_connections()
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if server.subscribers.get("notifications"):
+                    break
+            await worker.publish("notifications", "después del corte")
+            assert await asyncio.wait_for(_collect(messages, 1), 5) == ["después del corte"]
+    finally:
+        await worker.aclose()
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent: list[dict] = []
+        self.close_code: int | None = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(message))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+async def _wait_until(condition, timeout: float = 2):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def manager():
+    set_broadcast(MemoryBroadcast())
+    manager = ConnectionManager()
+    yield manager
+    await manager.close()
+    set_broadcast(None)
+
+
+@pytest.mark.asyncio
+async def test_manager_routes_by_topic_and_hides_admin_fields(manager):
+    member, admin, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(member, topics=["donations"])
+    await manager.connect(admin, is_admin=True, topics=["donations", "events"])
+    await manager.connect(other, topics=["events", "desconocido"])
+
+    await manager.broadcast(
+        "donations",
+        {"type": "donation.created", "donation_id": 1, "amount": 50.0},
+        admin_fields=("amount",),
+    )
+    await _wait_until(lambda: len(member.sent) == 2 and len(admin.sent) == 2)
+    await asyncio.sleep(0.05)
+
+    assert member.sent[1] == {"type": "donation.created", "donation_id": 1}
+    assert admin.sent[1] == {"type": "donation.created", "donation_id": 1, "amount": 50.0}
+    assert other.sent == [{"type": "welcome", "message": "Conectado a notificaciones", "topics": ["events"]}]
+
+
+@pytest.mark.asyncio
+async def test_manager_only_delivers_to_the_publishing_tenant(manager):
+    central = TenantRoute(id="t1", slug="central", name="Central", db_name="ekk_central")
+    norte = TenantRoute(id="t2", slug="norte", name="Norte", db_name="ekk_norte")
+    sockets = {}
+    for route in (central, norte):
+        token = set_current_tenant(route)
+        try:
+            sockets[route.slug] = FakeWebSocket()
+            await manager.connect(sockets[route.slug], is_admin=True, topics=["streams"])
+        finally:
+            reset_current_tenant(token)
+
+    token = set_current_tenant(norte)
+    try:
+        await manager.broadcast("streams", {"type": "stream.started", "stream_id": 7})
+    finally:
+        reset_current_tenant(token)
+    await _wait_until(lambda: len(sockets["norte"].sent) == 2)
+    await asyncio.sleep(0.05)
+
+    assert sockets["norte"].sent[1] == {"type": "stream.started", "stream_id": 7}
+    assert len(sockets["central"].sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_evicted_without_delaying_the_rest(manager, monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 4)
+    monkeypatch.setattr(settings, "ws_slow_consumer_policy", "disconnect")
+    fast = [FakeWebSocket() for _ in range(3)]
+    slow = FakeWebSocket(delay=60)
+    for websocket in [*fast, slow]:
+        await manager.connect(websocket, topics=["events"])
+
+    for n in range(10):
+        await manager.broadcast("events", {"type": "event.created", "event_id": n})
+        await asyncio.sleep(0.01)
+    await _wait_until(lambda: all(len(ws.sent) == 11 for ws in fast) and slow.close_code is not None)
+
+    assert all([p.get("event_id") for p in ws.sent[1:]] == list(range(10)) for ws in fast)
+    assert slow.close_code == CLOSE_TRY_AGAIN_LATER
+    assert slow not in manager.active
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_drops_messages_or_times_out(manager, monkeypatch):
+    monkeypatch.setattr(settings, "ws_send_queue_size", 2)
+    monkeypatch.setattr(settings, "ws_slow_consumer_policy", "drop")
+    monkeypatch.setattr(settings, "ws_send_timeout_seconds", 0.2)
+    lagging = FakeWebSocket(delay=0.05)
+    stuck = FakeWebSocket(delay=60)
+    await manager.connect(lagging, topics=["events"])
+    await manager.connect(stuck, topics=["events"])
+
+    for n in range(10):
+        await manager.broadcast("events", {"type": "event.created", "event_id": n})
+    await _wait_until(lambda: stuck.close_code is not None)
+    await asyncio.sleep(0.3)
+
+    # Con "drop" sigue conectado pero pierde lo que no cabía en la cola
+    assert lagging in manager.active
+    assert 1 < len(lagging.sent) < 11
+    # Un envío que supera el timeout lo desconecta igualmente
+    assert stuck.close_code == CLOSE_TRY_AGAIN_LATER
+    assert stuck not in manager.active
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import tenant
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db import session as db_session
+
+
+@pytest.mark.asyncio
+async def test_tenant_and_default_session_share_engine():
+    tenant_engine = await tenant.get_engine(tenant.CHURCH_DB)
+    assert tenant_engine is db_session.get_engine(str(settings.database_url), pinned=True)
+
+    sessions = db_session.get_session()
+    session = await anext(sessions)
+    assert session.bind is tenant_engine
+    await sessions.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_session_reuses_pool_after_dispose():
+    await db_session.dispose_engines()
+    sessions = db_session.get_session()
+    session = await anext(sessions)
+    # Un solo engine para la base principal aunque un lifespan anterior cerró el registro
+    assert session.bind is await tenant.get_engine(tenant.CHURCH_DB)
+    assert db_session._registry[str(settings.database_url)].pinned
+    await sessions.aclose()
+
+
+def test_pool_settings_are_applied():
+    engine = db_session.get_engine(str(settings.database_url), pinned=True)
+    assert engine.pool.size() == settings.db_pool_size
+    assert engine.pool._max_overflow == settings.db_max_overflow
+    assert engine.pool._pre_ping is settings.db_pool_pre_ping
+
+
+@pytest.fixture
+def tenant_urls():
+    before = set(db_session._registry)
+    yield [f"postgresql+asyncpg://ekklesia:ekklesia@db:5432/ekk_test_{i}" for i in range(4)]
+    for url in set(db_session._registry) - before:
+        db_session._evict(url, "test")
+
+
+@pytest.mark.asyncio
+async def test_tenant_engines_use_small_pools_and_are_evicted_lru(tenant_urls, monkeypatch):
+    monkeypatch.setattr(settings, "db_max_tenant_engines", 2)
+    first, second, third = (db_session.get_engine(url) for url in tenant_urls[:3])
+    assert first.pool.size() == settings.db_tenant_pool_size
+    assert first.pool._max_overflow == settings.db_tenant_max_overflow
+
+    assert tenant_urls[0] not in db_session._registry
+    # Volver a usar un engine lo pasa al final de la cola
+    assert db_session.get_engine(tenant_urls[1]) is second
+    db_session.get_engine(tenant_urls[3])
+    assert set(db_session._registry) >= {tenant_urls[1], tenant_urls[3]}
+    assert tenant_urls[2] not in db_session._registry
+    # Los pinned no cuentan ni se cierran
+    assert str(settings.database_url) in db_session._registry
+    await asyncio.gather(*db_session._disposing)
+
+
+@pytest.mark.asyncio
+async def test_connection_budget_and_idle_eviction(tenant_urls, monkeypatch):
+    monkeypatch.setattr(settings, "db_max_tenant_engines", 0)
+    tenant_capacity = settings.db_tenant_pool_size + settings.db_tenant_max_overflow
+    pinned_capacity = sum(entry.capacity for entry in db_session._registry.values())
+    monkeypatch.setattr(settings, "db_connection_budget", pinned_capacity + 2 * tenant_capacity)
+    evictions = db_session.DB_ENGINE_EVICTIONS.value("budget")
+
+    for url in tenant_urls[:3]:
+        db_session.get_engine(url)
+    assert tenant_urls[0] not in db_session._registry
+    assert db_session.DB_ENGINE_EVICTIONS.value("budget") == evictions + 1
+
+    # Un engine con conexiones prestadas no se cierra por inactividad
+    busy = db_session._registry[tenant_urls[1]].engine
+    monkeypatch.setattr(db_session, "_checked_out", lambda engine: 1 if engine is busy else 0)
+    later = time.monotonic() + settings.db_engine_idle_seconds + 1
+    assert db_session.evict_idle_engines(later) == 1
+    assert tenant_urls[1] in db_session._registry
+    assert tenant_urls[2] not in db_session._registry
+    assert str(settings.database_url) in db_session._registry
+    await asyncio.gather(*db_session._disposing)
+
+
+@pytest.mark.asyncio
+async def test_engine_with_open_session_is_not_evicted(tenant_urls, monkeypatch):
+    monkeypatch.setattr(settings, "db_max_tenant_engines", 1)
+    # Sesión abierta que todavía no pidió conexión (p. ej. subiendo un archivo)
+    session = db_session.get_sessionmaker(tenant_urls[0])()
+    assert db_session._registry[tenant_urls[0]].sessions == 1
+
+    db_session.get_engine(tenant_urls[1])
+    later = time.monotonic() + settings.db_engine_idle_seconds + 1
+    db_session.evict_idle_engines(later)
+    assert tenant_urls[0] in db_session._registry
+
+    await session.close()
+    assert db_session._registry[tenant_urls[0]].sessions == 0
+    db_session.get_engine(tenant_urls[2])
+    assert tenant_urls[0] not in db_session._registry
+    await asyncio.gather(*db_session._disposing)
+
+
+def test_registry_publishes_engine_metrics(tenant_urls):
+    db_session.get_engine(tenant_urls[0])
+    output = registry.render()
+    assert 'db_engines{kind="pinned"}' in output
+    assert db_session.DB_ENGINES.values()[("tenant",)] >= 1
+    assert 'db_pool_connections{state="checked_out"} 0' in output
@@ -1,6 +1,7 @@
 import os
 import shutil
 import io
+from pathlib import Path
 
 import pytest
 import pytest_asyncio
@@ -9,7 +10,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 from app.core.config import settings
 
 
@@ -32,7 +33,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -69,3 +70,201 @@ async def test_upload_and_download_document(async_client: AsyncClient):
     assert resp_download.status_code == 200
     assert resp_download.content == file_content
 
+
+@pytest.mark.asyncio
+async def test_identical_uploads_share_one_blob_until_collected(async_client: AsyncClient):
+    from app.core.storage import blob_path, collect_orphan_blobs, iter_blobs
+
+    user_payload = {"email": "docuser@example.com", "password": "Secret123!", "full_name": "Doc User"}
+    await async_client.post("/api/auth/register", json=user_payload)
+    login = await async_client.post(
+        "/api/auth/login",
+        json={"email": user_payload["email"], "password": user_payload["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    content = b"recibo repetido"
+    uploaded = []
+    for name in ("recibo.pdf", "recibo (1).pdf"):
+        files = {"file": (name, io.BytesIO(content), "application/pdf")}
+        resp = await async_client.post("/api/documents", files=files, headers=headers)
+        assert resp.status_code == 201
+        uploaded.append(resp.json())
+
+    assert uploaded[0]["checksum"] == uploaded[1]["checksum"]
+    blobs = list(iter_blobs())
+    assert blobs == [blob_path(uploaded[0]["checksum"])]
+    assert not any((Path(settings.storage_path) / "tmp").iterdir())
+
+    # Mientras quede un documento, el blob sigue referenciado
+    assert (await async_client.delete(f"/api/documents/{uploaded[0]['id']}", headers=headers)).status_code == 204
+    resp_download = await async_client.get(f"/api/documents/{uploaded[1]['id']}", headers=headers)
+    assert resp_download.content == content
+    assert collect_orphan_blobs({str(blob_path(uploaded[1]["checksum"]))}, grace_seconds=0) == []
+
+    assert (await async_client.delete(f"/api/documents/{uploaded[1]['id']}", headers=headers)).status_code == 204
+    assert collect_orphan_blobs(set(), grace_seconds=0) == blobs
+    assert list(iter_blobs()) == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_is_rejected_before_parsing(async_client: AsyncClient, monkeypatch):
+    user_payload = {"email": "docuser@example.com", "password": "Secret123!", "full_name": "Doc User"}
+    await async_client.post("/api/auth/register", json=user_payload)
+    login = await async_client.post(
+        "/api/auth/login",
+        json={"email": user_payload["email"], "password": user_payload["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    monkeypatch.setattr(settings, "max_upload_mb", 1)
+
+    too_big = b"x" * (2 * 1024 * 1024)
+    files = {"file": ("grande.pdf", io.BytesIO(too_big), "application/pdf")}
+    resp = await async_client.post("/api/documents", files=files, headers=headers)
+    assert resp.status_code == 413
+
+    # Por encima del límite del archivo pero dentro del margen multipart: lo corta save_upload
+    just_over = b"x" * (1024 * 1024 + 1)
+    files = {"file": ("justo.pdf", io.BytesIO(just_over), "application/pdf")}
+    resp = await async_client.post("/api/documents", files=files, headers=headers)
+    assert resp.status_code == 400
+    # upload.size ya lo descarta: no se llega a crear ni el temporal
+    assert not (Path(settings.storage_path) / "tmp").exists()
+
+
+@pytest.mark.asyncio
+async def test_download_supports_etag_and_ranges(async_client: AsyncClient):
+    user_payload = {"email": "docuser@example.com", "password": "Secret123!", "full_name": "Doc User"}
+    await async_client.post("/api/auth/register", json=user_payload)
+    login = await async_client.post(
+        "/api/auth/login",
+        json={"email": user_payload["email"], "password": user_payload["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    content = b"0123456789abcdef"
+    files = {"file": ("boletin.pdf", io.BytesIO(content), "application/pdf")}
+    doc = (await async_client.post("/api/documents", files=files, headers=headers)).json()
+    url = f"/api/documents/{doc['id']}"
+
+    full = await async_client.get(url, headers=headers)
+    assert full.status_code == 200
+    assert full.headers["etag"] == f'"{doc["checksum"]}"'
+    assert full.headers["cache-control"].startswith("private, ")
+    assert full.headers["accept-ranges"] == "bytes"
+
+    not_modified = await async_client.get(url, headers={**headers, "If-None-Match": full.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    since = await async_client.get(url, headers={**headers, "If-Modified-Since": full.headers["last-modified"]})
+    assert since.status_code == 304
+
+    partial = await async_client.get(url, headers={**headers, "Range": "bytes=2-5"})
+    assert partial.status_code == 206
+    assert partial.content == b"2345"
+    assert partial.headers["content-range"] == f"bytes 2-5/{len(content)}"
+
+    suffix = await async_client.get(url, headers={**headers, "Range": "bytes=-3"})
+    assert suffix.content == b"def"
+
+    stale = await async_client.get(url, headers={**headers, "Range": "bytes=2-5", "If-Range": '"otro"'})
+    assert stale.status_code == 200
+    assert stale.content == content
+
+    beyond = await async_client.get(url, headers={**headers, "Range": "bytes=100-"})
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def _png_bytes(width: int, height: int) -> bytes:
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_image_thumbnails_are_generated_and_cached(async_client: AsyncClient):
+    from PIL import Image
+
+    from app.core import thumbnails
+
+    user_payload = {"email": "docuser@example.com", "password": "Secret123!", "full_name": "Doc User"}
+    await async_client.post("/api/auth/register", json=user_payload)
+    login = await async_client.post(
+        "/api/auth/login",
+        json={"email": user_payload["email"], "password": user_payload["password"]},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    files = {"file": ("logo.png", io.BytesIO(_png_bytes(1200, 600)), "image/png")}
+    data = {"is_public": "true"}
+    doc = (await async_client.post("/api/documents", files=files, data=data, headers=headers)).json()
+
+    # La tarea de fondo deja listos los tamaños comunes
+    for size in thumbnails.PREGENERATED_SIZES:
+        assert thumbnails.derivative_path(doc["checksum"], size, "image/webp").exists()
+
+    # Aunque sea público hace falta sesión
+    anonymous = await async_client.get(f"/api/documents/{doc['id']}?size=100")
+    assert anonymous.status_code == 401
+
+    # Redondeado al tamaño estándar y en WebP si se acepta
+    webp = await async_client.get(
+        f"/api/documents/{doc['id']}?size=100", headers={**headers, "Accept": "image/webp,*/*"}
+    )
+    assert webp.status_code == 200
+    assert webp.headers["content-type"] == "image/webp"
+    assert webp.headers["vary"] == "Accept"
+    assert Image.open(io.BytesIO(webp.content)).size == (128, 64)
+
+    png = await async_client.get(f"/api/documents/{doc['id']}?size=300", headers=headers)
+    assert png.headers["content-type"] == "image/png"
+    assert Image.open(io.BytesIO(png.content)).size == (512, 256)
+    assert png.headers["etag"] != webp.headers["etag"]
+
+    again = await async_client.get(
+        f"/api/documents/{doc['id']}?size=300", headers={**headers, "If-None-Match": png.headers["etag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_derivative_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    from app.core import thumbnails
+
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    paths = []
+    for i, checksum in enumerate(["aa" * 32, "bb" * 32, "cc" * 32]):
+        path = thumbnails.derivative_path(checksum, 128, "image/webp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(path)
+
+    # Un acierto renueva el mtime del más antiguo
+    assert thumbnails._cached(paths[0]) == paths[0]
+    thumbnails._evict(250)
+
+    assert paths[0].exists()
+    assert not paths[1].exists()
+    assert paths[2].exists()
+
+
+def test_derivative_store_scans_only_over_budget(tmp_path, monkeypatch):
+    from app.core import thumbnails
+
+    monkeypatch.setattr(settings, "storage_path", str(tmp_path))
+    monkeypatch.setattr(settings, "derivative_cache_mb", 1)
+    scans = []
+    evict = thumbnails._evict
+    monkeypatch.setattr(thumbnails, "_evict", lambda max_bytes: scans.append(max_bytes) or evict(max_bytes))
+
+    for checksum in ["aa" * 32, "bb" * 32, "cc" * 32]:
+        thumbnails._store(thumbnails.derivative_path(checksum, 128, "image/webp"), b"x" * 300_000)
+    # Solo el primer guardado recorre el directorio; los demás suman al total
+    assert len(scans) == 1
+
+    thumbnails._store(thumbnails.derivative_path("dd" * 32, 128, "image/webp"), b"x" * 300_000)
+    assert len(scans) == 2
+    assert thumbnails._cache_bytes[thumbnails._root()] <= 1024 * 1024
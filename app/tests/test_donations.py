@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +21,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -77,3 +77,69 @@ async def test_member_can_create_and_view_own_donations_but_not_list_all(async_c
     assert resp_list_admin.status_code == 200
     assert len(resp_list_admin.json()) == 1
 
+
+@pytest.mark.asyncio
+async def test_admin_donation_list_is_paginated_by_cursor(async_client: AsyncClient):
+    admin_payload = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await async_client.post("/api/auth/register", json=admin_payload)
+    login = await async_client.post(
+        "/api/auth/login", json={"email": admin_payload["email"], "password": admin_payload["password"]}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for i in range(5):
+        payload = {
+            "donor_name": f"Donante {i}",
+            "donation_type": "ofrenda",
+            "amount": "10.00",
+            "payment_method": "efectivo",
+            "donation_date": "2025-01-01",
+        }
+        await async_client.post("/api/donations", json=payload, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await async_client.get("/api/donations", params=params, headers=headers)
+        assert resp.status_code == 200
+        assert len(resp.json()) <= 2
+        seen.extend(d["id"] for d in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 5
+
+    resp_bad = await async_client.get("/api/donations", params={"cursor": "no-es-un-cursor"}, headers=headers)
+    assert resp_bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_admin_donation_list_filters_by_date_range(async_client: AsyncClient):
+    admin_payload = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await async_client.post("/api/auth/register", json=admin_payload)
+    login = await async_client.post(
+        "/api/auth/login", json={"email": admin_payload["email"], "password": admin_payload["password"]}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for day in ("2025-01-15", "2025-02-10", "2025-03-05"):
+        payload = {
+            "donor_name": f"Donante {day}",
+            "donation_type": "ofrenda",
+            "amount": "10.00",
+            "payment_method": "efectivo",
+            "donation_date": day,
+        }
+        await async_client.post("/api/donations", json=payload, headers=headers)
+
+    resp = await async_client.get(
+        "/api/donations", params={"start_date": "2025-02-01", "end_date": "2025-02-28"}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert [d["donation_date"] for d in resp.json()] == ["2025-02-10"]
+
+    resp_from = await async_client.get("/api/donations", params={"start_date": "2025-02-01"}, headers=headers)
+    assert [d["donation_date"] for d in resp_from.json()] == ["2025-02-10", "2025-03-05"]
@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +21,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
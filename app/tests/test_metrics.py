@@ -0,0 +1,111 @@
+import logging
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.metrics import (
+    REQUEST_DB_STATEMENTS,
+    REQUESTS,
+    UNMATCHED_ROUTE,
+    Counter,
+    Histogram,
+    Registry,
+    instrument_engine,
+)
+from app.db.base import Base
+from app.core.tenant import get_tenant_db
+from app.main import create_application
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    instrument_engine(engine.sync_engine)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async def override_get_session():
+        async with async_session() as session:
+            yield session
+
+    app = create_application()
+    app.dependency_overrides[get_tenant_db] = override_get_session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+    await engine.dispose()
+
+
+async def _admin_headers(client: AsyncClient) -> dict:
+    payload = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await client.post("/api/auth/register", json=payload)
+    login = await client.post("/api/auth/login", json={"email": payload["email"], "password": payload["password"]})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_requests_are_measured_per_route_with_sql_statements(async_client: AsyncClient):
+    headers = await _admin_headers(async_client)
+    before = REQUESTS.value("GET", "/api/events", "200")
+    statements_before = REQUEST_DB_STATEMENTS.sum("GET", "/api/events")
+
+    assert (await async_client.get("/api/events", headers=headers)).status_code == 200
+    assert (await async_client.get("/api/no-existe")).status_code == 404
+
+    assert REQUESTS.value("GET", "/api/events", "200") == before + 1
+    assert REQUEST_DB_STATEMENTS.sum("GET", "/api/events") > statements_before
+    assert REQUESTS.value("GET", UNMATCHED_ROUTE, "404") >= 1
+
+    response = await async_client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/api/events",status="200"}' in response.text
+    assert 'http_request_db_statements_bucket{method="GET",route="/api/events",le="+Inf"}' in response.text
+    assert "# TYPE db_pool_wait_seconds histogram" in response.text
+    # El propio endpoint de métricas no se mide
+    assert 'route="/api/metrics"' not in response.text
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_are_logged(async_client: AsyncClient, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_request_ms", 1e-6)
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        await async_client.get("/api/health")
+    assert any("Petición lenta: GET /api/health -> 200" in r.getMessage() for r in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_metrics_token_is_required_when_configured(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_token", "s3cret")
+    assert (await async_client.get("/api/metrics")).status_code == 401
+    assert (await async_client.get("/api/metrics", headers={"Authorization": "Bearer otro"})).status_code == 401
+    assert (await async_client.get("/api/metrics", headers={"Authorization": "Bearer s3cret"})).status_code == 200
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Trabajos", ("kind",)))
+    histogram = registry.register(Histogram("wait_seconds", "Espera", buckets=(0.1, 1)))
+    counter.inc("backup")
+    counter.inc("backup")
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Trabajos",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="backup"} 2',
+        "# HELP wait_seconds Espera",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{le="0.1"} 1',
+        'wait_seconds_bucket{le="1"} 2',
+        'wait_seconds_bucket{le="+Inf"} 3',
+        "wait_seconds_sum 3.6",
+        "wait_seconds_count 3",
+    ]
@@ -0,0 +1,192 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import superadmin
+from app.core import provisioning
+from app.core.provisioning import JOB_DONE, JOB_FAILED, JOB_PENDING, ProvisioningQueue, quote_ident
+from app.main import create_application
+
+MASTER_TABLES = [
+    """
+    CREATE TABLE tenants (
+        id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+        slug TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        subdomain TEXT,
+        custom_domain TEXT,
+        db_name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        plan_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE provisioning_jobs (
+        id INTEGER PRIMARY KEY,
+        tenant_id TEXT NOT NULL REFERENCES tenants(id),
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    """,
+]
+
+
+class FakeProvisioner:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.created: list[str] = []
+
+    async def create_database(self, db_name: str) -> str:
+        if self.fail:
+            raise RuntimeError("sin espacio en disco")
+        self.created.append(db_name)
+        return "spare"
+
+    async def aclose(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def master():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        for ddl in MASTER_TABLES:
+            await conn.execute(text(ddl))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def session_factory():
+        return sessionmaker()
+
+    yield session_factory
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(master, monkeypatch):
+    notified = []
+    monkeypatch.setattr(provisioning.provisioning_queue, "notify", lambda: notified.append(True))
+
+    async def override_master_session():
+        session = await master()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app = create_application()
+    app.dependency_overrides[superadmin.get_master_session] = override_master_session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http, notified
+
+
+@pytest.mark.asyncio
+async def test_create_tenant_enqueues_provisioning_job(master, client):
+    http, notified = client
+
+    response = await http.post("/api/superadmin/tenants", json={"name": "Iglesia Central", "slug": "central"})
+    assert response.status_code == 202
+    body = response.json()
+    assert body["tenant"]["db_name"] == "ekk_central"
+    # Inactivo hasta que el trabajo cree su base de datos
+    assert body["tenant"]["is_active"] is False
+    assert body["job"]["status"] == JOB_PENDING
+    assert notified == [True]
+
+    job = await http.get(f"/api/superadmin/provisioning-jobs/{body['job']['id']}")
+    assert job.status_code == 200
+    assert job.json()["tenant_id"] == body["tenant"]["id"]
+
+    assert (await http.get("/api/superadmin/provisioning-jobs/999")).status_code == 404
+    # Solo los trabajos fallidos se reintentan
+    retry = await http.post(f"/api/superadmin/provisioning-jobs/{body['job']['id']}/retry")
+    assert retry.status_code == 409
+
+    duplicate = await http.post("/api/superadmin/tenants", json={"name": "Otra", "slug": "central"})
+    assert duplicate.status_code == 409
+
+    # Sin base todavía no se puede crear su administrador
+    session = await master()
+    tenant_id = (await session.execute(text("SELECT id FROM tenants WHERE slug = 'central'"))).scalar()
+    await session.close()
+    admin = {"email": "admin@central.org", "password": "Secret123!", "full_name": "Admin"}
+    pending = await http.post(f"/api/superadmin/tenants/{tenant_id}/admins", json=admin)
+    assert pending.status_code == 409
+    assert pending.json()["detail"] == "Base de datos en aprovisionamiento"
+
+
+@pytest.mark.asyncio
+async def test_run_provisions_database_and_activates_tenant(master):
+    session = await master()
+    tenant_id = (await session.execute(text(
+        "INSERT INTO tenants (slug, name, db_name, is_active) VALUES ('norte', 'Norte', 'ekk_norte', 0) RETURNING id"
+    ))).scalar()
+    job_id = (await session.execute(
+        text("INSERT INTO provisioning_jobs (tenant_id, status, attempts) VALUES (:id, 'running', 1) RETURNING id"),
+        {"id": tenant_id},
+    )).scalar()
+    await session.commit()
+    await session.close()
+
+    fake = FakeProvisioner()
+    queue = ProvisioningQueue(provisioner=fake, session_factory=master)
+    job = (await (await master()).execute(
+        text("SELECT id, tenant_id FROM provisioning_jobs WHERE id = :id"), {"id": job_id}
+    )).fetchone()
+    await queue.run(job)
+
+    session = await master()
+    row = (await session.execute(text("""
+        SELECT j.status, j.error, j.finished_at, t.is_active
+        FROM provisioning_jobs j JOIN tenants t ON t.id = j.tenant_id WHERE j.id = :id
+    """), {"id": job_id})).fetchone()
+    await session.close()
+    assert fake.created == ["ekk_norte"]
+    assert row.status == JOB_DONE
+    assert row.error is None
+    assert row.finished_at is not None
+    assert row.is_active
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_tenant_inactive_and_can_be_retried(master, client):
+    http, notified = client
+    created = (await http.post("/api/superadmin/tenants", json={"name": "Sur", "slug": "sur"})).json()
+
+    queue = ProvisioningQueue(provisioner=FakeProvisioner(fail=True), session_factory=master)
+    session = await master()
+    job = (await session.execute(
+        text("SELECT id, tenant_id FROM provisioning_jobs WHERE id = :id"), {"id": created["job"]["id"]}
+    )).fetchone()
+    await session.close()
+    await queue.run(job)
+
+    failed = (await http.get(f"/api/superadmin/provisioning-jobs/{job.id}")).json()
+    assert failed["status"] == JOB_FAILED
+    assert failed["error"] == "sin espacio en disco"
+    session = await master()
+    is_active = (await session.execute(
+        text("SELECT is_active FROM tenants WHERE id = :id"), {"id": job.tenant_id}
+    )).scalar()
+    await session.close()
+    assert not is_active
+
+    retry = await http.post(f"/api/superadmin/provisioning-jobs/{job.id}/retry")
+    assert retry.status_code == 200
+    assert retry.json()["status"] == JOB_PENDING
+    assert retry.json()["error"] is None
+    assert len(notified) == 2
+
+
+def test_template_names_follow_schema_version():
+    version = provisioning.schema_version()
+    assert provisioning.template_name() == f"ekk_template_{version}"
+    assert provisioning.spare_prefix().startswith(f"ekk_spare_{version}_")
+    assert quote_ident('ekk_"raro"') == '"ekk_""raro"""'
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.core.broadcast import MemoryBroadcast, set_broadcast
+from app.core.response_cache import (
+    CachedResponse,
+    MemoryResponseStore,
+    PublicCacheMiddleware,
+    ResponseCache,
+    close_response_cache,
+    invalidate_public_cache,
+)
+
+
+@pytest_asyncio.fixture
+async def public_app():
+    set_broadcast(MemoryBroadcast())
+    calls = {"events": 0}
+    app = FastAPI()
+
+    @app.get("/api/public/events")
+    async def events(limit: int = 10, upcoming: bool = True):
+        calls["events"] += 1
+        return [{"id": n} for n in range(limit)]
+
+    @app.get("/api/public/content/{slug}")
+    async def content(slug: str):
+        raise HTTPException(status_code=404, detail="Contenido no encontrado")
+
+    app.add_middleware(PublicCacheMiddleware, path_prefix="/api/public")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client, calls
+    await close_response_cache()
+    set_broadcast(None)
+
+
+@pytest.mark.asyncio
+async def test_public_responses_are_cached_until_invalidated(public_app):
+    client, calls = public_app
+
+    first = await client.get("/api/public/events?limit=2&upcoming=true")
+    assert first.headers["x-cache"] == "MISS"
+    assert first.json() == [{"id": 0}, {"id": 1}]
+
+    # Mismos parámetros en otro orden: misma entrada
+    second = await client.get("/api/public/events?upcoming=true&limit=2")
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert calls["events"] == 1
+
+    etag = first.headers["etag"]
+    not_modified = await client.get("/api/public/events?limit=2&upcoming=true", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    await invalidate_public_cache("events")
+    third = await client.get("/api/public/events?limit=2&upcoming=true")
+    assert third.headers["x-cache"] == "MISS"
+    assert calls["events"] == 2
+
+    missing = await client.get("/api/public/content/no-existe")
+    assert missing.status_code == 404
+    assert missing.headers["x-cache"] == "BYPASS"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_render_once(public_app):
+    client, calls = public_app
+    responses = await asyncio.gather(*(client.get("/api/public/events?limit=3") for _ in range(10)))
+    assert calls["events"] == 1
+    assert sorted(r.headers["x-cache"] for r in responses) == ["HIT"] * 9 + ["MISS"]
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_render_is_not_cached():
+    set_broadcast(MemoryBroadcast())
+    app = FastAPI()
+    live = {"value": False, "calls": 0}
+
+    @app.get("/api/public/streams/live")
+    async def streams_live():
+        value = live["value"]
+        live["calls"] += 1
+        if live["calls"] == 1:
+            # go-live llega después de leer los datos y antes de guardar la respuesta
+            live["value"] = True
+            await invalidate_public_cache("streams")
+        return {"live": value}
+
+    app.add_middleware(PublicCacheMiddleware, path_prefix="/api/public")
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            stale = await client.get("/api/public/streams/live")
+            assert stale.json() == {"live": False}
+            fresh = await client.get("/api/public/streams/live")
+            assert fresh.headers["x-cache"] == "MISS"
+            assert fresh.json() == {"live": True}
+    finally:
+        await close_response_cache()
+        set_broadcast(None)
+
+
+@pytest.mark.asyncio
+async def test_key_lock_is_kept_while_requests_wait_for_it():
+    cache = ResponseCache(MemoryResponseStore(10))
+    first = cache.lock("k")
+    await first.acquire()
+    second = cache.lock("k")
+    waiter = asyncio.create_task(second.acquire())
+    await asyncio.sleep(0)
+
+    first.release()
+    cache.release("k")
+    await waiter
+    # Una tercera petición tiene que esperar a la segunda, no recibir otro lock
+    assert cache.lock("k") is second
+    second.release()
+    cache.release("k")
+    cache.release("k")
+    assert cache._locks == {}
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers():
+    set_broadcast(MemoryBroadcast())
+    workers = [ResponseCache(MemoryResponseStore(100)) for _ in range(2)]
+    try:
+        response = CachedResponse(status=200, headers=[], body=b"[]", etag='"x"')
+        for worker in workers:
+            await worker.get("/api/public/streams?")
+            await worker.set("/api/public/streams?", response, ("streams",))
+
+        await workers[0].invalidate("streams")
+        await asyncio.sleep(0.01)
+        assert [await worker.get("/api/public/streams?") for worker in workers] == [None, None]
+    finally:
+        for worker in workers:
+            await worker.aclose()
+        set_broadcast(None)
@@ -1,11 +1,18 @@
+from datetime import date
+from decimal import Decimal
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.api.repositories.donation_rollup import DonationRollupRepository
+from app.core.config import settings
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
+from app.models.donation import Donation, DonationDailyRollup
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +28,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -68,3 +75,68 @@ async def test_report_filters(async_client: AsyncClient):
     assert data["total_donations"] == 1
     assert data["by_type"]["diezmo"] == 1
 
+
+@pytest.mark.asyncio
+async def test_rollup_reports_match_raw_scan(async_client: AsyncClient, monkeypatch):
+    admin = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await async_client.post("/api/auth/register", json=admin)
+    admin_login = await async_client.post("/api/auth/login", json={"email": admin["email"], "password": admin["password"]})
+    admin_headers = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+
+    donations = [
+        ("diezmo", "50.00", "efectivo", "2025-01-01"),
+        ("diezmo", "25.50", "efectivo", "2025-01-01"),
+        ("diezmo", "10.00", "tarjeta", "2025-01-01"),
+        ("ofrenda", "30.00", "efectivo", "2025-02-15"),
+    ]
+    for donation_type, amount, method, day in donations:
+        payload = {
+            "donor_name": "X",
+            "donation_type": donation_type,
+            "amount": amount,
+            "payment_method": method,
+            "donation_date": day,
+        }
+        await async_client.post("/api/donations", json=payload, headers=admin_headers)
+
+    results = {}
+    for use_rollups in (True, False):
+        monkeypatch.setattr(settings, "reports_use_rollups", use_rollups)
+        summary = (await async_client.get("/api/reports/summary?start_date=2025-01-01", headers=admin_headers)).json()
+        dashboard = (await async_client.get("/api/reports/dashboard", headers=admin_headers)).json()
+        results[use_rollups] = (summary, dashboard)
+
+    assert results[True] == results[False]
+    summary, dashboard = results[True]
+    assert summary["total_donations"] == 4
+    assert summary["total_amount"] == 115.5
+    assert dashboard["by_month"]["2025-01"] == {"count": 3, "amount": 85.5}
+
+
+@pytest.mark.asyncio
+async def test_rollup_rebuild_from_donations():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        session.add_all([
+            Donation(donor_name="A", donation_type="diezmo", amount=Decimal("10.00"),
+                     payment_method="efectivo", donation_date=date(2025, 1, 1)),
+            Donation(donor_name="B", donation_type="diezmo", amount=Decimal("5.00"),
+                     payment_method="efectivo", donation_date=date(2025, 1, 1)),
+            Donation(donor_name="C", donation_type="misiones", amount=Decimal("7.00"),
+                     payment_method="otro", donation_date=date(2025, 1, 2)),
+        ])
+        await session.commit()
+
+        assert await DonationRollupRepository(session).rebuild() == 2
+        rows = (await session.execute(
+            select(DonationDailyRollup).order_by(DonationDailyRollup.day)
+        )).scalars().all()
+
+    assert [(r.donation_type, r.donation_count, float(r.total_amount)) for r in rows] == [
+        ("diezmo", 2, 15.0),
+        ("misiones", 1, 7.0),
+    ]
+    await engine.dispose()
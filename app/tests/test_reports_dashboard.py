@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +21,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -71,3 +71,41 @@ async def test_dashboard_by_month_and_type(async_client: AsyncClient):
     assert "2025-02" in data["by_month"]
     assert data["by_type"]["diezmo"]["count"] == 1
     assert data["by_type"]["ofrenda"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_overview_matches_summary_and_dashboard(async_client: AsyncClient):
+    admin = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await async_client.post("/api/auth/register", json=admin)
+    admin_login = await async_client.post(
+        "/api/auth/login", json={"email": admin["email"], "password": admin["password"]}
+    )
+    admin_headers = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+
+    donations = [
+        {"donation_type": "diezmo", "amount": "50.10", "donation_date": "2025-01-01"},
+        {"donation_type": "diezmo", "amount": "20.20", "donation_date": "2025-02-03"},
+        {"donation_type": "ofrenda", "amount": "30.00", "donation_date": "2025-02-01"},
+    ]
+    for d in donations:
+        payload = {"donor_name": "X", "donor_document": "1", "payment_method": "efectivo", "note": "", **d}
+        await async_client.post("/api/donations", json=payload, headers=admin_headers)
+
+    overview = (await async_client.get("/api/reports/overview", headers=admin_headers)).json()
+    summary = (await async_client.get("/api/reports/summary", headers=admin_headers)).json()
+    dashboard = (await async_client.get("/api/reports/dashboard", headers=admin_headers)).json()
+
+    assert overview["total_donations"] == summary["total_donations"] == 3
+    assert overview["total_amount"] == summary["total_amount"] == 100.3
+    assert summary["by_type"] == {"diezmo": 2, "ofrenda": 1}
+    assert overview["by_type"] == dashboard["by_type"]
+    assert overview["by_type"]["diezmo"] == {"count": 2, "amount": 70.3}
+    assert list(overview["by_month"]) == ["2025-01", "2025-02"]
+    assert overview["by_month"]["2025-02"] == {"count": 2, "amount": 50.2}
+
+    filtered = (
+        await async_client.get("/api/reports/overview?donation_type=ofrenda", headers=admin_headers)
+    ).json()
+    assert filtered["total_donations"] == 1
+    assert list(filtered["by_type"]) == ["ofrenda"]
+    assert filtered["by_month"] == {"2025-02": {"count": 1, "amount": 30.0}}
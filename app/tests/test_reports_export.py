@@ -5,7 +5,8 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
 from app.main import create_application
-from app.db.session import get_session
+from app.core.tenant import get_tenant_db
+from app.core.config import settings
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -21,7 +22,7 @@ async def async_client():
             yield session
 
     app = create_application()
-    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_tenant_db] = override_get_session
     transport = ASGITransport(app=app)
 
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -62,3 +63,29 @@ async def test_export_csv(async_client: AsyncClient):
     assert len(content) == 2  # header + 1 row
 
 
+@pytest.mark.asyncio
+async def test_export_csv_streams_in_batches(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "report_export_batch_size", 2)
+    admin = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    await async_client.post("/api/auth/register", json=admin)
+    admin_login = await async_client.post("/api/auth/login", json={"email": admin["email"], "password": admin["password"]})
+    admin_headers = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+
+    for i in range(5):
+        payload = {
+            "donor_name": f"Donante {i}",
+            "donation_type": "ofrenda",
+            "amount": "5.00",
+            "payment_method": "efectivo",
+            "donation_date": "2025-03-01",
+        }
+        await async_client.post("/api/donations", json=payload, headers=admin_headers)
+
+    async with async_client.stream("GET", "/api/reports/export", headers=admin_headers) as resp:
+        assert resp.status_code == 200
+        body = "".join([chunk async for chunk in resp.aiter_text()])
+
+    lines = body.strip().splitlines()
+    assert lines[0] == "id,donor_name,donation_type,amount,payment_method,donation_date"
+    assert len(lines) == 6
+    assert lines[1] == "1,Donante 0,ofrenda,5.00,efectivo,2025-03-01"
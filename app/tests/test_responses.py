@@ -0,0 +1,59 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from app.core.responses import ORJSONResponse
+
+
+class Item(BaseModel):
+    id: int
+    amount: Decimal
+    day: date
+
+
+@pytest.mark.asyncio
+async def test_default_response_class_serializes_native_types():
+    app = FastAPI(default_response_class=ORJSONResponse)
+    ref = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+    @app.get("/raw")
+    async def raw():
+        return ORJSONResponse({
+            "amount": Decimal("10.50"),
+            "day": date(2024, 5, 1),
+            "at": datetime(2024, 5, 1, 10, 30),
+            "ref": ref,
+            "by_year": {2024: 1},
+        })
+
+    @app.get("/validated", response_model=Item)
+    async def validated():
+        return {"id": 2, "amount": "1.5", "day": "2024-05-03"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        raw_response = await client.get("/raw")
+        validated_response = await client.get("/validated")
+
+    assert raw_response.headers["content-type"] == "application/json"
+    assert raw_response.json() == {
+        "amount": 10.5,
+        "day": "2024-05-01",
+        "at": "2024-05-01T10:30:00",
+        "ref": str(ref),
+        "by_year": {"2024": 1},
+    }
+    assert validated_response.json() == {"id": 2, "amount": "1.5", "day": "2024-05-03"}
+
+
+def test_unknown_types_are_rejected():
+    with pytest.raises(orjson.JSONEncodeError):
+        ORJSONResponse({"value": object()})
+    # Los modelos se serializan con su TypeAdapter, no modelo a modelo
+    with pytest.raises(orjson.JSONEncodeError):
+        ORJSONResponse([Item(id=1, amount=Decimal("3.20"), day=date(2024, 5, 2))])
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+
+from app.api.schemas.church import AnnouncementRead, ChurchPublicInfo
+from app.db.rows import RowMapper
+
+
+def test_row_mapper_selects_explicit_columns_and_serializes_rows():
+    mapper = RowMapper(AnnouncementRead)
+    # Filas como las entrega asyncpg: tuplas en el orden de mapper.columns
+    rows = [
+        (1, "Culto", "Domingo 10am", "general", 2, True, True, None, None, datetime(2024, 5, 1, 10)),
+        (2, "Ayuno", "Toda la semana", "urgent", 5, True, True, None, None, datetime(2024, 5, 2, 10)),
+    ]
+
+    # Solo las columnas del schema, en su orden
+    assert mapper.fields == tuple(AnnouncementRead.model_fields)
+    assert mapper.columns.startswith('"id", "title", "content"')
+
+    one = mapper.response(rows[0], status_code=201)
+    assert one.status_code == 201
+    assert one.media_type == "application/json"
+    assert json.loads(one.body)["title"] == "Culto"
+
+    many = json.loads(mapper.list_response(rows).body)
+    assert [a["priority"] for a in many] == [2, 5]
+    assert many[1] == {
+        "id": 2,
+        "title": "Ayuno",
+        "content": "Toda la semana",
+        "announcement_type": "urgent",
+        "priority": 5,
+        "is_public": True,
+        "is_active": True,
+        "start_date": None,
+        "end_date": None,
+        "created_at": "2024-05-02T10:00:00",
+    }
+
+
+def test_row_mapper_decodes_json_columns_and_quotes_reserved_names():
+    mapper = RowMapper(ChurchPublicInfo)
+    assert '"values"' in mapper.columns
+
+    row = {field: None for field in mapper.fields}
+    row.update(church_name="Iglesia", primary_color="#000", secondary_color="#fff")
+    row["service_schedule"] = '[{"day": "domingo", "time": "10:00"}]'
+    info = mapper.one(tuple(row.values()))
+
+    assert info.service_schedule == [{"day": "domingo", "time": "10:00"}]
+    assert json.loads(mapper.response(tuple(row.values())).body)["church_name"] == "Iglesia"
@@ -1,9 +1,14 @@
+import pytest
+
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     get_password_hash,
+    get_password_hash_async,
+    password_hasher,
     verify_password,
+    verify_password_async,
 )
 
 
@@ -27,3 +32,13 @@ def test_access_and_refresh_token_scopes():
     assert refresh_payload["sub"] == "123"
     assert refresh_payload["scope"] == "refresh_token"
 
+
+@pytest.mark.asyncio
+async def test_async_password_hashing_runs_in_pool():
+    hashed = await get_password_hash_async("supersecret")
+    assert await verify_password_async("supersecret", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+    stats = password_hasher.stats()
+    assert stats["completed"] >= 3
+    assert stats["queue_depth"] == 0
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from app.core.broadcast import MemoryBroadcast, set_broadcast
+from app.core.config import settings
+from app.core.sse import EventHub
+
+
+@pytest_asyncio.fixture
+async def hub():
+    set_broadcast(MemoryBroadcast())
+    hub = EventHub()
+    yield hub
+    await hub.close()
+    set_broadcast(None)
+
+
+async def _next(stream, timeout: float = 2) -> str:
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+
+def _field(text: str, name: str) -> str:
+    return next(line.split(": ", 1)[1] for line in text.splitlines() if line.startswith(f"{name}: "))
+
+
+@pytest.mark.asyncio
+async def test_events_are_pushed_and_resumed_with_last_event_id(hub: EventHub):
+    stream = hub.stream()
+    assert await _next(stream) == "retry: 5000\n\n"
+
+    await hub.publish("stream.live", {"stream_id": 1, "title": "Culto dominical"})
+    live = await _next(stream)
+    assert _field(live, "event") == "stream.live"
+    assert '"title": "Culto dominical"' in _field(live, "data")
+
+    await hub.publish("announcement.created", {"announcement_id": 3, "title": "Retiro"})
+    await hub.publish("stream.ended", {"stream_id": 1})
+    await _next(stream)
+    await _next(stream)
+    await stream.aclose()
+
+    # El navegador se reconecta con el id del primer evento y recibe lo siguiente
+    resumed = hub.stream(_field(live, "id"))
+    await _next(resumed)
+    assert _field(await _next(resumed), "event") == "announcement.created"
+    assert _field(await _next(resumed), "event") == "stream.ended"
+    await resumed.aclose()
+
+    # Un id que ya no está en el buffer pide recargar el estado
+    unknown = hub.stream("0-desconocido")
+    await _next(unknown)
+    assert _field(await _next(unknown), "event") == "reset"
+    await unknown.aclose()
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_and_slow_clients(hub: EventHub, monkeypatch):
+    monkeypatch.setattr(settings, "sse_heartbeat_seconds", 0.05)
+    monkeypatch.setattr(settings, "sse_queue_size", 2)
+
+    idle = hub.stream()
+    await _next(idle)
+    assert await _next(idle) == ": ping\n\n"
+    await idle.aclose()
+
+    slow = hub.stream()
+    await _next(slow)
+    for n in range(5):
+        await hub.publish("announcement.created", {"announcement_id": n})
+    await asyncio.sleep(0.05)
+    # Recibe lo que cabía en su cola y luego el stream termina
+    received = [await _next(slow)]
+    with pytest.raises(StopAsyncIteration):
+        while True:
+            received.append(await _next(slow))
+    assert 1 <= len(received) <= 2
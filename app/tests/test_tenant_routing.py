@@ -0,0 +1,261 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core import tenant
+from app.core.broadcast import MemoryBroadcast, set_broadcast
+from app.core.config import settings
+from app.core.response_cache import _cache_key
+from app.core.sse import EventHub
+from app.core.tenant import TenantRoute, current_tenant, reset_current_tenant, set_current_tenant
+from app.core.tenant_routing import TenantMiddleware, TenantRouter, normalize_host, notify_tenant_routes_changed
+from app.db.base import Base
+from app.main import create_application
+
+MASTER_TABLES = [
+    """
+    CREATE TABLE tenants (
+        id TEXT PRIMARY KEY,
+        slug TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        subdomain TEXT,
+        custom_domain TEXT,
+        db_name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1
+    )
+    """,
+    """
+    INSERT INTO tenants (id, slug, name, subdomain, custom_domain, db_name)
+    VALUES ('t1', 'central', 'Iglesia Central', 'central', 'www.iglesiacentral.org', 'ekk_central')
+    """,
+    "INSERT INTO tenants (id, slug, name, subdomain, db_name) VALUES ('t2', 'norte', 'Norte', 'norte', 'ekk_norte')",
+    "INSERT INTO tenants (id, slug, name, subdomain, db_name, is_active) VALUES ('t3', 'sur', 'Sur', 'sur', 'ekk_sur', 0)",
+]
+
+CENTRAL = TenantRoute(id="t1", slug="central", name="Iglesia Central", db_name="ekk_central")
+NORTE = TenantRoute(id="t2", slug="norte", name="Norte", db_name="ekk_norte")
+
+
+@pytest_asyncio.fixture
+async def master(monkeypatch):
+    monkeypatch.setattr(settings, "multi_tenant", True)
+    monkeypatch.setattr(settings, "tenant_base_domain", "ekklesia.app")
+    set_broadcast(MemoryBroadcast())
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        for ddl in MASTER_TABLES:
+            await conn.execute(text(ddl))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    queries = []
+
+    async def session_factory():
+        queries.append(True)
+        return sessionmaker()
+
+    session_factory.queries = queries
+    yield session_factory
+    await engine.dispose()
+    set_broadcast(None)
+
+
+@pytest_asyncio.fixture
+async def router(master):
+    router = TenantRouter(session_factory=master)
+    yield router
+    await router.aclose()
+
+
+def _client(router: TenantRouter) -> AsyncClient:
+    async def whoami(request):
+        return JSONResponse({**tenant.require_tenant(), "db": current_tenant().db_name})
+
+    app = Starlette(routes=[Route("/api/whoami", whoami), Route("/api/health", whoami)])
+    app = TenantMiddleware(app, router=router, exclude=("/api/health",))
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_host_resolves_tenant_without_master_query_per_request(router, master):
+    async with _client(router) as http:
+        central = await http.get("/api/whoami", headers={"Host": "central.ekklesia.app:8000"})
+        custom = await http.get("/api/whoami", headers={"Host": "WWW.IglesiaCentral.org."})
+        norte = await http.get("/api/whoami", headers={"Host": "norte.ekklesia.app"})
+        # Inactivo o desconocido: la base principal
+        inactive = await http.get("/api/whoami", headers={"Host": "sur.ekklesia.app"})
+
+    assert central.json() == {"id": "t1", "slug": "central", "name": "Iglesia Central", "db_name": "ekk_central", "db": "ekk_central"}
+    assert custom.json()["slug"] == "central"
+    assert norte.json()["db"] == "ekk_norte"
+    assert inactive.json()["db"] == tenant.CHURCH_DB
+    # Una sola carga de la tabla para las cuatro peticiones
+    assert len(master.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_host_is_rejected_without_fallback(router, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_fallback_to_main", False)
+    async with _client(router) as http:
+        assert (await http.get("/api/whoami", headers={"Host": "otra.ekklesia.app"})).status_code == 404
+        # Las rutas excluidas no dependen del host
+        assert (await http.get("/api/health", headers={"Host": "otra.ekklesia.app"})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_tenant_hosts_fail_closed_until_routes_first_load(master, monkeypatch):
+    from app.core import tenant_routing
+
+    monkeypatch.setattr(tenant_routing, "ROUTES_RETRY_SECONDS", 0)
+    down = True
+
+    async def flaky_master():
+        if down:
+            raise ConnectionRefusedError("master caída")
+        return await master()
+
+    router = TenantRouter(session_factory=flaky_master)
+    try:
+        async with _client(router) as http:
+            # Sin tabla no se sirve la base principal a un host de tenant
+            unavailable = await http.get("/api/whoami", headers={"Host": "central.ekklesia.app"})
+            assert unavailable.status_code == 503
+            assert unavailable.headers["retry-after"] == "0"
+
+            down = False
+            assert (await http.get("/api/whoami", headers={"Host": "central.ekklesia.app"})).json()["db"] == "ekk_central"
+            assert (await http.get("/api/whoami", headers={"Host": "otra.ekklesia.app"})).json()["db"] == tenant.CHURCH_DB
+    finally:
+        await router.aclose()
+
+
+@pytest.mark.asyncio
+async def test_routes_reload_on_change_notification_and_ttl(router, master, monkeypatch):
+    assert await router.resolve("sur.ekklesia.app") is None
+
+    session = await master()
+    await session.execute(text("UPDATE tenants SET is_active = 1 WHERE id = 't3'"))
+    await session.commit()
+    await session.close()
+
+    await notify_tenant_routes_changed()
+    for _ in range(50):
+        if await router.resolve("sur.ekklesia.app") is not None:
+            break
+        await asyncio.sleep(0.01)
+    assert (await router.resolve("sur.ekklesia.app")).db_name == "ekk_sur"
+
+    # Con la tabla vencida se sigue respondiendo con la anterior mientras se recarga
+    monkeypatch.setattr(settings, "tenant_routes_ttl_seconds", 0)
+    loads = len(master.queries)
+    assert (await router.resolve("norte.ekklesia.app")) == NORTE
+    await asyncio.sleep(0.05)
+    assert len(master.queries) > loads
+
+
+@pytest.mark.asyncio
+async def test_tokens_only_work_on_the_host_they_were_issued_for(router, monkeypatch):
+    from app.core import tenant_routing
+
+    monkeypatch.setattr(tenant_routing, "tenant_router", router)
+    # Una base por iglesia: el usuario 1 existe en las dos
+    engines = {db: create_async_engine("sqlite+aiosqlite:///:memory:", future=True) for db in ("ekk_central", "ekk_norte")}
+    for engine in engines.values():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    sessionmakers = {db: async_sessionmaker(engine, expire_on_commit=False) for db, engine in engines.items()}
+
+    async def override_tenant_db():
+        async with sessionmakers[current_tenant().db_name]() as session:
+            yield session
+
+    app = create_application()
+    app.dependency_overrides[tenant.get_tenant_db] = override_tenant_db
+    central = {"Host": "central.ekklesia.app"}
+    norte = {"Host": "norte.ekklesia.app"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+            tokens = {}
+            for host, email in ((central, "ana@central.org"), (norte, "luis@norte.org")):
+                user = {"email": email, "password": "Secret123!", "full_name": email}
+                assert (await http.post("/api/auth/register", json=user, headers=host)).status_code == 201
+                login = await http.post("/api/auth/login", json=user, headers=host)
+                tokens[host["Host"]] = login.json()
+
+            access = tokens["central.ekklesia.app"]["access_token"]
+            me = await http.get("/api/auth/me", headers={**central, "Authorization": f"Bearer {access}"})
+            assert me.json()["email"] == "ana@central.org"
+            # Mismo id de usuario en la otra iglesia: el token de central no sirve
+            other = await http.get("/api/users/me", headers={**norte, "Authorization": f"Bearer {access}"})
+            assert other.status_code == 401
+            refresh = tokens["central.ekklesia.app"]["refresh_token"]
+            assert (await http.post("/api/auth/refresh", json={"refresh_token": refresh}, headers=norte)).status_code == 401
+
+            # La cache de usuarios no mezcla iglesias
+            access = tokens["norte.ekklesia.app"]["access_token"]
+            me = await http.get("/api/auth/me", headers={**norte, "Authorization": f"Bearer {access}"})
+            assert me.json()["email"] == "luis@norte.org"
+    finally:
+        for engine in engines.values():
+            await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_tenant_db_uses_the_request_tenant_engine():
+    token = set_current_tenant(NORTE)
+    try:
+        dependency = tenant.get_tenant_db()
+        session = await dependency.__anext__()
+        assert session.bind.url.database == "ekk_norte"
+        await dependency.aclose()
+    finally:
+        reset_current_tenant(token)
+    assert tenant.require_tenant()["db_name"] == tenant.CHURCH_DB
+
+
+@pytest.mark.asyncio
+async def test_public_cache_and_sse_are_scoped_per_tenant():
+    scope = {"path": "/api/public/events", "query_string": b""}
+    keys = set()
+    for route in (CENTRAL, NORTE):
+        token = set_current_tenant(route)
+        keys.add(_cache_key(scope))
+        reset_current_tenant(token)
+    assert len(keys) == 2
+
+    set_broadcast(MemoryBroadcast())
+    hub = EventHub()
+    try:
+        token = set_current_tenant(NORTE)
+        stream = hub.stream()
+        await stream.__anext__()
+        reset_current_tenant(token)
+
+        for route in (CENTRAL, NORTE):
+            token = set_current_tenant(route)
+            await hub.publish("stream.live", {"church": route.slug})
+            reset_current_tenant(token)
+
+        received = await asyncio.wait_for(stream.__anext__(), 2)
+        assert '"church": "norte"' in received
+        await stream.aclose()
+    finally:
+        await hub.close()
+        set_broadcast(None)
+
+
+def test_normalize_host():
+    assert normalize_host("Central.Ekklesia.App:443") == "central.ekklesia.app"
+    assert normalize_host("iglesia.org.") == "iglesia.org"
+    assert normalize_host("[::1]:8000") == "[::1]"
+
+
+def test_db_urls_keep_the_configured_main_database_and_parameters(monkeypatch):
+    monkeypatch.setattr(settings, "database_url", "postgresql+asyncpg://u:p@h:5432/mychurch?ssl=require")
+    assert tenant.get_db_url(tenant.CHURCH_DB) == "postgresql+asyncpg://u:p@h:5432/mychurch?ssl=require"
+    assert tenant.get_db_url("ekk_norte") == "postgresql+asyncpg://u:p@h:5432/ekk_norte?ssl=require"
@@ -0,0 +1,207 @@
+import asyncio
+from collections import namedtuple
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import superadmin
+from app.core import tenant_stats as tenant_stats_module
+from app.core.config import settings
+from app.core.tenant_stats import TenantStatsCollector
+from app.main import create_application
+
+MASTER_TABLES = [
+    """
+    CREATE TABLE tenants (
+        id TEXT PRIMARY KEY,
+        slug TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        db_name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1
+    )
+    """,
+    """
+    CREATE TABLE tenant_stats (
+        tenant_id TEXT PRIMARY KEY REFERENCES tenants(id),
+        total_users INTEGER NOT NULL DEFAULT 0,
+        total_donations_amount NUMERIC NOT NULL DEFAULT 0,
+        refreshed_at TIMESTAMP,
+        checked_at TIMESTAMP NOT NULL,
+        error TEXT
+    )
+    """,
+    """
+    CREATE TABLE tenant_stats_lease (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        claimed_until TIMESTAMP NOT NULL
+    )
+    """,
+    "INSERT INTO tenants (id, slug, name, db_name) VALUES ('t1', 'central', 'Central', 'ekk_central')",
+    "INSERT INTO tenants (id, slug, name, db_name) VALUES ('t2', 'norte', 'Norte', 'ekk_norte')",
+    "INSERT INTO tenants (id, slug, name, db_name) VALUES ('t3', 'sur', 'Sur', 'ekk_sur')",
+    "INSERT INTO tenants (id, slug, name, db_name, is_active) VALUES ('t4', 'viejo', 'Viejo', 'ekk_viejo', 0)",
+]
+
+Stats = namedtuple("Stats", "total_users total_donations_amount")
+
+
+class FakeTenants:
+    def __init__(self, values: dict):
+        self.values = values
+        self.running = 0
+        self.max_running = 0
+        self.calls: list[str] = []
+
+    async def collect(self, db_name: str):
+        self.calls.append(db_name)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            value = self.values[db_name]
+            if value == "lento":
+                await asyncio.sleep(10)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        finally:
+            self.running -= 1
+
+
+@pytest_asyncio.fixture
+async def master():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async with engine.begin() as conn:
+        for ddl in MASTER_TABLES:
+            await conn.execute(text(ddl))
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def session_factory():
+        return sessionmaker()
+
+    yield session_factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_refresh_fans_out_with_bounded_concurrency_and_timeouts(master, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_stats_concurrency", 2)
+    monkeypatch.setattr(settings, "tenant_stats_timeout_seconds", 0.2)
+    fake = FakeTenants({
+        "ekk_central": Stats(10, 1500.5),
+        "ekk_norte": Stats(4, 200),
+        "ekk_sur": "lento",
+    })
+    collector = TenantStatsCollector(session_factory=master, collect=fake.collect)
+
+    assert await collector.refresh() == {"refreshed": 2, "failed": 1}
+    # Solo los tenants activos, de a TENANT_STATS_CONCURRENCY
+    assert sorted(fake.calls) == ["ekk_central", "ekk_norte", "ekk_sur"]
+    assert fake.max_running == 2
+
+    session = await master()
+    totals = await collector.totals(session)
+    await session.close()
+    assert totals["total_tenants"] == 4
+    assert totals["active_tenants"] == 3
+    assert totals["total_users"] == 14
+    assert float(totals["total_donations_amount"]) == 1700.5
+    assert totals["stale_tenants"] == 1
+
+
+@pytest.mark.asyncio
+async def test_collect_does_not_touch_the_engine_registry(tmp_path, monkeypatch):
+    from app.db import session as db_session
+
+    monkeypatch.setattr(settings, "database_url", f"sqlite+aiosqlite:///{tmp_path}/main.db")
+    db_path = str(tmp_path / "ekk_central.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+        await conn.execute(text("CREATE TABLE donation_daily_rollups (total_amount NUMERIC)"))
+        await conn.execute(text("INSERT INTO users (id) VALUES (1), (2)"))
+        await conn.execute(text("INSERT INTO donation_daily_rollups VALUES (150)"))
+    await engine.dispose()
+
+    registry = list(db_session._registry)
+    row = await tenant_stats_module.collect_tenant_stats(db_path)
+    assert (row.total_users, float(row.total_donations_amount)) == (2, 150.0)
+    # Ni crea entradas ni cambia el orden LRU de las existentes
+    assert list(db_session._registry) == registry
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_known_values(master):
+    fake = FakeTenants({"ekk_central": Stats(10, 100), "ekk_norte": Stats(4, 0), "ekk_sur": Stats(1, 0)})
+    collector = TenantStatsCollector(session_factory=master, collect=fake.collect)
+    await collector.refresh()
+
+    fake.values["ekk_central"] = ConnectionRefusedError("conexión rechazada")
+    assert await collector.refresh() == {"refreshed": 2, "failed": 1}
+
+    session = await master()
+    row = (await session.execute(text("SELECT total_users, error FROM tenant_stats WHERE tenant_id = 't1'"))).one()
+    totals = await collector.totals(session)
+    await session.close()
+    assert row.total_users == 10
+    assert row.error == "conexión rechazada"
+    assert totals["total_users"] == 15
+    assert totals["stale_tenants"] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_one_racing_collector_claims_the_refresh(master, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_stats_refresh_seconds", 300)
+    collectors = [TenantStatsCollector(session_factory=master, collect=None) for _ in range(2)]
+
+    claims = await asyncio.gather(*(collector._claim_refresh() for collector in collectors))
+    assert sorted(claims) == [False, True]
+    # El lease sigue vigente: la siguiente ronda tampoco es de nadie
+    assert not await collectors[0]._claim_refresh()
+
+    session = await master()
+    await session.execute(text("UPDATE tenant_stats_lease SET claimed_until = '2000-01-01 00:00:00'"))
+    await session.commit()
+    await session.close()
+    assert await collectors[1]._claim_refresh()
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_reads_cached_snapshot(master, monkeypatch):
+    monkeypatch.setattr(settings, "tenant_stats_cache_seconds", 60)
+    fake = FakeTenants({"ekk_central": Stats(7, 50), "ekk_norte": Stats(3, 25), "ekk_sur": Stats(0, 0)})
+    collector = TenantStatsCollector(session_factory=master, collect=fake.collect)
+    monkeypatch.setattr(tenant_stats_module, "tenant_stats", collector)
+    monkeypatch.setattr(superadmin, "tenant_stats", collector)
+
+    async def override_master_session():
+        session = await master()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    app = create_application()
+    app.dependency_overrides[superadmin.get_master_session] = override_master_session
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        empty = (await http.get("/api/superadmin/stats")).json()
+        assert empty["total_users"] == 0
+        assert empty["stale_tenants"] == 3
+        assert empty["stats_refreshed_at"] is None
+
+        assert (await http.post("/api/superadmin/stats/refresh")).json() == {"refreshed": 3, "failed": 0}
+        stats = (await http.get("/api/superadmin/stats")).json()
+        assert stats["total_users"] == 10
+        assert stats["total_donations_amount"] == 75
+        assert stats["stale_tenants"] == 0
+        assert stats["stats_refreshed_at"] is not None
+
+        # Dentro de la ventana de caché no se vuelve a consultar la master
+        session = await master()
+        await session.execute(text("UPDATE tenant_stats SET total_users = 100"))
+        await session.commit()
+        await session.close()
+        assert (await http.get("/api/superadmin/stats")).json()["total_users"] == 10
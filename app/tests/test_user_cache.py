@@ -0,0 +1,75 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.user_cache import UserCache, UserPrincipal, user_cache
+from app.db.base import Base
+from app.main import create_application
+from app.core.tenant import get_tenant_db
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_client():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async def override_get_session():
+        async with async_session() as session:
+            yield session
+
+    app = create_application()
+    app.dependency_overrides[get_tenant_db] = override_get_session
+    transport = ASGITransport(app=app)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def test_stale_load_is_not_cached_after_invalidation():
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    principal = UserPrincipal(id=1, email="a@example.com", full_name=None, role="admin", is_active=True)
+
+    version = cache.version("central", 1)
+    cache.invalidate("central", 1)
+    cache.set("central", principal, version)
+
+    assert cache.get("central", 1) is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_current_user_is_cached_and_invalidated_on_update(async_client: AsyncClient):
+    admin = {"email": "admin@example.com", "password": "Admin123!", "full_name": "Admin", "role": "admin"}
+    member = {"email": "member@example.com", "password": "Member123!", "full_name": "Member"}
+    await async_client.post("/api/auth/register", json=admin)
+    await async_client.post("/api/auth/register", json=member)
+
+    admin_login = await async_client.post("/api/auth/login", json={"email": admin["email"], "password": admin["password"]})
+    member_login = await async_client.post("/api/auth/login", json={"email": member["email"], "password": member["password"]})
+    admin_headers = {"Authorization": f"Bearer {admin_login.json()['access_token']}"}
+    member_headers = {"Authorization": f"Bearer {member_login.json()['access_token']}"}
+
+    await async_client.get("/api/users/me", headers=member_headers)
+    await async_client.get("/api/auth/me", headers=member_headers)
+    stats = user_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+    assert (await async_client.get("/api/users", headers=member_headers)).status_code == 403
+
+    resp_patch = await async_client.patch("/api/users/2", json={"role": "admin"}, headers=admin_headers)
+    assert resp_patch.status_code == 200
+
+    # El cambio de rol se refleja de inmediato pese al cache
+    assert (await async_client.get("/api/users", headers=member_headers)).status_code == 200
+
+    await async_client.delete("/api/users/2", headers=admin_headers)
+    assert (await async_client.get("/api/users/me", headers=member_headers)).status_code == 401
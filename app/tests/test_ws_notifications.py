@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
+from app.db.base import Base
+from app.core.tenant import get_tenant_db
+from app.main import create_application
+
+
+@pytest.fixture
+def client():
+    # TestClient corre la app en su propio event loop: el engine se usa solo ahí
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    async_session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def override_get_session():
+        async with async_session() as session:
+            yield session
+
+    app = create_application()
+    app.dependency_overrides[get_tenant_db] = override_get_session
+    with TestClient(app) as client:
+        client.portal.call(create_schema)
+        yield client
+        client.portal.call(engine.dispose)
+
+
+def _token(client: TestClient, email: str, role: str) -> str:
+    payload = {"email": email, "password": "Secret123!", "full_name": "WS", "role": role}
+    client.post("/api/auth/register", json=payload)
+    login = client.post("/api/auth/login", json={"email": email, "password": payload["password"]})
+    return login.json()["access_token"]
+
+
+def test_notifications_follow_subscriptions_and_roles(client: TestClient):
+    admin_token = _token(client, "admin@example.com", "admin")
+    member_token = _token(client, "member@example.com", "member")
+    admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    with client.websocket_connect(f"/api/ws/notifications?token={admin_token}&topics=donations") as admin_ws, \
+            client.websocket_connect(f"/api/ws/notifications?token={member_token}") as member_ws:
+        assert admin_ws.receive_json()["topics"] == ["donations"]
+        assert member_ws.receive_json()["topics"] == []
+
+        member_ws.send_json({"action": "subscribe", "topics": ["donations", "event:7", "otro"]})
+        assert member_ws.receive_json() == {"type": "subscriptions", "topics": ["donations", "event:7"]}
+
+        resp = client.post(
+            "/api/donations",
+            json={"donor_name": "Ana", "amount": 120, "donation_type": "ofrenda", "payment_method": "efectivo", "donation_date": "2024-05-01"},
+            headers=admin_headers,
+        )
+        assert resp.status_code == 201
+
+        assert admin_ws.receive_json()["amount"] == 120.0
+        member_message = member_ws.receive_json()
+        assert member_message["type"] == "donation.created"
+        assert "amount" not in member_message
+
+        # Los mensajes del cliente ya no se reenvían a los demás
+        member_ws.send_json({"action": "ping"})
+        assert member_ws.receive_json() == {"type": "pong"}
+
+
+def test_inbound_rate_limit_closes_noisy_clients(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "ws_inbound_burst", 3)
+    monkeypatch.setattr(settings, "ws_inbound_rate_per_second", 0.01)
+    token = _token(client, "noisy@example.com", "member")
+
+    with client.websocket_connect(f"/api/ws/notifications?token={token}") as ws:
+        ws.receive_json()
+        for _ in range(3):
+            ws.send_json({"action": "ping"})
+            assert ws.receive_json() == {"type": "pong"}
+        ws.send_json({"action": "ping"})
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+        assert exc.value.code == 1008
+
+
+def test_invalid_token_is_rejected(client: TestClient):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/ws/notifications?token=basura") as ws:
+            ws.receive_json()
+    assert exc.value.code == 4401
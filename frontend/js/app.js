@@ -13,6 +13,9 @@ const API_BASE = window.location.hostname === 'localhost' || window.location.hos
 
 const WS_BASE = API_BASE.replace(/^http/, 'ws').replace('/api', '');
 
+// Tamaño de página al recorrer listados completos (el backend lo limita con PAGE_SIZE_MAX)
+const PAGE_SIZE_MAX = 200;
+
 // ========================================
 // STATE
 // ========================================
@@ -88,6 +91,61 @@ async function apiRequest(endpoint, options = {}) {
   }
 }
 
+// Los listados vienen paginados: la página es el array del cuerpo y el cursor
+// de la siguiente llega en la cabecera X-Next-Cursor.
+async function apiRequestPage(endpoint, { cursor = null, limit = null, ...options } = {}) {
+  const params = new URLSearchParams();
+  if (limit) params.append('limit', limit);
+  if (cursor) params.append('cursor', cursor);
+  const query = params.toString();
+  const separator = endpoint.includes('?') ? '&' : '?';
+  const response = await apiRequest(query ? `${endpoint}${separator}${query}` : endpoint, options);
+  if (!response.ok) {
+    return { ok: false, status: response.status, items: [], nextCursor: null };
+  }
+  return {
+    ok: true,
+    status: response.status,
+    items: await response.json(),
+    nextCursor: response.headers.get('X-Next-Cursor'),
+  };
+}
+
+// Recorre todas las páginas de un listado (para vistas que necesitan el total)
+async function apiRequestAll(endpoint, options = {}) {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await apiRequestPage(endpoint, { ...options, cursor, limit: PAGE_SIZE_MAX });
+    if (!page.ok) return { ok: false, status: page.status, items };
+    items.push(...page.items);
+    cursor = page.nextCursor;
+  } while (cursor);
+  return { ok: true, status: 200, items };
+}
+
+// Contador de un listado con una sola petición: si hay más de una página se
+// muestra el tamaño de página con "+"
+async function apiRequestCount(endpoint, options = {}) {
+  const page = await apiRequestPage(endpoint, { ...options, limit: PAGE_SIZE_MAX });
+  if (!page.ok) return null;
+  return page.nextCursor ? `${page.items.length}+` : String(page.items.length);
+}
+
+// Muestra u oculta el botón "Cargar más" a continuación de un listado
+function updateListMore(container, id, cursor, onClick) {
+  let more = document.getElementById(id);
+  if (!more) {
+    container.insertAdjacentHTML('afterend', `
+      <div class="list-more" id="${id}">
+        <button class="btn btn-ghost btn-sm" onclick="${onClick}()">Cargar más</button>
+      </div>
+    `);
+    more = document.getElementById(id);
+  }
+  more.style.display = cursor ? '' : 'none';
+}
+
 async function refreshAccessToken() {
   try {
     const response = await fetch(`${API_BASE}/auth/refresh`, {
@@ -386,21 +444,15 @@ async function loadDashboard() {
         renderBreakdownChart(data.by_type);
       }
 
-      // Load events count
-      const eventsRes = await apiRequest('/events');
-      if (eventsRes.ok) {
-        const events = await eventsRes.json();
-        const eventsEl = document.getElementById('stat-events-count');
-        if (eventsEl) eventsEl.textContent = events.length;
-      }
-
-      // Load documents count
-      const docsRes = await apiRequest('/documents');
-      if (docsRes.ok) {
-        const docs = await docsRes.json();
-        const docsEl = document.getElementById('stat-documents-count');
-        if (docsEl) docsEl.textContent = docs.length;
-      }
+      // Load events and documents counts
+      const [eventsCount, docsCount] = await Promise.all([
+        apiRequestCount('/events'),
+        apiRequestCount('/documents'),
+      ]);
+      const eventsEl = document.getElementById('stat-events-count');
+      if (eventsEl && eventsCount !== null) eventsEl.textContent = eventsCount;
+      const docsEl = document.getElementById('stat-documents-count');
+      if (docsEl && docsCount !== null) docsEl.textContent = docsCount;
     }
 
     // Load recent donations for current user
@@ -602,6 +654,8 @@ async function exportDonationsCSV() {
 // DOCUMENTS
 // ========================================
 
+let documentsCursor = null;
+
 async function loadDocuments() {
   if (state.user?.role !== 'admin') {
     document.getElementById('documents-list').innerHTML = `
@@ -614,10 +668,11 @@ async function loadDocuments() {
   }
 
   try {
-    const response = await apiRequest('/documents');
-    if (response.ok) {
-      const documents = await response.json();
-      renderDocumentsGrid(documents);
+    const page = await apiRequestPage('/documents');
+    if (page.ok) {
+      documentsCursor = page.nextCursor;
+      renderDocumentsGrid(page.items);
+      updateListMore(document.getElementById('documents-list'), 'documents-more', documentsCursor, 'loadMoreDocuments');
     }
   } catch (error) {
     console.error('Failed to load documents:', error);
@@ -625,6 +680,22 @@ async function loadDocuments() {
   }
 }
 
+async function loadMoreDocuments() {
+  if (!documentsCursor) return;
+  try {
+    const page = await apiRequestPage('/documents', { cursor: documentsCursor });
+    if (!page.ok) throw new Error('Error al cargar documentos');
+    
+    documentsCursor = page.nextCursor;
+    const container = document.getElementById('documents-list');
+    container.insertAdjacentHTML('beforeend', renderDocumentCards(page.items));
+    updateListMore(container, 'documents-more', documentsCursor, 'loadMoreDocuments');
+  } catch (error) {
+    console.error('Failed to load documents:', error);
+    showToast('Error al cargar documentos', 'error');
+  }
+}
+
 function renderDocumentsGrid(documents) {
   const container = document.getElementById('documents-list');
   
@@ -638,6 +709,10 @@ function renderDocumentsGrid(documents) {
     return;
   }
 
+  container.innerHTML = renderDocumentCards(documents);
+}
+
+function renderDocumentCards(documents) {
   const icons = {
     'application/pdf': 'ri-file-pdf-2-line',
     'image/png': 'ri-image-line',
@@ -645,7 +720,7 @@ function renderDocumentsGrid(documents) {
     'image/jpg': 'ri-image-line',
   };
 
-  container.innerHTML = documents.map(doc => `
+  return documents.map(doc => `
     <div class="document-card" onclick="downloadDocument(${doc.id})">
       <div class="document-icon">
         <i class="${icons[doc.mime_type] || 'ri-file-line'}"></i>
@@ -730,12 +805,23 @@ async function handleDocumentUpload(event) {
 // EVENTS
 // ========================================
 
+let eventsCursor = null;
+
+function eventsContainer() {
+  // Try multiple possible containers
+  return document.getElementById('events-list') || 
+         document.getElementById('my-events-list') ||
+         document.getElementById('events-container');
+}
+
 async function loadEvents() {
   try {
-    const response = await apiRequest('/events', { skipAuth: true });
-    if (response.ok) {
-      const events = await response.json();
-      renderEventsGrid(events);
+    const page = await apiRequestPage('/events', { skipAuth: true });
+    if (page.ok) {
+      eventsCursor = page.nextCursor;
+      renderEventsGrid(page.items);
+      const container = eventsContainer();
+      if (container) updateListMore(container, 'events-more', eventsCursor, 'loadMoreEvents');
     }
   } catch (error) {
     console.error('Failed to load events:', error);
@@ -743,11 +829,24 @@ async function loadEvents() {
   }
 }
 
+async function loadMoreEvents() {
+  const container = eventsContainer();
+  if (!eventsCursor || !container) return;
+  try {
+    const page = await apiRequestPage('/events', { cursor: eventsCursor, skipAuth: true });
+    if (!page.ok) throw new Error('Error al cargar eventos');
+    
+    eventsCursor = page.nextCursor;
+    container.insertAdjacentHTML('beforeend', renderEventCards(page.items));
+    updateListMore(container, 'events-more', eventsCursor, 'loadMoreEvents');
+  } catch (error) {
+    console.error('Failed to load events:', error);
+    showToast('Error al cargar eventos', 'error');
+  }
+}
+
 function renderEventsGrid(events) {
-  // Try multiple possible containers
-  const container = document.getElementById('events-list') || 
-                   document.getElementById('my-events-list') ||
-                   document.getElementById('events-container');
+  const container = eventsContainer();
   
   if (!container) return;
   
@@ -762,7 +861,11 @@ function renderEventsGrid(events) {
     return;
   }
 
-  container.innerHTML = events.map(event => `
+  container.innerHTML = renderEventCards(events);
+}
+
+function renderEventCards(events) {
+  return events.map(event => `
     <div class="event-card">
       <div class="event-header">
         <h4>${event.name}</h4>
@@ -1003,11 +1106,14 @@ async function exportReportCSV() {
 // WEBSOCKET
 // ========================================
 
+// Temas de notificaciones que escucha el panel
+const WS_TOPICS = ['donations', 'events', 'streams', 'announcements'];
+
 function connectWebSocket() {
   if (!state.accessToken) return;
 
   try {
-    const wsUrl = `${WS_BASE}/api/ws/notifications?token=${state.accessToken}`;
+    const wsUrl = `${WS_BASE}/api/ws/notifications?token=${state.accessToken}&topics=${WS_TOPICS.join(',')}`;
     state.ws = new WebSocket(wsUrl);
 
     state.ws.onopen = () => {
@@ -1044,7 +1150,13 @@ function connectWebSocket() {
 function handleWebSocketMessage(data) {
   switch (data.type) {
     case 'donation.created':
-      showToast(`Nueva donación: ${formatCurrency(data.amount)} (${data.donation_type})`, 'info');
+      // El monto solo llega a administradores
+      showToast(
+        data.amount !== undefined
+          ? `Nueva donación: ${formatCurrency(data.amount)} (${data.donation_type})`
+          : `Nueva donación (${data.donation_type})`,
+        'info'
+      );
       if (document.getElementById('section-dashboard').classList.contains('active')) {
         loadDashboard();
       }
@@ -1058,6 +1170,12 @@ function handleWebSocketMessage(data) {
         loadEvents();
       }
       break;
+    case 'stream.live':
+      showToast(`En vivo: ${data.title}`, 'info');
+      break;
+    case 'announcement.created':
+      showToast(`Nuevo anuncio: ${data.title}`, 'info');
+      break;
   }
 }
 
@@ -1092,6 +1210,13 @@ function formatFileSize(bytes) {
   return parseFloat((bytes / Math.pow(k, i)).toFixed(1)) + ' ' + sizes[i];
 }
 
+// Imágenes subidas como documento: pedir una miniatura del tamaño mostrado
+function sizedImageUrl(url, size) {
+  if (!url || !url.startsWith(`${API_BASE}/documents/`)) return url;
+  const separator = url.includes('?') ? '&' : '?';
+  return `${url}${separator}size=${size}`;
+}
+
 function toggleFormCard(cardId, show) {
   const card = document.getElementById(cardId);
   if (show === undefined) {
@@ -1359,9 +1484,33 @@ document.addEventListener('DOMContentLoaded', () => {
   loadPublicConfig(); // Cargar configuración de la iglesia
   loadFeaturedEvents(); // Cargar eventos destacados en landing
   loadPublicAnnouncements(); // Cargar anuncios públicos
+  connectPublicUpdates(); // Transmisiones y anuncios en vivo (SSE)
   initializeApp();
 });
 
+// Cambios de transmisiones y anuncios empujados por el servidor (sin polling).
+// EventSource se reconecta solo y reenvía Last-Event-ID.
+function connectPublicUpdates() {
+  if (!window.EventSource) return;
+  const source = new EventSource(`${API_BASE}/public/updates`);
+  const refreshStreams = () => {
+    if (document.getElementById('page-live')?.classList.contains('active')) {
+      loadPublicLiveStreams();
+    }
+  };
+  source.addEventListener('stream.live', (event) => {
+    const data = JSON.parse(event.data);
+    showToast(`En vivo: ${data.title}`, 'info');
+    refreshStreams();
+  });
+  source.addEventListener('stream.ended', refreshStreams);
+  source.addEventListener('announcement.created', () => loadPublicAnnouncements());
+  source.addEventListener('reset', () => {
+    loadPublicAnnouncements();
+    refreshStreams();
+  });
+}
+
 // Cargar eventos destacados en la landing page
 async function loadFeaturedEvents() {
   const container = document.getElementById('featured-events');
@@ -1471,20 +1620,20 @@ async function loadPublicConfig() {
     // Actualizar logo en header público
     const headerLogo = document.getElementById('church-logo');
     if (headerLogo && config.logo_url) {
-      headerLogo.innerHTML = `<img src="${config.logo_url}" alt="${config.church_name}" style="max-height: 40px; max-width: 40px; border-radius: 8px;" />`;
+      headerLogo.innerHTML = `<img src="${sizedImageUrl(config.logo_url, 128)}" alt="${config.church_name}" style="max-height: 40px; max-width: 40px; border-radius: 8px;" />`;
     }
     
     // Actualizar logo en sidebar del panel de usuario
     const sidebarLogo = document.querySelector('.sidebar-logo');
     if (sidebarLogo && config.logo_url) {
-      sidebarLogo.innerHTML = `<img src="${config.logo_url}" alt="${config.church_name}" style="max-height: 48px; max-width: 48px; border-radius: 8px;" />`;
+      sidebarLogo.innerHTML = `<img src="${sizedImageUrl(config.logo_url, 128)}" alt="${config.church_name}" style="max-height: 48px; max-width: 48px; border-radius: 8px;" />`;
     }
     
     // Actualizar imagen de portada en el hero
     if (config.cover_image_url) {
       const heroSection = document.getElementById('hero-section');
       if (heroSection) {
-        heroSection.style.setProperty('--hero-bg-image', `url(${config.cover_image_url})`);
+        heroSection.style.setProperty('--hero-bg-image', `url(${sizedImageUrl(config.cover_image_url, 1024)})`);
       }
     }
     
@@ -1865,12 +2014,37 @@ async function loadPublicLiveStreams() {
 // ========================================
 
 // Admin Donations
+let adminDonationsCursor = null;
+
+function renderAdminDonationRows(donations) {
+  return donations.map(d => `
+    <tr>
+      <td>${new Date(d.donation_date).toLocaleDateString()}</td>
+      <td>${d.donor_name}</td>
+      <td><span class="badge">${d.donation_type}</span></td>
+      <td class="text-right">$${parseFloat(d.amount).toLocaleString()}</td>
+      <td>${d.payment_method}</td>
+      <td>
+        <button class="btn btn-ghost btn-sm" onclick="viewDonation(${d.id})">
+          <i class="ri-eye-line"></i>
+        </button>
+      </td>
+    </tr>
+  `).join('');
+}
+
+function updateAdminDonationsMore() {
+  const more = document.getElementById('admin-donations-more');
+  if (more) more.style.display = adminDonationsCursor ? '' : 'none';
+}
+
 async function loadAdminDonations() {
   try {
-    const response = await apiRequest('/donations');
-    if (!response.ok) throw new Error('Error al cargar donaciones');
+    const page = await apiRequestPage('/donations');
+    if (!page.ok) throw new Error('Error al cargar donaciones');
     
-    const donations = await response.json();
+    const donations = page.items;
+    adminDonationsCursor = page.nextCursor;
     const container = document.getElementById('admin-donations-list');
     
     if (!donations.length) {
@@ -1890,24 +2064,31 @@ async function loadAdminDonations() {
             <th>Acciones</th>
           </tr>
         </thead>
-        <tbody>
-          ${donations.map(d => `
-            <tr>
-              <td>${new Date(d.donation_date).toLocaleDateString()}</td>
-              <td>${d.donor_name}</td>
-              <td><span class="badge">${d.donation_type}</span></td>
-              <td class="text-right">$${parseFloat(d.amount).toLocaleString()}</td>
-              <td>${d.payment_method}</td>
-              <td>
-                <button class="btn btn-ghost btn-sm" onclick="viewDonation(${d.id})">
-                  <i class="ri-eye-line"></i>
-                </button>
-              </td>
-            </tr>
-          `).join('')}
+        <tbody id="admin-donations-rows">
+          ${renderAdminDonationRows(donations)}
         </tbody>
       </table>
+      <div class="list-more" id="admin-donations-more">
+        <button class="btn btn-ghost btn-sm" onclick="loadMoreAdminDonations()">Cargar más</button>
+      </div>
     `;
+    updateAdminDonationsMore();
+  } catch (error) {
+    console.error('Error loading donations:', error);
+    showToast('Error al cargar donaciones', 'error');
+  }
+}
+
+async function loadMoreAdminDonations() {
+  if (!adminDonationsCursor) return;
+  try {
+    const page = await apiRequestPage('/donations', { cursor: adminDonationsCursor });
+    if (!page.ok) throw new Error('Error al cargar donaciones');
+    
+    adminDonationsCursor = page.nextCursor;
+    document.getElementById('admin-donations-rows')
+      .insertAdjacentHTML('beforeend', renderAdminDonationRows(page.items));
+    updateAdminDonationsMore();
   } catch (error) {
     console.error('Error loading donations:', error);
     showToast('Error al cargar donaciones', 'error');
@@ -1917,10 +2098,10 @@ async function loadAdminDonations() {
 // Admin Events
 async function loadAdminEvents() {
   try {
-    const response = await apiRequest('/admin/events');
+    const response = await apiRequestAll('/admin/events');
     if (!response.ok) throw new Error('Error al cargar eventos');
     
-    const events = await response.json();
+    const events = response.items;
     const container = document.getElementById('admin-events-list');
     
     if (!events.length) {
@@ -1991,16 +2172,14 @@ async function loadAdminEvents() {
 async function editEvent(eventId) {
   try {
     // Fetch event data
-    const response = await apiRequest(`/admin/events`);
-    if (!response.ok) throw new Error('Error al cargar evento');
-    
-    const events = await response.json();
-    const event = events.find(e => e.id === eventId);
-    
-    if (!event) {
+    const response = await apiRequest(`/admin/events/${eventId}`);
+    if (response.status === 404) {
       showToast('Evento no encontrado', 'error');
       return;
     }
+    if (!response.ok) throw new Error('Error al cargar evento');
+    
+    const event = await response.json();
     
     // Show form
     const formCard = document.getElementById('admin-event-form');
@@ -2052,13 +2231,13 @@ async function deleteEvent(eventId) {
 async function loadAdminExpenses() {
   try {
     const [expensesRes, categoriesRes] = await Promise.all([
-      apiRequest('/expenses'),
+      apiRequestAll('/expenses'),
       apiRequest('/expenses/categories')
     ]);
     
     if (!expensesRes.ok) throw new Error('Error al cargar gastos');
     
-    const expenses = await expensesRes.json();
+    const expenses = expensesRes.items;
     const categories = categoriesRes.ok ? await categoriesRes.json() : [];
     
     // Update category select
@@ -2282,7 +2461,7 @@ async function loadAdminConfig() {
       const logoImg = document.getElementById('current-logo');
       const logoPlaceholder = document.getElementById('logo-placeholder');
       if (logoImg && logoPlaceholder) {
-        logoImg.src = config.logo_url;
+        logoImg.src = sizedImageUrl(config.logo_url, 256);
         logoImg.style.display = 'block';
         logoPlaceholder.style.display = 'none';
       }
@@ -2295,7 +2474,7 @@ async function loadAdminConfig() {
       const coverImg = document.getElementById('current-cover');
       const coverPlaceholder = document.getElementById('cover-placeholder');
       if (coverImg && coverPlaceholder) {
-        coverImg.src = config.cover_image_url;
+        coverImg.src = sizedImageUrl(config.cover_image_url, 512);
         coverImg.style.display = 'block';
         coverPlaceholder.style.display = 'none';
       }
@@ -2638,21 +2817,21 @@ async function uploadConfigImage(file, type) {
     if (!response.ok) throw new Error('Error al subir');
     
     const doc = await response.json();
-    const imageUrl = `${API_BASE}/documents/${doc.id}/download`;
+    const imageUrl = `${API_BASE}/documents/${doc.id}`;
     
     // Update preview
     if (type === 'logo') {
       const img = document.getElementById('current-logo');
       const placeholder = document.getElementById('logo-placeholder');
       const urlInput = document.getElementById('config-logo-url');
-      if (img) { img.src = imageUrl; img.style.display = 'block'; }
+      if (img) { img.src = sizedImageUrl(imageUrl, 256); img.style.display = 'block'; }
       if (placeholder) placeholder.style.display = 'none';
       if (urlInput) urlInput.value = imageUrl;
     } else {
       const img = document.getElementById('current-cover');
       const placeholder = document.getElementById('cover-placeholder');
       const urlInput = document.getElementById('config-cover-url');
-      if (img) { img.src = imageUrl; img.style.display = 'block'; }
+      if (img) { img.src = sizedImageUrl(imageUrl, 256); img.style.display = 'block'; }
       if (placeholder) placeholder.style.display = 'none';
       if (urlInput) urlInput.value = imageUrl;
     }
@@ -2698,6 +2877,9 @@ async function saveAdminConfig(e) {
 }
 
 // Admin Reports
+let reportDonationsCursor = null;
+let reportDonationsQuery = '';
+
 async function loadAdminReports() {
   await loadAdminReportsFiltered();
 }
@@ -2730,46 +2912,27 @@ async function loadAdminReportsFiltered() {
       }
     }
     
-    const [donationsRes, expensesRes, usersRes] = await Promise.all([
-      apiRequest('/donations'),
-      apiRequest('/expenses'),
-      apiRequest('/users')
-    ]);
-    
-    let allDonations = [];
-    let allExpenses = [];
-    let memberCount = 0;
-    
-    if (donationsRes.ok) {
-      allDonations = await donationsRes.json();
-    }
-    
-    if (expensesRes.ok) {
-      allExpenses = await expensesRes.json();
-    }
-
-    if (usersRes.ok) {
-      const users = await usersRes.json();
-      memberCount = users.length;
-    }
+    const range = new URLSearchParams();
+    if (fromDate) range.append('start_date', fromDate);
+    if (toDate) range.append('end_date', toDate);
+    reportDonationsQuery = range.toString() ? `?${range}` : '';
     
-    // Filter by date
-    const filteredDonations = allDonations.filter(d => {
-      if (!d.donation_date) return true;
-      const date = d.donation_date.split('T')[0];
-      return (!fromDate || date >= fromDate) && (!toDate || date <= toDate);
-    });
+    // Totales agregados en el servidor; la tabla carga las donaciones del rango por páginas
+    const [overviewRes, expensesRes, memberCount, donationsPage] = await Promise.all([
+      apiRequest(`/reports/overview${reportDonationsQuery}`),
+      apiRequest(`/expenses/summary/by-status${reportDonationsQuery}`),
+      apiRequestCount('/users'),
+      apiRequestPage(`/donations${reportDonationsQuery}`)
+    ]);
     
-    const filteredExpenses = allExpenses.filter(e => {
-      if (!e.expense_date && !e.created_at) return true;
-      const date = (e.expense_date || e.created_at)?.split('T')[0];
-      return (!fromDate || date >= fromDate) && (!toDate || date <= toDate);
-    });
+    const overview = overviewRes.ok ? await overviewRes.json() : { total_amount: 0, by_type: {} };
+    const expensesByStatus = expensesRes.ok ? await expensesRes.json() : [];
     
     // Calculate totals
-    const totalDonations = filteredDonations.reduce((sum, d) => sum + parseFloat(d.amount || 0), 0);
-    const approvedExpenses = filteredExpenses.filter(e => e.status === 'paid' || e.status === 'approved');
-    const totalExpenses = approvedExpenses.reduce((sum, e) => sum + parseFloat(e.amount || 0), 0);
+    const totalDonations = overview.total_amount || 0;
+    const totalExpenses = expensesByStatus
+      .filter(e => e.status === 'paid' || e.status === 'approved')
+      .reduce((sum, e) => sum + (e.total || 0), 0);
     
     // Update stats
     const donationsEl = document.getElementById('report-total-donations');
@@ -2780,16 +2943,17 @@ async function loadAdminReportsFiltered() {
     if (donationsEl) donationsEl.textContent = formatCurrency(totalDonations);
     if (expensesEl) expensesEl.textContent = formatCurrency(totalExpenses);
     if (balanceEl) balanceEl.textContent = formatCurrency(totalDonations - totalExpenses);
-    if (membersEl) membersEl.textContent = memberCount;
+    if (membersEl && memberCount !== null) membersEl.textContent = memberCount;
     
     // Render donations table (formato tipo Excel)
-    renderDonationsReportTable(filteredDonations);
+    reportDonationsCursor = donationsPage.ok ? donationsPage.nextCursor : null;
+    renderDonationsReportTable(donationsPage.items, overview.by_type);
     
     // Render donations by type chart
-    renderDonationsByTypeChart(filteredDonations);
+    renderDonationsByTypeChart(overview.by_type);
     
     // Render expenses summary by status
-    renderExpensesSummary(filteredExpenses);
+    renderExpensesSummary(expensesByStatus);
     
     // Load expenses by category
     const byCategoryRes = await apiRequest('/expenses/summary/by-category');
@@ -2818,15 +2982,12 @@ async function loadAdminReportsFiltered() {
   }
 }
 
-function renderExpensesSummary(expenses) {
-  const pending = expenses.filter(e => e.status === 'pending');
-  const approved = expenses.filter(e => e.status === 'approved');
-  const paid = expenses.filter(e => e.status === 'paid');
-  const rejected = expenses.filter(e => e.status === 'rejected');
-  
-  const pendingTotal = pending.reduce((sum, e) => sum + parseFloat(e.amount || 0), 0);
-  const approvedTotal = approved.reduce((sum, e) => sum + parseFloat(e.amount || 0), 0);
-  const paidTotal = paid.reduce((sum, e) => sum + parseFloat(e.amount || 0), 0);
+function renderExpensesSummary(byStatus) {
+  const summary = (status) => byStatus.find(e => e.status === status) || { count: 0, total: 0 };
+  const pending = summary('pending');
+  const approved = summary('approved');
+  const paid = summary('paid');
+  const rejected = summary('rejected');
   
   // Update elements if they exist in the reports section
   const container = document.getElementById('expenses-summary-report');
@@ -2834,19 +2995,19 @@ function renderExpensesSummary(expenses) {
     container.innerHTML = `
       <div class="stats-row">
         <div class="stat-card mini">
-          <div class="stat-value">${pending.length}</div>
-          <div class="stat-label">Pendientes (${formatCurrency(pendingTotal)})</div>
+          <div class="stat-value">${pending.count}</div>
+          <div class="stat-label">Pendientes (${formatCurrency(pending.total)})</div>
         </div>
         <div class="stat-card mini">
-          <div class="stat-value">${approved.length}</div>
-          <div class="stat-label">Aprobados (${formatCurrency(approvedTotal)})</div>
+          <div class="stat-value">${approved.count}</div>
+          <div class="stat-label">Aprobados (${formatCurrency(approved.total)})</div>
         </div>
         <div class="stat-card mini">
-          <div class="stat-value">${paid.length}</div>
-          <div class="stat-label">Pagados (${formatCurrency(paidTotal)})</div>
+          <div class="stat-value">${paid.count}</div>
+          <div class="stat-label">Pagados (${formatCurrency(paid.total)})</div>
         </div>
         <div class="stat-card mini">
-          <div class="stat-value">${rejected.length}</div>
+          <div class="stat-value">${rejected.count}</div>
           <div class="stat-label">Rechazados</div>
         </div>
       </div>
@@ -2854,23 +3015,32 @@ function renderExpensesSummary(expenses) {
   }
 }
 
-function renderDonationsReportTable(donations) {
+function renderDonationsReportTable(donations, blocks) {
   const tbody = document.getElementById('donations-report-tbody');
   if (!tbody) return;
 
+  // Totales del rango completo (agregados del servidor), no solo de las filas cargadas
+  const amountOf = (type) => (blocks && blocks[type] ? blocks[type].amount : 0);
+  const el = (id, val) => { const e = document.getElementById(id); if (e) e.textContent = formatCurrency(val); };
+  el('total-diezmo', amountOf('diezmo'));
+  el('total-ofrenda', amountOf('ofrenda'));
+  el('total-misiones', amountOf('misiones'));
+  el('total-general', Object.values(blocks || {}).reduce((sum, block) => sum + (block.amount || 0), 0));
+
+  updateListMore(tbody.closest('table'), 'report-donations-more', reportDonationsCursor, 'loadMoreReportDonations');
+
   if (!donations || donations.length === 0) {
     tbody.innerHTML = '<tr><td colspan="9" class="empty-message">No hay donaciones</td></tr>';
     return;
   }
 
-  let totals = { diezmo: 0, ofrenda: 0, misiones: 0, general: 0 };
+  tbody.innerHTML = renderDonationReportRows(donations);
+}
 
-  tbody.innerHTML = donations.map(d => {
+function renderDonationReportRows(donations) {
+  return donations.map(d => {
     const amount = parseFloat(d.amount || 0);
     const type = d.donation_type || 'ofrenda';
-    
-    if (totals[type] !== undefined) totals[type] += amount;
-    totals.general += amount;
 
     const isEfectivo = d.payment_method === 'efectivo';
     const isTransf = d.payment_method === 'transferencia';
@@ -2889,23 +3059,31 @@ function renderDonationsReportTable(donations) {
       </tr>
     `;
   }).join('');
+}
 
-  const el = (id, val) => { const e = document.getElementById(id); if (e) e.textContent = formatCurrency(val); };
-  el('total-diezmo', totals.diezmo);
-  el('total-ofrenda', totals.ofrenda);
-  el('total-misiones', totals.misiones);
-  el('total-general', totals.general);
+async function loadMoreReportDonations() {
+  if (!reportDonationsCursor) return;
+  try {
+    const page = await apiRequestPage(`/donations${reportDonationsQuery}`, { cursor: reportDonationsCursor });
+    if (!page.ok) throw new Error('Error al cargar donaciones');
+    
+    reportDonationsCursor = page.nextCursor;
+    const tbody = document.getElementById('donations-report-tbody');
+    tbody.insertAdjacentHTML('beforeend', renderDonationReportRows(page.items));
+    updateListMore(tbody.closest('table'), 'report-donations-more', reportDonationsCursor, 'loadMoreReportDonations');
+  } catch (error) {
+    console.error('Error loading donations:', error);
+    showToast('Error al cargar donaciones', 'error');
+  }
 }
 
-function renderDonationsByTypeChart(donations) {
+function renderDonationsByTypeChart(blocks) {
   const container = document.getElementById('donations-by-type-chart');
   if (!container) return;
 
   const byType = {};
-  donations.forEach(d => {
-    const type = d.donation_type || 'otro';
-    if (!byType[type]) byType[type] = 0;
-    byType[type] += parseFloat(d.amount || 0);
+  Object.entries(blocks || {}).forEach(([type, block]) => {
+    byType[type || 'otro'] = block.amount || 0;
   });
 
   if (Object.keys(byType).length === 0) {
@@ -2932,10 +3110,10 @@ function renderDonationsByTypeChart(donations) {
 // Admin Documents
 async function loadAdminDocuments() {
   try {
-    const response = await apiRequest('/documents');
+    const response = await apiRequestAll('/documents');
     if (!response.ok) return;
     
-    const documents = await response.json();
+    const documents = response.items;
     
     // Categorize documents
     const systemDocs = [];
@@ -3112,23 +3290,17 @@ function exportToExcel() {
 
 async function exportToCSV() {
   try {
-    const res = await apiRequest('/donations');
+    // El servidor genera el CSV por lotes con el rango de fechas del reporte
+    const res = await apiRequest(`/reports/export${reportDonationsQuery}`);
     if (!res.ok) throw new Error();
     
-    const donations = await res.json();
-    const headers = ['Fecha', 'Nombre', 'Documento', 'Tipo', 'Método', 'Monto'];
-    const rows = donations.map(d => [
-      d.donation_date, d.donor_name || 'Anónimo', d.donor_document || '',
-      d.donation_type, d.payment_method, d.amount
-    ]);
-    
-    const csv = [headers, ...rows].map(r => r.join(',')).join('\n');
-    const blob = new Blob([csv], { type: 'text/csv;charset=utf-8;' });
+    const blob = await res.blob();
     const url = URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
     a.download = `donaciones_${new Date().toISOString().slice(0,10)}.csv`;
     a.click();
+    URL.revokeObjectURL(url);
     showToast('CSV descargado', 'success');
   } catch (e) {
     showToast('Error al exportar', 'error');
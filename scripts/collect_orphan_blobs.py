@@ -0,0 +1,50 @@
+"""
+Elimina del almacén los blobs que ya no referencia ningún documento.
+
+Uso (desde la raíz del proyecto):
+    PYTHONPATH=. python scripts/collect_orphan_blobs.py                 # BD principal
+    PYTHONPATH=. python scripts/collect_orphan_blobs.py ekk_slug        # BD de un tenant
+    PYTHONPATH=. python scripts/collect_orphan_blobs.py --dry-run       # solo listar
+
+Usa el backend de STORAGE_BACKEND (disco local o bucket S3). Si varios tenants
+comparten almacén, pasar todas sus BDs en la misma ejecución: un blob solo es
+huérfano si no lo referencia ninguna de ellas.
+"""
+import argparse
+import asyncio
+
+from app.api.repositories.document import DocumentRepository
+from app.core.storage import close_storage, get_storage
+from app.core.tenant import CHURCH_DB, get_tenant_session
+from app.db.session import dispose_engines
+
+
+async def main(db_names: list[str], grace_seconds: int, dry_run: bool) -> None:
+    referenced: set[str] = set()
+    try:
+        for db_name in db_names:
+            session = await get_tenant_session(db_name)
+            try:
+                counts = await DocumentRepository(session).reference_counts()
+            finally:
+                await session.close()
+            referenced.update(counts)
+            print(f"{db_name}: {sum(counts.values())} documentos, {len(counts)} blobs referenciados")
+
+        removed = await get_storage().collect_orphans(referenced, grace_seconds=grace_seconds, dry_run=dry_run)
+    finally:
+        await dispose_engines()
+        await close_storage()
+
+    for path in removed:
+        print(f"{'huérfano' if dry_run else 'eliminado'}: {path}")
+    print(f"{len(removed)} blobs {'huérfanos' if dry_run else 'eliminados'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_names", nargs="*", default=[CHURCH_DB])
+    parser.add_argument("--grace-seconds", type=int, default=3600)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.db_names, args.grace_seconds, args.dry_run))
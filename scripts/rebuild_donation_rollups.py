@@ -0,0 +1,27 @@
+"""
+Recalcula donation_daily_rollups desde la tabla donations.
+
+Uso (desde la raíz del proyecto):
+    PYTHONPATH=. python scripts/rebuild_donation_rollups.py            # BD principal
+    PYTHONPATH=. python scripts/rebuild_donation_rollups.py ekk_slug   # BD de un tenant
+"""
+import asyncio
+import sys
+
+from app.api.repositories.donation_rollup import DonationRollupRepository
+from app.core.tenant import CHURCH_DB, get_tenant_session
+from app.db.session import dispose_engines
+
+
+async def main(db_name: str) -> None:
+    session = await get_tenant_session(db_name)
+    try:
+        rows = await DonationRollupRepository(session).rebuild()
+    finally:
+        await session.close()
+        await dispose_engines()
+    print(f"{db_name}: {rows} filas de agregados recalculadas")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else CHURCH_DB))